@@ -0,0 +1,186 @@
+import re
+from typing import List, Dict
+
+from app.models import Triple
+from app.prompt_builder import citation_handles
+
+# Section labels the prompt asks for, plus the legacy 依据 label
+SECTION_LABELS = {
+    "结论": "conclusion",
+    "引用": "references",
+    "依据": "references",
+    "需要补充": "missing",
+}
+
+# A label followed by a colon, optionally bulleted or in bold
+_SECTION_PATTERN = re.compile(
+    r"[-*#>\s]*\**\s*(" + "|".join(SECTION_LABELS) + r")\s*\**\s*[:：]\s*\**"
+)
+# Trailing text that may still grow into a label: a prefix of one, a
+# whole label (optionally bold) still waiting for its colon, emphasis that
+# may open a bold label, or a bullet starting a new line
+_LABEL_PREFIXES = sorted(
+    {label[:n] for label in SECTION_LABELS for n in range(1, len(label) + 1)}, key=len, reverse=True
+)
+_PARTIAL_LABEL_PATTERN = re.compile(
+    r"(?:[-*#>\s]*\**\s*(?:" + "|".join(_LABEL_PREFIXES) + r")\s*\**\s*|\*+\s*|(?:^|\n)[-*#>\s]*)$"
+)
+_HANDLE_PATTERN = re.compile(r"(?<![A-Za-z0-9_])S(\d+)(?![0-9])")
+_NUMBER_PATTERN = re.compile(r"(?<![A-Za-z0-9_])(\d{1,3})(?![0-9])")
+_NONE_VALUES = {"", "无", "暂无", "没有", "无需", "无。", "none", "n/a"}
+
+# Conclusions that admit the evidence does not settle the question
+UNDECIDED_PHRASES = ("无法判断", "无法明确判断", "无法确定")
+
+# Relations that make cited evidence decisive
+PRIORITY_RELATIONS = {"AGE_RANGE", "EXCLUDES", "COVERS"}
+
+
+class StructuredAnswer:
+    """Sections of a structured LLM answer"""
+
+    def __init__(
+        self,
+        conclusion: str = "",
+        references: str = "",
+        missing: str = "",
+        structured: bool = False,
+    ):
+        self.conclusion = conclusion
+        self.references = references
+        self.missing = missing
+        self.structured = structured  # False when no section label was found
+
+
+def _clean(value: str) -> str:
+    value = value.strip().strip("*").strip()
+    return "" if value.lower() in _NONE_VALUES else value
+
+
+def parse_answer(text: str, final: bool = True) -> StructuredAnswer:
+    """
+    Split an answer into conclusion, references and missing-info sections
+
+    Labels may appear on one line or several, in any order, with ASCII or
+    full-width colons and markdown decoration. Text before the first label
+    counts as conclusion. With final=False the text is a stream prefix: a
+    trailing fragment that may still become a label is held back instead
+    of leaking into the previous section.
+    """
+    if not final:
+        text = _PARTIAL_LABEL_PATTERN.sub("", text)
+
+    matches = list(_SECTION_PATTERN.finditer(text))
+    if not matches:
+        return StructuredAnswer(conclusion=text.strip())
+
+    sections: Dict[str, List[str]] = {"conclusion": [], "references": [], "missing": []}
+    lead = text[:matches[0].start()].strip()
+    if lead:
+        sections["conclusion"].append(lead)
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        body = _clean(text[match.end():end])
+        if body:
+            sections[SECTION_LABELS[match.group(1)]].append(body)
+
+    return StructuredAnswer(
+        conclusion="\n".join(sections["conclusion"]),
+        references="\n".join(sections["references"]),
+        missing="\n".join(sections["missing"]),
+        structured=True,
+    )
+
+
+class StructuredAnswerParser:
+    """
+    Incremental parser for streamed answers
+
+    feed() each delta; partial() returns the sections seen so far and
+    result() the final parse once the stream ends. Deltas may split a
+    label or its colon anywhere.
+    """
+
+    def __init__(self):
+        self.chunks: List[str] = []
+
+    def feed(self, delta: str):
+        self.chunks.append(delta)
+
+    @property
+    def text(self) -> str:
+        return "".join(self.chunks)
+
+    def partial(self) -> StructuredAnswer:
+        return parse_answer(self.text, final=False)
+
+    def result(self) -> StructuredAnswer:
+        return parse_answer(self.text, final=True)
+
+
+def resolve_references(
+    references: str,
+    triples: List[Triple],
+    line_numbers: bool = False,
+) -> List[Triple]:
+    """
+    Map cited handles back to evidence triples, in citation order
+
+    Accepts S-handles ("S2") and full source ids ("clause_08"). With
+    line_numbers, bare numbers refer to lines of the numbered evidence
+    format when nothing else matched. Unknown references are ignored.
+    """
+    handles = citation_handles(triples)
+    by_handle = {h: source_id for source_id, h in handles.items()}
+
+    hits = []  # (position, triples)
+    for match in _HANDLE_PATTERN.finditer(references):
+        source_id = by_handle.get(f"S{match.group(1)}")
+        if source_id:
+            hits.append((match.start(), [t for t in triples if t.source_id == source_id]))
+    for source_id in handles:
+        match = re.search(rf"(?<![A-Za-z0-9_]){re.escape(source_id)}(?![A-Za-z0-9_])", references)
+        if match:
+            hits.append((match.start(), [t for t in triples if t.source_id == source_id]))
+    if not hits and line_numbers:
+        for match in _NUMBER_PATTERN.finditer(references):
+            index = int(match.group(1))
+            if 1 <= index <= len(triples):
+                hits.append((match.start(), [triples[index - 1]]))
+
+    cited: List[Triple] = []
+    for _, group in sorted(hits, key=lambda hit: hit[0]):
+        for t in group:
+            if t not in cited:
+                cited.append(t)
+    return cited
+
+
+def answer_confidence(answer: StructuredAnswer, cited: List[Triple]) -> str:
+    """
+    Confidence from what the answer itself reports
+
+    high: cites decisive evidence and needs nothing more; medium: cites
+    evidence but asks for more information; low: cites nothing or says it
+    cannot judge.
+    """
+    if not cited or any(p in answer.conclusion for p in UNDECIDED_PHRASES):
+        return "low"
+    if answer.missing:
+        return "medium"
+    if any(t.r in PRIORITY_RELATIONS for t in cited):
+        return "high"
+    return "medium"
+
+
+def render_answer(answer: StructuredAnswer, cited: List[Triple]) -> str:
+    """Render a parsed answer with full source ids for display"""
+    source_ids = []
+    for t in cited:
+        if t.source_id and t.source_id not in source_ids:
+            source_ids.append(t.source_id)
+    return "\n".join([
+        f"结论：{answer.conclusion}",
+        f"依据：{', '.join(source_ids) if source_ids else '无'}",
+        f"需要补充：{answer.missing or '无'}",
+    ])
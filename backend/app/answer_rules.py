@@ -0,0 +1,93 @@
+import re
+from typing import Optional, List, Dict, Any, Tuple
+
+from app.models import Triple
+from app.entity_linker import extract_age
+
+# Question phrasings that ask whether someone can buy a product
+PURCHASE_KEYWORDS = ("能买", "可以买", "能不能买", "能否购买", "可以购买", "能购买", "投保")
+
+_AGE_RANGE_PATTERN = re.compile(r"^\s*(\d{1,3})\s*[-~至到]\s*(\d{1,3})")
+
+
+class RuleAnswer:
+    """Templated answer decided from the evidence alone"""
+
+    def __init__(self, answer: str, triples: List[Triple]):
+        self.answer = answer
+        self.triples = triples
+
+
+def is_purchase_question(question: str) -> bool:
+    """Check whether question asks about buying / enrolling in a product"""
+    return any(k in question for k in PURCHASE_KEYWORDS)
+
+
+def parse_age_range(value: str) -> Optional[Tuple[int, int]]:
+    """Parse an AGE_RANGE value such as "60-75" into (min, max)"""
+    match = _AGE_RANGE_PATTERN.match(value or "")
+    if not match:
+        return None
+    low, high = int(match.group(1)), int(match.group(2))
+    return (low, high) if low <= high else None
+
+
+def _names(linked_entities: List[Dict[str, Any]], label: str) -> List[str]:
+    return [e["name"] for e in linked_entities if e.get("label") == label and e.get("name")]
+
+
+def _cite(t: Triple) -> str:
+    return f"[source_id={t.source_id}]" if t.source_id else ""
+
+
+def evaluate(
+    question: str,
+    linked_entities: List[Dict[str, Any]],
+    triples: List[Triple],
+) -> Optional[RuleAnswer]:
+    """
+    Answer eligibility questions that the evidence settles on its own
+
+    Applies only to purchase questions about exactly one linked product.
+    The evidence is decisive when the product EXCLUDES a linked disease or
+    the age in the question falls outside the product's AGE_RANGE. Returns
+    None whenever the question needs the LLM.
+    """
+    if not is_purchase_question(question):
+        return None
+    products = _names(linked_entities, "InsuranceProduct")
+    if len(products) != 1:
+        return None
+    product = products[0]
+    diseases = set(_names(linked_entities, "Disease"))
+    age = extract_age(question)
+
+    reasons = []
+    evidence = []
+    seen = set()
+    for t in triples:
+        # Each edge is fetched from both of its ends
+        key = (t.r, frozenset((t.h, t.t)), t.source_id)
+        if key in seen:
+            continue
+        seen.add(key)
+        if t.r == "EXCLUDES" and product in (t.h, t.t):
+            disease = t.t if t.h == product else t.h
+            if disease in diseases:
+                reasons.append(f"{product}的责任免除范围包含{disease}{_cite(t)}")
+                evidence.append(t)
+        elif t.r == "AGE_RANGE" and age is not None and t.h == product:
+            bounds = parse_age_range(t.t)
+            if bounds and not bounds[0] <= age <= bounds[1]:
+                reasons.append(
+                    f"{product}的投保年龄为{bounds[0]}-{bounds[1]}岁，{age}岁不在范围内{_cite(t)}"
+                )
+                evidence.append(t)
+
+    if not reasons:
+        return None
+
+    lines = [f"结论：不可以购买{product}。", "依据："]
+    lines.extend(f"- {reason}" for reason in reasons)
+    lines.append("需要补充：以上为条款层面的判断，最终以保险公司核保结果为准。")
+    return RuleAnswer("\n".join(lines), evidence)
@@ -1,3 +1,5 @@
+from typing import Any, Dict, List, Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -8,16 +10,123 @@ class Settings(BaseSettings):
     NEO4J_URI: str = "bolt://localhost:7687"
     NEO4J_USER: str = "neo4j"
     NEO4J_PASSWORD: str = "neo4j_password"
+    NEO4J_MAX_POOL_SIZE: int = 100
 
     # LLM
     LLM_PROVIDER: str = "mock"
     LLM_API_KEY: str = "mock_key"
     LLM_MODEL: str = "mock-model"
+    LLM_BASE_URL: str = "https://api.openai.com/v1"
+    LLM_TIMEOUT: float = 30.0  # seconds, per call unless overridden
+    LLM_CONNECT_TIMEOUT: float = 5.0
+    LLM_MAX_CONNECTIONS: int = 100
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    LLM_KEEPALIVE_EXPIRY: float = 30.0
+    LLM_TEMPERATURE: Optional[float] = None  # None keeps the provider default
+    LLM_STANDIN_PROFILE: str = "typical"  # latency profile when LLM_PROVIDER=standin
+    LLM_PROMPT_CACHE_KEY: bool = False  # send prompt prefix hash as prompt_cache_key
+
+    # iFlytek Spark (LLM_PROVIDER=spark)
+    SPARK_API_KEY: str = ""
+    SPARK_API_SECRET: str = ""
+    SPARK_MODEL: str = "lite"
+    SPARK_BASE_URL: str = "https://spark-api-open.xf-yun.com/v1"
+
+    # LLM provider pool; JSON list of {"name", "provider", "model", "base_url",
+    # "api_key", "timeout"}; empty means a single provider from the LLM_* settings
+    LLM_PROVIDERS: List[Dict[str, Any]] = []
+    LLM_MAX_RETRIES: int = 2
+    LLM_RETRY_BACKOFF: float = 0.2  # seconds, doubled per retry
+    LLM_RETRY_BACKOFF_MAX: float = 2.0
+    LLM_BREAKER_FAILURES: int = 5  # consecutive failures that open a provider's circuit
+    LLM_BREAKER_RESET: float = 30.0  # seconds before a half-open trial call
+    LLM_HEDGE: bool = False  # fire a second request after the primary's p95 latency
+    LLM_HEDGE_MIN_SAMPLES: int = 20  # latency samples needed before hedging
+    LLM_HEDGE_MIN_DELAY: float = 0.05  # seconds
+
+    # LLM call scheduling; 0 disables a rate limit or queue cap
+    LLM_MAX_IN_FLIGHT: int = 16
+    LLM_REQUESTS_PER_MINUTE: float = 0
+    LLM_TOKENS_PER_MINUTE: float = 0
+    LLM_MAX_QUEUE_INTERACTIVE: int = 64  # queued calls before rejecting with 429
+    LLM_MAX_QUEUE_BATCH: int = 1000
+    LLM_INTERACTIVE_RESERVE: int = 2  # in-flight slots batch calls may not use
+    LLM_EXPECTED_COMPLETION_TOKENS: int = 300  # added to prompt tokens for TPM accounting
+
+    # Model routing: simple questions go to a small model, the rest to the
+    # main pool. The small route uses LLM_SMALL_PROVIDERS (same format as
+    # LLM_PROVIDERS) or else the main pool with LLM_SMALL_MODEL
+    LLM_ROUTING_ENABLED: bool = False
+    LLM_SMALL_MODEL: str = ""
+    LLM_SMALL_PROVIDERS: List[Dict[str, Any]] = []
+    LLM_ROUTE_MAX_QUESTION_TOKENS: int = 40  # longer questions go to the large model
+    LLM_ROUTE_MAX_ENTITIES: int = 2  # more linked entities go to the large model
+    LLM_ROUTE_MIN_TRIPLES: int = 2  # less evidence goes to the large model
+    LLM_ROUTE_LARGE_INTENTS: List[str] = ["general", "service_eligibility"]
+
+    # LLM response cache, keyed by (provider, model, temperature, prompt hash);
+    # only providers configured with temperature 0 are cached
+    LLM_CACHE_ENABLED: bool = False
+    LLM_CACHE_PATH: str = "./data/cache/llm_cache.sqlite3"  # empty for memory only
+    LLM_CACHE_MEMORY_ENTRIES: int = 1024
+    LLM_CACHE_DISK_MAX_MB: int = 256
+    LLM_CACHE_TTL: float = 7 * 24 * 3600  # seconds
+
+    # Prompt
+    PROMPT_TOKEN_BUDGET: int = 3000  # default input token budget per prompt
+    PROMPT_TOKEN_BUDGETS: Dict[str, int] = {}  # per-model overrides, JSON in env
+    PROMPT_EVIDENCE_FORMAT: str = "lines"  # lines | grouped
 
     # Application
     LOG_DIR: str = "./data/logs"
+    LOG_QUEUE_SIZE: int = 10000  # QA log entries buffered for the writer thread
+    LOG_BATCH_SIZE: int = 256
+    LOG_FLUSH_INTERVAL: float = 1.0  # seconds
+    LOG_ROTATE_MAX_MB: int = 64  # 0 disables size-based rotation
+    LOG_ROTATE_INTERVAL: float = 0  # seconds; 0 disables time-based rotation
+    LOG_COMPRESS: bool = True  # gzip rotated QA logs
+    LOG_OVERFLOW: str = "drop"  # drop | block, when the queue is full
+    LOG_BLOCK_TIMEOUT: float = 1.0  # seconds to wait under the block policy
+    LOG_BLOBS: bool = True  # store prompts and triples once as content-addressed blobs
+    LOG_SQLITE: bool = False  # also index QA logs in LOG_DIR/qa_logs.sqlite3 (see app.qa_store)
     SUBGRAPH_DEFAULT_HOP: int = 2
     SUBGRAPH_DEFAULT_LIMIT: int = 20
 
+    # Retrieval pipeline
+    SPECULATIVE_MIN_SCORE: float = 0.5  # linked entities below this are not expanded
+    SPECULATIVE_MAX_ENTITIES: int = 8  # max entities expanded per question
+
+    # Tracing
+    TRACING_ENABLED: bool = True
+    TRACE_BUFFER_SIZE: int = 200  # recent traces kept for /api/v1/traces
+    TRACE_OTLP_FILE: str = ""  # OTLP/JSON lines, relative to LOG_DIR; empty disables
+    TRACE_SERVICE_NAME: str = "insurance-graphrag-backend"
+
+    # Health probing (/health, /health/live, /health/ready read cached results)
+    HEALTH_PROBE_INTERVAL: float = 5.0  # seconds between background probes
+    HEALTH_PROBE_TIMEOUT: float = 2.0  # a probe slower than this counts as failed
+    HEALTH_STALE_AFTER: float = 30.0  # older results are reported as stale
+    HEALTH_LLM_PING_AFTER: float = 60.0  # ping an LLM provider that has had no calls for this long
+
+    # Metrics
+    METRICS_ENABLED: bool = True  # /metrics, request middleware and loop lag sampling
+    METRICS_LOOP_LAG_INTERVAL: float = 0.5  # seconds between event loop lag samples
+    LOOP_BLOCK_DETECT: bool = False  # debug: capture stacks of event loop stalls
+    LOOP_BLOCK_THRESHOLD_MS: float = 100.0  # stalls at least this long are attributed
+
+    # On-demand profiling of requests sending X-Profile: <token>; empty disables
+    PROFILE_TOKEN: str = ""
+    PROFILE_INTERVAL_MS: float = 1.0  # stack sampling interval
+    PROFILE_MAX_SECONDS: float = 30.0  # sampling stops after this long
+    PROFILE_DIR: str = "profiles"  # relative to LOG_DIR
+
+    # Memory introspection (/api/v1/memory, same token as profiling)
+    MEMORY_TRACEMALLOC: bool = False  # trace allocations from startup; slows allocation
+    MEMORY_TRACEMALLOC_FRAMES: int = 1  # frames kept per allocation
+
+    # Intent-based retrieval
+    INTENT_CLASSIFIER_ENABLED: bool = True
+    INTENT_MIN_CONFIDENCE: float = 0.5  # below this the whole neighborhood is fetched
+
 
 settings = Settings()
@@ -1,7 +1,8 @@
 import re
 import json
 import os
-from typing import List, Dict, Any, Optional
+import asyncio
+from typing import List, Dict, Any, Optional, AsyncIterator
 
 from app.neo4j_client import neo4j_client
 
@@ -40,45 +41,84 @@ def expand_with_synonyms(mention: str) -> List[str]:
     return mentions
 
 
+def extract_terms(question: str) -> List[str]:
+    """Extract candidate mention terms from question"""
+    # Extract key terms (simplified: split by common delimiters)
+    # In production, use NLP for entity extraction
+    terms = re.split(r"[，。、？?！!\s,]+", question)
+    return [t.strip() for t in terms if t.strip() and len(t.strip()) > 1]
+
+
+async def _lookup_term(term: str) -> List[Dict[str, Any]]:
+    """Resolve one term (and its synonyms) to candidate graph nodes"""
+    candidates = []
+    for exp_term in expand_with_synonyms(term):
+        # Query Neo4j
+        nodes = await neo4j_client.find_nodes_by_name_or_alias(exp_term, topk=5)
+        for node in nodes:
+            candidates.append({
+                "mention": term,
+                "node_id": node["node_id"],
+                "name": node["name"],
+                "label": node["label"],
+                "score": node["score"],
+            })
+    return candidates
+
+
+def merge_linked_entity(
+    linked_entities: List[Dict[str, Any]], entity: Dict[str, Any]
+) -> bool:
+    """
+    Merge one candidate into the linked list in place
+
+    Returns True if the candidate is a new node, False if it was merged
+    into an existing entry
+    """
+    existing = next(
+        (e for e in linked_entities if e["node_id"] == entity["node_id"]),
+        None,
+    )
+    if existing:
+        # Update with higher score
+        if entity["score"] > existing["score"]:
+            existing["score"] = entity["score"]
+            existing["mention"] = entity["mention"]
+        return False
+    linked_entities.append(dict(entity))
+    return True
+
+
+async def iter_linked_entities(question: str) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield candidate entities as soon as each term resolves
+
+    Terms are looked up concurrently; candidates are not deduplicated, use
+    merge_linked_entity to fold them into a linked list.
+    """
+    tasks = [asyncio.create_task(_lookup_term(term)) for term in extract_terms(question)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            for entity in await next_done:
+                yield entity
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
 async def link_entities(question: str) -> List[Dict[str, Any]]:
     """
     Link entities from question to graph nodes
 
     Returns list of linked entities with scores
     """
-    # Extract key terms (simplified: split by common delimiters)
-    # In production, use NLP for entity extraction
-    terms = re.split(r"[，。、？?！!\s,]+", question)
-    terms = [t.strip() for t in terms if t.strip() and len(t.strip()) > 1]
-
-    linked_entities = []
-
-    for term in terms:
-        # Expand with synonyms
-        expanded_terms = expand_with_synonyms(term)
-
-        for exp_term in expanded_terms:
-            # Query Neo4j
-            nodes = await neo4j_client.find_nodes_by_name_or_alias(exp_term, topk=5)
-
-            for node in nodes:
-                # Check if already in list
-                existing = next(
-                    (e for e in linked_entities if e["node_id"] == node["node_id"]),
-                    None,
-                )
-                if existing:
-                    # Update with higher score
-                    if node["score"] > existing["score"]:
-                        existing["score"] = node["score"]
-                        existing["mention"] = term
-                else:
-                    linked_entities.append({
-                        "mention": term,
-                        "node_id": node["node_id"],
-                        "label": node["label"],
-                        "score": node["score"],
-                    })
+    terms = extract_terms(question)
+    results = await asyncio.gather(*(_lookup_term(term) for term in terms))
+
+    linked_entities: List[Dict[str, Any]] = []
+    for candidates in results:
+        for entity in candidates:
+            merge_linked_entity(linked_entities, entity)
 
     # Sort by score descending
     linked_entities.sort(key=lambda x: x["score"], reverse=True)
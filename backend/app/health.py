@@ -0,0 +1,206 @@
+"""
+Background health prober
+
+Health endpoints never touch Neo4j or the LLM themselves. A background
+task probes every HEALTH_PROBE_INTERVAL seconds and keeps the latest
+result per component; /health, /health/live and /health/ready only read
+that snapshot. Neo4j is probed with RETURN 1. The LLM is judged from the
+provider circuit breakers while real calls keep them current; a provider
+with no call for HEALTH_LLM_PING_AFTER seconds is pinged (see
+Provider.ping) at most that often. A component whose last check is older
+than HEALTH_STALE_AFTER is reported as stale.
+"""
+
+import time
+import asyncio
+from typing import Optional, Dict, Any, Callable, Awaitable, Tuple
+
+from app.config import settings
+
+
+class ComponentStatus:
+    """Result of the latest probe of one component"""
+
+    __slots__ = ("name", "status", "checked_at", "latency_ms", "error", "detail")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.status = "unknown"  # ok | fail | unknown
+        self.checked_at: Optional[float] = None  # wall time of the last probe
+        self.latency_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self.detail: Optional[Any] = None
+
+    def current(self, stale_after: float) -> str:
+        """Status, or "stale" when the last probe is too old"""
+        if self.checked_at is None:
+            return "unknown"
+        if time.time() - self.checked_at > stale_after:
+            return "stale"
+        return self.status
+
+    def to_dict(self, stale_after: float) -> Dict[str, Any]:
+        age = round(time.time() - self.checked_at, 3) if self.checked_at is not None else None
+        return {
+            "status": self.current(stale_after),
+            "checked_at": self.checked_at,
+            "age_s": age,
+            "latency_ms": self.latency_ms,
+            "error": self.error,
+            "detail": self.detail,
+        }
+
+
+# A probe returns (ok, detail) or raises
+Probe = Callable[[], Awaitable[Tuple[bool, Any]]]
+
+
+async def probe_neo4j() -> Tuple[bool, Any]:
+    from app.neo4j_client import neo4j_client
+
+    return await neo4j_client.health_check(), None
+
+
+# endpoint -> (monotonic time, ok) of the latest ping
+_pings: Dict[str, Tuple[float, bool]] = {}
+
+
+async def _ping(provider) -> None:
+    try:
+        # Half the probe timeout, so a slow ping is recorded as failed
+        ok = await provider.ping(settings.HEALTH_PROBE_TIMEOUT / 2)
+    except Exception:
+        ok = False
+    _pings[provider.endpoint] = (time.monotonic(), ok)
+
+
+def _last_seen(provider) -> float:
+    """When the provider was last heard from, by a call or a ping"""
+    ping = _pings.get(provider.endpoint)
+    return max(provider.stats.last_call or 0.0, ping[0] if ping is not None else 0.0)
+
+
+def _usable(provider) -> bool:
+    if not provider.breaker.available():
+        return False
+    ping = _pings.get(provider.endpoint)
+    if ping is not None and ping[0] > (provider.stats.last_call or 0.0):
+        return ping[1]
+    return True
+
+
+async def probe_llm() -> Tuple[bool, Any]:
+    """Usable while any provider accepts calls and answered its latest ping"""
+    from app.llm_router import model_router
+
+    # Routes on one endpoint share a breaker; check each endpoint once
+    providers = list({
+        p.endpoint: p for client in model_router.clients.values() for p in client.providers
+    }.values())
+    now = time.monotonic()
+    idle = [
+        p for p in providers
+        if p.breaker.available() and now - _last_seen(p) >= settings.HEALTH_LLM_PING_AFTER
+    ]
+    if idle:
+        await asyncio.gather(*(_ping(p) for p in idle))
+
+    detail = {}
+    for p in providers:
+        ping = _pings.get(p.endpoint)
+        detail[p.name] = {
+            "breaker": p.breaker.state,
+            "ping": None if ping is None else ("ok" if ping[1] else "fail"),
+        }
+    return any(_usable(p) for p in providers), detail
+
+
+class HealthProber:
+    """Background task probing each component and caching the results"""
+
+    def __init__(self, interval: float = 5.0, timeout: float = 2.0, stale_after: float = 30.0):
+        self.interval = interval
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self.probes: Dict[str, Probe] = {}
+        self.components: Dict[str, ComponentStatus] = {}
+        self.required = set()  # components readiness depends on
+        self.task: Optional[asyncio.Task] = None
+
+    def register(self, name: str, probe: Probe, required: bool = True):
+        self.probes[name] = probe
+        self.components[name] = ComponentStatus(name)
+        if required:
+            self.required.add(name)
+
+    async def start(self):
+        """Probe once so the first health request has a result, then keep probing"""
+        if self.task is None:
+            await self.probe_all()
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.probe_all()
+
+    async def probe_all(self):
+        await asyncio.gather(*(self._probe(name) for name in self.probes))
+
+    async def _probe(self, name: str):
+        component = self.components[name]
+        start = time.perf_counter()
+        try:
+            ok, detail = await asyncio.wait_for(self.probes[name](), self.timeout)
+            component.status = "ok" if ok else "fail"
+            component.error = None
+            component.detail = detail
+        except asyncio.TimeoutError:
+            component.status = "fail"
+            component.error = f"probe timed out after {self.timeout}s"
+            component.detail = None
+        except Exception as e:
+            component.status = "fail"
+            component.error = str(e)
+            component.detail = None
+        component.latency_ms = round((time.perf_counter() - start) * 1000, 1)
+        component.checked_at = time.time()
+
+    def status(self, name: str) -> str:
+        component = self.components.get(name)
+        return component.current(self.stale_after) if component is not None else "unknown"
+
+    def ready(self) -> bool:
+        """Whether every required component passed its latest, fresh probe"""
+        return all(self.status(name) == "ok" for name in self.required)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "status": "ok" if self.ready() else "fail",
+            "probe_interval_s": self.interval,
+            "stale_after_s": self.stale_after,
+            "components": {
+                name: {**c.to_dict(self.stale_after), "required": name in self.required}
+                for name, c in self.components.items()
+            },
+        }
+
+
+def create_health_prober() -> HealthProber:
+    prober = HealthProber(settings.HEALTH_PROBE_INTERVAL, settings.HEALTH_PROBE_TIMEOUT, settings.HEALTH_STALE_AFTER)
+    prober.register("neo4j", probe_neo4j)
+    # Answers degrade to evidence-only without an LLM, so it does not gate readiness
+    prober.register("llm", probe_llm, required=False)
+    return prober
+
+
+health_prober = create_health_prober()
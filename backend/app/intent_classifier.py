@@ -0,0 +1,163 @@
+import os
+import re
+import json
+import math
+from collections import Counter
+from typing import List, Dict, Any, Tuple
+
+from app.config import settings
+
+# Relation types fetched for each intent; relations None means the whole
+# neighborhood. properties are node properties returned as extra facts
+# (see subgraph.PROPERTY_FACTS)
+INTENT_PROFILES: Dict[str, Dict[str, Any]] = {
+    "age_limit": {"relations": ["AGE_RANGE", "EXCLUDES", "COVERS"]},
+    "product_query": {"relations": ["AGE_RANGE", "COVERS"]},
+    "coverage": {"relations": ["COVERS", "EXCLUDES", "AGE_RANGE"]},
+    "coverage_query": {"relations": ["COVERS"]},
+    "exclusion_query": {"relations": ["EXCLUDES"]},
+    "waiting_period": {"relations": ["COVERS", "EXCLUDES"], "properties": ["waiting_period_days"]},
+    "drug_query": {"relations": ["TREATS"]},
+    "service_query": {"relations": ["PROVIDES"]},
+    "elder_care": {"relations": ["PROVIDES"]},
+    "location_service": {"relations": ["PROVIDES"]},
+    "service_eligibility": {"relations": ["COVERS", "EXCLUDES", "PROVIDES"]},
+    "general": {"relations": None},
+}
+
+# Built-in training questions, so the classifier works without docs/
+SEED_QUESTIONS: List[Tuple[str, str]] = [
+    ("70岁能买XX护理险吗？", "age_limit"),
+    ("65岁还可以投保吗？", "age_limit"),
+    ("多大年龄可以购买这个保险？", "age_limit"),
+    ("投保年龄限制是多少岁？", "age_limit"),
+    ("75岁的老人还能投保什么？", "age_limit"),
+    ("超过60岁能买医疗险吗？", "age_limit"),
+    ("有哪些适合60岁老人的护理险？", "product_query"),
+    ("推荐几款医疗险产品", "product_query"),
+    ("有哪些护理险可以选？", "product_query"),
+    ("适合老年人的保险有哪些？", "product_query"),
+    ("XX医疗险承保高血压吗？", "coverage"),
+    ("糖尿病能被这个保险保障吗？", "coverage"),
+    ("XX护理险保哪些病？", "coverage"),
+    ("哪些保险覆盖冠心病？", "coverage_query"),
+    ("哪些产品可以保脑卒中？", "coverage_query"),
+    ("哪些产品不保高血压？", "exclusion_query"),
+    ("XX护理险的责任免除有哪些？", "exclusion_query"),
+    ("哪些疾病属于除外责任？", "exclusion_query"),
+    ("等待期多少天？", "waiting_period"),
+    ("观察期有多长？", "waiting_period"),
+    ("XX医疗险的等待期是几天？", "waiting_period"),
+    ("哪个保险等待期最短？", "waiting_period"),
+    ("等待期内生病能赔吗？", "waiting_period"),
+    ("买了多久以后开始生效？", "waiting_period"),
+    ("什么药可以治疗高血压？", "drug_query"),
+    ("冠心病吃什么药？", "drug_query"),
+    ("治疗高血压的药物有哪些？", "drug_query"),
+    ("哪些药能治脑卒中？", "drug_query"),
+    ("糖尿病患者可以享受哪些服务？", "service_query"),
+    ("有哪些康复服务？", "service_query"),
+    ("XX公司有哪些服务？", "service_query"),
+    ("慢性病患者能获得什么服务？", "service_query"),
+    ("XX养老院提供什么护理服务？", "elder_care"),
+    ("养老机构有哪些照护服务？", "elder_care"),
+    ("上海有哪些养老院？", "location_service"),
+    ("北京的养老机构提供哪些服务？", "location_service"),
+    ("杭州有哪些养老服务？", "location_service"),
+    ("XX养老院在上海有分院吗？", "location_service"),
+    ("阿尔茨海默病可以申请护理服务吗？", "service_eligibility"),
+    ("中风后能申请长期护理吗？", "service_eligibility"),
+]
+
+_DIGITS = re.compile(r"\d+")
+_SPACES = re.compile(r"\s+")
+
+
+def load_eval_questions() -> List[Tuple[str, str]]:
+    """Load (question, category) pairs from docs/eval_questions.json"""
+    path = os.path.join(os.path.dirname(__file__), "../../docs/eval_questions.json")
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        items = json.load(f)
+    return [
+        (item["question"], item["category"])
+        for item in items
+        if item.get("category") in INTENT_PROFILES
+    ]
+
+
+def char_ngrams(text: str, sizes: Tuple[int, ...] = (1, 2, 3)) -> List[str]:
+    """Distinct character n-grams of a normalized question"""
+    text = _SPACES.sub("", _DIGITS.sub("0", text.lower()))
+    grams = []
+    for n in sizes:
+        grams.extend(text[i:i + n] for i in range(len(text) - n + 1))
+    return list(dict.fromkeys(grams))
+
+
+class IntentClassifier:
+    """
+    Multinomial naive Bayes over character n-grams
+
+    Small and fast enough to run on every question. Each n-gram counts once
+    per question, and digits are normalized so "70岁" and "55岁" share
+    features.
+    """
+
+    def __init__(self, examples: List[Tuple[str, str]], alpha: float = 0.1):
+        self.alpha = alpha
+        self.counts: Dict[str, Counter] = {}
+        self.totals: Dict[str, int] = {}
+        self.priors: Dict[str, float] = {}
+        labels = Counter(label for _, label in examples)
+        for question, label in examples:
+            self.counts.setdefault(label, Counter()).update(char_ngrams(question))
+        self.vocab = set()
+        for label, counter in self.counts.items():
+            self.totals[label] = sum(counter.values())
+            self.vocab.update(counter)
+            self.priors[label] = math.log(labels[label] / len(examples))
+
+    def scores(self, question: str) -> Dict[str, float]:
+        """Posterior probability per intent"""
+        grams = [g for g in char_ngrams(question) if g in self.vocab]
+        vocab_size = len(self.vocab)
+        logps = {}
+        for label, counter in self.counts.items():
+            denom = math.log(self.totals[label] + self.alpha * vocab_size)
+            logps[label] = self.priors[label] + sum(
+                math.log(counter[g] + self.alpha) - denom for g in grams
+            )
+        top = max(logps.values())
+        exps = {label: math.exp(lp - top) for label, lp in logps.items()}
+        total = sum(exps.values())
+        return {label: v / total for label, v in exps.items()}
+
+    def predict(self, question: str) -> Tuple[str, float]:
+        """Best intent and its probability"""
+        scores = self.scores(question)
+        label = max(scores, key=scores.get)
+        return label, scores[label]
+
+
+def classify(question: str) -> Tuple[str, float]:
+    """
+    Classify a question into one of INTENT_PROFILES
+
+    Falls back to "general" when disabled or below INTENT_MIN_CONFIDENCE
+    """
+    if not settings.INTENT_CLASSIFIER_ENABLED:
+        return "general", 1.0
+    label, prob = intent_classifier.predict(question)
+    if prob < settings.INTENT_MIN_CONFIDENCE:
+        return "general", prob
+    return label, prob
+
+
+def get_profile(intent: str) -> Dict[str, Any]:
+    """Retrieval profile for an intent"""
+    return INTENT_PROFILES.get(intent, INTENT_PROFILES["general"])
+
+
+intent_classifier = IntentClassifier(SEED_QUESTIONS + load_eval_questions())
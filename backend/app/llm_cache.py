@@ -0,0 +1,256 @@
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, List, Dict, Any, Tuple
+
+from app.config import settings
+
+
+def hash_messages(messages: List[Dict[str, str]]) -> str:
+    """Content hash of a full chat prompt"""
+    payload = json.dumps(messages, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def make_cache_key(provider: str, model: str, temperature: Optional[float], prompt_hash: str) -> str:
+    """Cache key for one (provider, model, temperature, prompt) combination"""
+    raw = f"{provider}\x1f{model}\x1f{'default' if temperature is None else temperature}\x1f{prompt_hash}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class CachedAnswer:
+    """A cached answer with the provider and model that produced it"""
+
+    def __init__(self, answer: str, provider: str, model: str):
+        self.answer = answer
+        self.provider = provider
+        self.model = model
+
+
+def get_cache_path() -> str:
+    """Get SQLite path for the disk tier"""
+    path = settings.LLM_CACHE_PATH
+    if not os.path.isabs(path):
+        # Relative to project root, like LOG_DIR
+        path = os.path.join(os.path.dirname(__file__), "../../../", path)
+    return path
+
+
+class LLMResponseCache:
+    """
+    Content-addressed LLM response cache
+
+    Tier 1 is an in-memory LRU of max_memory_entries answers. Tier 2 is a
+    SQLite table that survives restarts; entries older than ttl seconds are
+    ignored and purged, and the least recently hit entries are evicted once
+    the stored answers exceed max_disk_bytes. Disk access runs in a worker
+    thread so it never blocks the event loop.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_memory_entries: int = 1024,
+        max_disk_bytes: int = 256 * 1024 * 1024,
+        ttl: float = 7 * 24 * 3600,
+    ):
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl = ttl
+        self.memory: "OrderedDict[str, Tuple[CachedAnswer, float]]" = OrderedDict()
+        self.memory_bytes = 0
+        self.db: Optional[sqlite3.Connection] = None
+        self.db_lock = threading.Lock()
+        self.writes_since_evict = 0
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0,
+        }
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self.db is None and self.path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    provider TEXT,
+                    model TEXT,
+                    answer TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_hit REAL NOT NULL
+                )
+                """
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_hit ON llm_cache (last_hit)")
+            db.commit()
+            self.db = db
+        return self.db
+
+    def close(self):
+        with self.db_lock:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
+
+    # Memory tier
+
+    def _memory_get(self, key: str) -> Optional[CachedAnswer]:
+        entry = self.memory.get(key)
+        if entry is None:
+            return None
+        cached, created_at = entry
+        if time.time() - created_at > self.ttl:
+            self._memory_drop(key)
+            return None
+        self.memory.move_to_end(key)
+        return cached
+
+    def _memory_put(self, key: str, cached: CachedAnswer, created_at: float):
+        if key in self.memory:
+            self._memory_drop(key)
+        self.memory[key] = (cached, created_at)
+        self.memory_bytes += len(cached.answer.encode("utf-8"))
+        while len(self.memory) > self.max_memory_entries:
+            oldest = next(iter(self.memory))
+            self._memory_drop(oldest)
+            self.stats["evictions"] += 1
+
+    def _memory_drop(self, key: str):
+        cached, _ = self.memory.pop(key)
+        self.memory_bytes -= len(cached.answer.encode("utf-8"))
+
+    # Disk tier (called from worker threads)
+
+    def _disk_get(self, keys: List[str]) -> Optional[Tuple[str, str, str, str, float]]:
+        with self.db_lock:
+            db = self._connect()
+            if db is None:
+                return None
+            now = time.time()
+            placeholders = ",".join("?" for _ in keys)
+            row = db.execute(
+                f"SELECT key, answer, provider, model, created_at FROM llm_cache "
+                f"WHERE key IN ({placeholders}) AND created_at >= ? "
+                f"ORDER BY created_at DESC LIMIT 1",
+                [*keys, now - self.ttl],
+            ).fetchone()
+            if row:
+                db.execute("UPDATE llm_cache SET last_hit = ? WHERE key = ?", (now, row[0]))
+                db.commit()
+            return row
+
+    def _disk_put(self, key: str, provider: str, model: str, answer: str, created_at: float):
+        with self.db_lock:
+            db = self._connect()
+            if db is None:
+                return
+            db.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, provider, model, answer, len(answer.encode("utf-8")), created_at, created_at),
+            )
+            db.commit()
+            self.writes_since_evict += 1
+            if self.writes_since_evict >= 100:
+                self.writes_since_evict = 0
+                self._disk_evict(db)
+
+    def _disk_evict(self, db: sqlite3.Connection):
+        """Purge expired entries, then least recently hit ones over the size cap"""
+        removed = db.execute(
+            "DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl,)
+        ).rowcount
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        if total > self.max_disk_bytes:
+            excess = total - self.max_disk_bytes
+            victims = []
+            for key, size in db.execute("SELECT key, size FROM llm_cache ORDER BY last_hit"):
+                victims.append((key,))
+                excess -= size
+                if excess <= 0:
+                    break
+            db.executemany("DELETE FROM llm_cache WHERE key = ?", victims)
+            removed += len(victims)
+        db.commit()
+        self.stats["evictions"] += removed
+
+    def disk_stats(self) -> Dict[str, Any]:
+        with self.db_lock:
+            db = self._connect()
+            if db is None:
+                return {"entries": 0, "bytes": 0}
+            entries, size = db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+            ).fetchone()
+            return {"entries": entries, "bytes": size}
+
+    # Public API
+
+    async def get(self, keys: List[str]) -> Tuple[Optional[CachedAnswer], str]:
+        """
+        Look up the first cached answer for any of keys
+
+        Returns (cached, tier) where tier is "memory", "disk" or "miss".
+        Disk hits are promoted into the memory tier.
+        """
+        for key in keys:
+            cached = self._memory_get(key)
+            if cached is not None:
+                self.stats["memory_hits"] += 1
+                return cached, "memory"
+
+        if self.path:
+            row = await asyncio.to_thread(self._disk_get, keys)
+            if row:
+                key, answer, provider, model, created_at = row
+                cached = CachedAnswer(answer, provider, model)
+                self._memory_put(key, cached, created_at)
+                self.stats["disk_hits"] += 1
+                return cached, "disk"
+
+        self.stats["misses"] += 1
+        return None, "miss"
+
+    async def put(self, key: str, provider: str, model: str, answer: str):
+        """Store an answer in both tiers"""
+        created_at = time.time()
+        self._memory_put(key, CachedAnswer(answer, provider, model), created_at)
+        self.stats["writes"] += 1
+        if self.path:
+            await asyncio.to_thread(self._disk_put, key, provider, model, answer, created_at)
+
+    def summary(self) -> Dict[str, Any]:
+        """Hit metrics and memory-tier size"""
+        lookups = self.stats["memory_hits"] + self.stats["disk_hits"] + self.stats["misses"]
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        return {
+            **self.stats,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory_bytes,
+        }
+
+
+def create_cache() -> Optional[LLMResponseCache]:
+    """Build the response cache from settings, or None when disabled"""
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    return LLMResponseCache(
+        path=get_cache_path() if settings.LLM_CACHE_PATH else None,
+        max_memory_entries=settings.LLM_CACHE_MEMORY_ENTRIES,
+        max_disk_bytes=settings.LLM_CACHE_DISK_MAX_MB * 1024 * 1024,
+        ttl=settings.LLM_CACHE_TTL,
+    )
@@ -1,51 +1,314 @@
-from typing import Optional
-import requests
+import asyncio
+import random
+import time
+from typing import Optional, Union, List, Dict, Any, AsyncIterator, Tuple
 
 from app.config import settings
+from app.llm_cache import LLMResponseCache, create_cache, hash_messages, make_cache_key
+from app.llm_scheduler import LLMQueueFullError, LLMScheduler, create_scheduler
+from app.prompt_builder import estimate_tokens
+from app.tracing import tracer
+from app.llm_providers import (
+    Provider,
+    LLMError,
+    LLMUnavailableError,
+    create_provider,
+)
+
+
+class LLMResult:
+    """Answer text plus where it came from"""
+
+    def __init__(self, text: str, provider: str, model: str, cache: str, latency_ms: float):
+        self.text = text
+        self.provider = provider
+        self.model = model
+        self.cache = cache  # memory | disk | miss | off
+        self.latency_ms = latency_ms
+
+
+def default_provider_configs() -> List[Dict[str, Any]]:
+    """Provider pool from LLM_PROVIDERS, or the single LLM_PROVIDER"""
+    return settings.LLM_PROVIDERS or [{"provider": settings.LLM_PROVIDER}]
 
 
 class LLMClient:
-    def __init__(self):
-        self.provider = settings.LLM_PROVIDER
-        self.api_key = settings.LLM_API_KEY
-        self.model = settings.LLM_MODEL
-
-    async def generate(self, prompt: str) -> str:
-        """Generate response from LLM"""
-        if self.provider == "mock":
-            return self._mock_generate(prompt)
-        elif self.provider == "openai_compatible":
-            return self._openai_compatible_generate(prompt)
-        else:
-            return self._mock_generate(prompt)
-
-    def _mock_generate(self, prompt: str) -> str:
-        """Mock LLM for testing"""
-        # Return a simple template response for MVP
-        return "根据提供的证据信息，无法明确判断。请补充更多相关证据。"
-
-    def _openai_compatible_generate(self, prompt: str) -> str:
-        """OpenAI compatible API call"""
-        # This is a generic implementation - adjust based on actual API
+    def __init__(
+        self,
+        configs: Optional[List[Dict[str, Any]]] = None,
+        cache: Optional[LLMResponseCache] = None,
+        scheduler: Optional[LLMScheduler] = None,
+    ):
+        configs = configs or default_provider_configs()
+        self.providers: List[Provider] = [create_provider(c) for c in configs]
+        self.cache = cache if cache is not None else create_cache()
+        self.scheduler = scheduler if scheduler is not None else create_scheduler()
+
+    def share_endpoint_health(self, other: "LLMClient"):
+        """Use other's breaker and stats for providers on the same endpoint"""
+        by_endpoint = {p.endpoint: p for p in other.providers}
+        for provider in self.providers:
+            shared = by_endpoint.get(provider.endpoint)
+            if shared is not None:
+                provider.breaker = shared.breaker
+                provider.stats = shared.stats
+
+    @property
+    def model(self) -> str:
+        """Model of the preferred provider"""
+        return self.providers[0].model
+
+    async def connect(self):
+        """Open pooled connections for every provider"""
+        for provider in self.providers:
+            await provider.connect()
+
+    async def close(self):
+        """Close provider connections"""
+        for provider in self.providers:
+            await provider.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    def describe(self) -> List[Dict[str, Any]]:
+        """Routing state of every provider"""
+        return [p.describe() for p in self.providers]
+
+    def _ranked_providers(self) -> List[Provider]:
+        """
+        Providers whose breaker lets a call through, healthiest first
+
+        Config order breaks ties, so the first provider is preferred until
+        its health score drops.
+        """
+        ranked = sorted(
+            enumerate(self.providers),
+            key=lambda item: (-round(item[1].stats.health_score, 2), item[0]),
+        )
+        return [p for _, p in ranked if p.breaker.available()]
+
+    async def _call(
+        self,
+        provider: Provider,
+        messages: List[Dict[str, str]],
+        prefix_hash: Optional[str],
+        timeout: Optional[float],
+    ) -> Tuple[str, Provider]:
+        """Call one provider and feed the outcome to its breaker and stats"""
+        provider.breaker.begin_call()
+        start = time.monotonic()
         try:
-            response = requests.post(
-                "https://api.openai.com/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "model": self.model,
-                    "messages": [{"role": "user", "content": prompt}],
-                },
-                timeout=30,
-            )
-            if response.status_code == 200:
-                return response.json()["choices"][0]["message"]["content"]
-            else:
-                return f"Error: {response.status_code}"
+            with tracer.span("llm.provider", provider=provider.name, model=provider.model):
+                answer = await provider.complete(messages, prefix_hash, timeout)
+        except asyncio.CancelledError:
+            # Lost a hedge race; neither a success nor a failure
+            provider.breaker.release()
+            raise
         except Exception as e:
-            return f"Error: {str(e)}"
+            provider.stats.record(False, time.monotonic() - start)
+            provider.breaker.record_failure()
+            if isinstance(e, LLMError):
+                raise
+            raise LLMError(f"{provider.name}: {e}") from e
+        provider.stats.record(True, time.monotonic() - start)
+        provider.breaker.record_success()
+        return answer, provider
+
+    def _hedge_delay(self, provider: Provider) -> Optional[float]:
+        """Delay before firing a hedge request, from the provider's p95"""
+        if not settings.LLM_HEDGE or len(provider.stats.latencies) < settings.LLM_HEDGE_MIN_SAMPLES:
+            return None
+        return max(provider.stats.percentile(0.95), settings.LLM_HEDGE_MIN_DELAY)
+
+    async def _call_as_hedge(
+        self,
+        tokens: int,
+        provider: Provider,
+        messages: List[Dict[str, str]],
+        prefix_hash: Optional[str],
+        timeout: Optional[float],
+    ) -> Tuple[str, Provider]:
+        with self.scheduler.hedge(tokens):
+            return await self._call(provider, messages, prefix_hash, timeout)
+
+    async def _call_hedged(
+        self,
+        candidates: List[Provider],
+        messages: List[Dict[str, str]],
+        prefix_hash: Optional[str],
+        timeout: Optional[float],
+        tokens: int = 0,
+    ) -> Tuple[str, Provider]:
+        """
+        Call the best provider, hedging with a second request if it is slow
+
+        When the primary has not answered within its p95 latency, the same
+        request goes to the next candidate (or the primary again if it is
+        alone) and whichever succeeds first wins; the other is cancelled.
+        The hedge is charged to the scheduler as one more call of tokens.
+        """
+        primary = candidates[0]
+        delay = self._hedge_delay(primary)
+        first = asyncio.create_task(self._call(primary, messages, prefix_hash, timeout))
+        if delay is None:
+            return await first
+
+        pending = {first}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if not done:
+                backup = candidates[1] if len(candidates) > 1 else primary
+                pending.add(asyncio.create_task(
+                    self._call_as_hedge(tokens, backup, messages, prefix_hash, timeout)
+                ))
+
+            last_error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+            raise last_error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def generate(
+        self,
+        prompt: Union[str, List[Dict[str, str]]],
+        prefix_hash: Optional[str] = None,
+        timeout: Optional[float] = None,
+        priority: str = "interactive",
+    ) -> str:
+        """
+        Generate response from LLM
+
+        prompt is either a single user prompt or a chat message list (see
+        prompt_builder.build_messages). prefix_hash identifies the static
+        message prefix and is forwarded to providers that cache prompts.
+        timeout overrides the provider timeout for this call. priority is
+        the scheduler class, "interactive" or "batch".
+        """
+        result = await self.complete(prompt, prefix_hash=prefix_hash, timeout=timeout, priority=priority)
+        return result.text
+
+    async def complete(
+        self,
+        prompt: Union[str, List[Dict[str, str]]],
+        prefix_hash: Optional[str] = None,
+        timeout: Optional[float] = None,
+        priority: str = "interactive",
+    ) -> LLMResult:
+        """
+        Generate response from LLM, returning provider and cache details
+
+        Identical prompts are served from the response cache when a pool
+        provider configured with temperature 0 answered them before; other
+        providers' answers are never cached, since repeating the call could
+        answer differently. Otherwise every attempt waits for a scheduler
+        slot in its priority class, and failed calls are retried with
+        exponential backoff on the healthiest available provider.
+        Raises LLMQueueFullError when the priority queue is full and
+        LLMUnavailableError when every attempt failed or all circuit
+        breakers are open.
+        """
+        messages = [{"role": "user", "content": prompt}] if isinstance(prompt, str) else prompt
+        start = time.monotonic()
+
+        cache_state = "off"
+        cacheable = [p for p in self.providers if p.temperature == 0] if self.cache is not None else []
+        if cacheable:
+            prompt_hash = hash_messages(messages)
+            keys = [make_cache_key(p.name, p.model, p.temperature, prompt_hash) for p in cacheable]
+            with tracer.span("llm.cache_lookup") as span:
+                cached, cache_state = await self.cache.get(keys)
+                if span is not None:
+                    span.set("cache", cache_state)
+            if cached is not None:
+                return LLMResult(
+                    cached.answer, cached.provider, cached.model, cache_state, (time.monotonic() - start) * 1000
+                )
+
+        tokens = sum(estimate_tokens(m["content"]) for m in messages) + settings.LLM_EXPECTED_COMPLETION_TOKENS
+
+        errors = []
+        for attempt in range(settings.LLM_MAX_RETRIES + 1):
+            if attempt:
+                backoff = min(settings.LLM_RETRY_BACKOFF * 2 ** (attempt - 1), settings.LLM_RETRY_BACKOFF_MAX)
+                await asyncio.sleep(backoff * random.uniform(0.5, 1.0))
+
+            try:
+                async with self.scheduler.slot(priority, tokens):
+                    candidates = self._ranked_providers()
+                    if not candidates:
+                        raise LLMError("all providers unavailable (circuit open)")
+                    answer, provider = await self._call_hedged(
+                        candidates, messages, prefix_hash, timeout, tokens
+                    )
+            except LLMQueueFullError:
+                raise
+            except LLMError as e:
+                errors.append(str(e))
+                continue
+
+            if cacheable and provider.temperature == 0:
+                key = make_cache_key(provider.name, provider.model, provider.temperature, prompt_hash)
+                await self.cache.put(key, provider.name, provider.model, answer)
+            return LLMResult(
+                answer, provider.name, provider.model, cache_state, (time.monotonic() - start) * 1000
+            )
+
+        raise LLMUnavailableError("; ".join(errors))
+
+    async def stream(
+        self,
+        prompt: Union[str, List[Dict[str, str]]],
+        prefix_hash: Optional[str] = None,
+        timeout: Optional[float] = None,
+        priority: str = "interactive",
+    ) -> AsyncIterator[str]:
+        """
+        Stream response text from LLM as it is generated
+
+        Providers are tried in routing order until one produces its first
+        chunk; failures after that propagate as LLMError. A stream the
+        consumer closes early counts as neither success nor failure.
+        """
+        messages = [{"role": "user", "content": prompt}] if isinstance(prompt, str) else prompt
+
+        tokens = sum(estimate_tokens(m["content"]) for m in messages) + settings.LLM_EXPECTED_COMPLETION_TOKENS
+
+        errors = []
+        async with self.scheduler.slot(priority, tokens):
+            for provider in self._ranked_providers():
+                provider.breaker.begin_call()
+                start = time.monotonic()
+                started = False
+                settled = False
+                try:
+                    async for delta in provider.stream(messages, prefix_hash, timeout):
+                        started = True
+                        yield delta
+                    provider.stats.record(True, time.monotonic() - start)
+                    provider.breaker.record_success()
+                    settled = True
+                except Exception as e:
+                    provider.stats.record(False, time.monotonic() - start)
+                    provider.breaker.record_failure()
+                    settled = True
+                    error = e if isinstance(e, LLMError) else LLMError(f"{provider.name}: {e}")
+                    if started:
+                        raise error from e
+                    errors.append(str(error))
+                    continue
+                finally:
+                    if not settled:
+                        # Consumer closed or cancelled the stream; free a half-open trial slot
+                        provider.breaker.release()
+                return
+
+        raise LLMUnavailableError("; ".join(errors) or "all providers unavailable (circuit open)")
 
 
 llm_client = LLMClient()
@@ -0,0 +1,455 @@
+import hmac
+import json
+import time
+import base64
+import hashlib
+from collections import deque
+from email.utils import formatdate
+from urllib.parse import urlparse
+from typing import Optional, List, Dict, Any, AsyncIterator
+
+import httpx
+
+from app.config import settings
+
+
+# Health probe request for providers without a cheaper one
+PING_MESSAGES = [{"role": "user", "content": "ping"}]
+
+
+class LLMError(Exception):
+    """Raised when a single provider call fails"""
+
+
+class LLMUnavailableError(LLMError):
+    """Raised when no provider could produce an answer"""
+
+
+class CircuitBreaker:
+    """
+    Per-provider circuit breaker
+
+    closed: calls flow; failure_threshold consecutive failures open it.
+    open: calls are refused until reset_timeout has passed.
+    half_open: one trial call is let through; success closes, failure re-opens.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def available(self) -> bool:
+        """Whether a call may be attempted now"""
+        state = self.state
+        return state == "closed" or (state == "half_open" and not self.trial_in_flight)
+
+    def begin_call(self):
+        """Mark the start of a call; in half_open it takes the trial slot"""
+        if self.state == "half_open":
+            self.trial_in_flight = True
+
+    def release(self):
+        """Give the trial slot back without an outcome (cancelled call)"""
+        self.trial_in_flight = False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+class ProviderStats:
+    """Rolling latency and success statistics used for routing and hedging"""
+
+    def __init__(self, window: int = 200, alpha: float = 0.2):
+        self.latencies = deque(maxlen=window)  # seconds, successful calls only
+        self.alpha = alpha
+        self.success_rate = 1.0  # EWMA
+        self.latency_ewma: Optional[float] = None
+        self.calls = 0
+        self.failures = 0
+        self.last_call: Optional[float] = None  # monotonic time the last call finished
+
+    def record(self, ok: bool, latency: float):
+        self.calls += 1
+        self.last_call = time.monotonic()
+        self.success_rate = (1 - self.alpha) * self.success_rate + self.alpha * (1.0 if ok else 0.0)
+        if ok:
+            self.latencies.append(latency)
+            if self.latency_ewma is None:
+                self.latency_ewma = latency
+            else:
+                self.latency_ewma = (1 - self.alpha) * self.latency_ewma + self.alpha * latency
+        else:
+            self.failures += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    @property
+    def health_score(self) -> float:
+        """Higher is better: success rate discounted by typical latency"""
+        return self.success_rate / (1.0 + (self.latency_ewma or 0.0))
+
+
+class Provider:
+    """Base class for an LLM endpoint in the provider pool"""
+
+    kind = "base"
+
+    def __init__(
+        self,
+        name: str,
+        model: str,
+        timeout: Optional[float] = None,
+        temperature: Optional[float] = None,
+    ):
+        self.name = name
+        self.model = model
+        self.timeout = timeout or settings.LLM_TIMEOUT
+        self.temperature = temperature
+        self.breaker = CircuitBreaker(settings.LLM_BREAKER_FAILURES, settings.LLM_BREAKER_RESET)
+        self.stats = ProviderStats()
+
+    async def connect(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        prefix_hash: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> str:
+        raise NotImplementedError
+
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        prefix_hash: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[str]:
+        yield await self.complete(messages, prefix_hash, timeout)
+
+    async def ping(self, timeout: Optional[float] = None) -> bool:
+        """Cheapest real request to the endpoint; raises or returns False when it is down"""
+        await self.complete(PING_MESSAGES, timeout=timeout)
+        return True
+
+    @property
+    def endpoint(self) -> str:
+        """
+        Upstream identity; providers with the same one share breaker and stats
+
+        Includes the model, since one base URL may serve a healthy large
+        model next to a failing small one.
+        """
+        return f"{self.kind}:{self.name}:{self.model}"
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "model": self.model,
+            "breaker": self.breaker.state,
+            "health_score": round(self.stats.health_score, 4),
+            "success_rate": round(self.stats.success_rate, 4),
+            "p95_ms": round(self.stats.percentile(0.95) * 1000, 1) if self.stats.latencies else None,
+            "calls": self.stats.calls,
+            "failures": self.stats.failures,
+        }
+
+
+class MockProvider(Provider):
+    kind = "mock"
+
+    async def complete(self, messages, prefix_hash=None, timeout=None) -> str:
+        """Mock LLM for testing"""
+        # Return a simple template response for MVP
+        return "结论：根据提供的证据信息，无法明确判断。\n引用：无\n需要补充：请补充更多相关证据。"
+
+
+class OpenAICompatibleProvider(Provider):
+    kind = "openai_compatible"
+
+    def __init__(
+        self,
+        name: str,
+        model: str,
+        base_url: str,
+        api_key: str,
+        timeout: Optional[float] = None,
+        temperature: Optional[float] = None,
+    ):
+        super().__init__(name, model, timeout, temperature)
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.http: Optional[httpx.AsyncClient] = None
+
+    @property
+    def endpoint(self) -> str:
+        return f"{self.kind}:{self.base_url}:{self.model}"
+
+    async def connect(self):
+        """Open the pooled HTTP client (keep-alive connections are reused)"""
+        if self.http is None:
+            self.http = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=httpx.Timeout(self.timeout, connect=settings.LLM_CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=settings.LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY,
+                ),
+            )
+
+    async def close(self):
+        if self.http is not None:
+            await self.http.aclose()
+            self.http = None
+
+    def _payload(self, messages: List[Dict[str, str]], prefix_hash: Optional[str]) -> Dict[str, Any]:
+        """Request body for an OpenAI compatible chat completion"""
+        payload = {
+            "model": self.model,
+            "messages": messages,
+        }
+        if self.temperature is not None:
+            payload["temperature"] = self.temperature
+        if prefix_hash and settings.LLM_PROMPT_CACHE_KEY:
+            # Routes calls sharing a prefix to the same provider-side cache
+            payload["prompt_cache_key"] = prefix_hash
+        return payload
+
+    def _headers(self) -> Dict[str, str]:
+        """Per-request headers on top of the client defaults"""
+        return {}
+
+    async def complete(self, messages, prefix_hash=None, timeout=None) -> str:
+        """OpenAI compatible API call"""
+        await self.connect()
+        try:
+            response = await self.http.post(
+                "/chat/completions",
+                json=self._payload(messages, prefix_hash),
+                headers=self._headers(),
+                timeout=httpx.USE_CLIENT_DEFAULT if timeout is None else timeout,
+            )
+        except httpx.HTTPError as e:
+            raise LLMError(f"{self.name}: {type(e).__name__}: {e}") from e
+        if response.status_code != 200:
+            raise LLMError(f"{self.name}: HTTP {response.status_code}")
+        try:
+            return response.json()["choices"][0]["message"]["content"]
+        except (ValueError, KeyError, IndexError) as e:
+            raise LLMError(f"{self.name}: malformed response") from e
+
+    async def ping(self, timeout: Optional[float] = None) -> bool:
+        """List models, which costs no tokens"""
+        await self.connect()
+        response = await self.http.get(
+            "/models",
+            headers=self._headers(),
+            timeout=httpx.USE_CLIENT_DEFAULT if timeout is None else timeout,
+        )
+        return response.status_code == 200
+
+    async def stream(self, messages, prefix_hash=None, timeout=None) -> AsyncIterator[str]:
+        """OpenAI compatible streaming call (server-sent events)"""
+        payload = self._payload(messages, prefix_hash)
+        payload["stream"] = True
+
+        await self.connect()
+        try:
+            async with self.http.stream(
+                "POST",
+                "/chat/completions",
+                json=payload,
+                headers=self._headers(),
+                timeout=httpx.USE_CLIENT_DEFAULT if timeout is None else timeout,
+            ) as response:
+                if response.status_code != 200:
+                    raise LLMError(f"{self.name}: HTTP {response.status_code}")
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    choices = json.loads(data).get("choices") or [{}]
+                    delta = choices[0].get("delta", {}).get("content")
+                    if delta:
+                        yield delta
+        except httpx.HTTPError as e:
+            raise LLMError(f"{self.name}: {type(e).__name__}: {e}") from e
+
+
+class StandinProvider(OpenAICompatibleProvider):
+    """OpenAI compatible provider backed by an in-process stand-in server"""
+
+    kind = "standin"
+
+    def __init__(
+        self,
+        name: str,
+        model: str,
+        profile: str,
+        timeout: Optional[float] = None,
+        temperature: Optional[float] = None,
+    ):
+        super().__init__(name, model, base_url="", api_key="standin", timeout=timeout, temperature=temperature)
+        self.profile = profile
+        self.server = None
+
+    @property
+    def endpoint(self) -> str:
+        # Every stand-in provider starts a server of its own, and base_url
+        # is only known once it has
+        return f"{self.kind}:{id(self):x}:{self.model}"
+
+    async def connect(self):
+        if self.server is None:
+            # Local stand-in server on this event loop, see app.llm_standin
+            from app.llm_standin import start_standin
+
+            self.server = await start_standin(self.profile)
+            self.base_url = self.server.base_url
+        await super().connect()
+
+    async def close(self):
+        await super().close()
+        if self.server is not None:
+            await self.server.stop()
+            self.server = None
+
+
+class SparkProvider(OpenAICompatibleProvider):
+    """
+    iFlytek Spark chat completions with HMAC-SHA256 request signing
+
+    Spark's HTTP API is OpenAI compatible apart from authentication, so
+    the pooled client, payload and streaming parser are shared. The
+    signature only depends on the second-resolution Date header, so it is
+    computed once per second and reused by every request in that window.
+    """
+
+    kind = "spark"
+
+    def __init__(
+        self,
+        name: str,
+        model: str,
+        base_url: str,
+        api_key: str,
+        api_secret: str,
+        timeout: Optional[float] = None,
+        temperature: Optional[float] = None,
+    ):
+        super().__init__(name, model, base_url, api_key, timeout, temperature)
+        self.api_secret = api_secret
+        parsed = urlparse(f"{self.base_url}/chat/completions")
+        self.host = parsed.netloc
+        self.path = parsed.path
+        self.signed_date: Optional[str] = None
+        self.signed_headers: Dict[str, str] = {}
+
+    def _sign(self, date: str) -> Dict[str, str]:
+        """Build Spark HMAC signature headers for a Date value"""
+        signature_origin = f"host: {self.host}\ndate: {date}\nPOST {self.path} HTTP/1.1"
+        signature_sha = hmac.new(
+            self.api_secret.encode("utf-8"),
+            signature_origin.encode("utf-8"),
+            digestmod=hashlib.sha256,
+        ).digest()
+        signature_b64 = base64.b64encode(signature_sha).decode("utf-8")
+        authorization = (
+            f'api_key="{self.api_key}", algorithm="hmac-sha256", '
+            f'headers="host date request-line", signature="{signature_b64}"'
+        )
+        return {"Date": date, "Authorization": authorization}
+
+    async def ping(self, timeout: Optional[float] = None) -> bool:
+        """A one-token completion; requests are only signed for the completions path"""
+        await self.connect()
+        response = await self.http.post(
+            "/chat/completions",
+            json={**self._payload(PING_MESSAGES, None), "max_tokens": 1},
+            headers=self._headers(),
+            timeout=httpx.USE_CLIENT_DEFAULT if timeout is None else timeout,
+        )
+        return response.status_code == 200
+
+    def _headers(self) -> Dict[str, str]:
+        date = formatdate(usegmt=True)
+        if date != self.signed_date:
+            self.signed_headers = self._sign(date)
+            self.signed_date = date
+        return self.signed_headers
+
+
+def create_provider(config: Dict[str, Any]) -> Provider:
+    """
+    Create a provider from a config entry
+
+    Keys: provider (mock | openai_compatible | spark | standin), name,
+    model, base_url, api_key, api_secret, timeout, temperature, profile.
+    Missing keys fall back to the single-provider LLM_* (or SPARK_*)
+    settings.
+    """
+    kind = config.get("provider", settings.LLM_PROVIDER)
+    name = config.get("name", kind)
+    model = config.get("model", settings.LLM_MODEL)
+    timeout = config.get("timeout")
+    temperature = config.get("temperature", settings.LLM_TEMPERATURE)
+
+    if kind == "openai_compatible":
+        return OpenAICompatibleProvider(
+            name,
+            model,
+            base_url=config.get("base_url", settings.LLM_BASE_URL),
+            api_key=config.get("api_key", settings.LLM_API_KEY),
+            timeout=timeout,
+            temperature=temperature,
+        )
+    if kind == "spark":
+        return SparkProvider(
+            name,
+            config.get("model", settings.SPARK_MODEL),
+            base_url=config.get("base_url", settings.SPARK_BASE_URL),
+            api_key=config.get("api_key", settings.SPARK_API_KEY),
+            api_secret=config.get("api_secret", settings.SPARK_API_SECRET),
+            timeout=timeout,
+            temperature=temperature,
+        )
+    if kind == "standin":
+        return StandinProvider(
+            name,
+            model,
+            profile=config.get("profile", settings.LLM_STANDIN_PROFILE),
+            timeout=timeout,
+            temperature=temperature,
+        )
+    return MockProvider(name, model, timeout, temperature)
@@ -0,0 +1,178 @@
+from collections import deque
+from typing import Optional, List, Dict, Any, Tuple
+
+from app.config import settings
+from app.llm_client import LLMClient, LLMResult, llm_client, default_provider_configs
+from app.llm_providers import LLMUnavailableError
+from app.prompt_builder import estimate_tokens
+
+ROUTES = ("small", "large")
+
+
+class RouteStats:
+    """Latency and token accounting for one route"""
+
+    def __init__(self, window: int = 1000):
+        self.latencies = deque(maxlen=window)
+        self.requests = 0
+        self.failures = 0
+        self.cache_hits = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.reasons: Dict[str, int] = {}
+
+    def record(self, reason: str, result: Optional[LLMResult], prompt_tokens: int, completion_tokens: int):
+        self.requests += 1
+        self.reasons[reason] = self.reasons.get(reason, 0) + 1
+        if result is None:
+            self.failures += 1
+            return
+        self.latencies.append(result.latency_ms)
+        if result.cache in ("memory", "disk"):
+            # Served without a model call; no tokens spent
+            self.cache_hits += 1
+            return
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+
+    def summary(self) -> Dict[str, Any]:
+        ordered = sorted(self.latencies)
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "cache_hits": self.cache_hits,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "latency_ms_mean": round(sum(ordered) / len(ordered), 1) if ordered else None,
+            "latency_ms_p50": round(ordered[len(ordered) // 2], 1) if ordered else None,
+            "latency_ms_p95": round(ordered[int(len(ordered) * 0.95)], 1) if ordered else None,
+            "reasons": dict(self.reasons),
+        }
+
+
+def small_provider_configs() -> List[Dict[str, Any]]:
+    """Provider pool for the small route, empty when none is configured"""
+    if settings.LLM_SMALL_PROVIDERS:
+        return settings.LLM_SMALL_PROVIDERS
+    if settings.LLM_SMALL_MODEL:
+        return [dict(c, model=settings.LLM_SMALL_MODEL) for c in default_provider_configs()]
+    return []
+
+
+class ModelRouter:
+    """
+    Route each question to a small or large model
+
+    Questions that are short, have a confident non-general intent, few
+    linked entities and enough evidence go to the small model; anything
+    else stays on the main (large) pool. Without a configured small model
+    every question takes the large route, which is still accounted.
+    """
+
+    def __init__(self):
+        self.clients: Dict[str, LLMClient] = {"large": llm_client}
+        self.stats = {name: RouteStats() for name in ROUTES}
+        if settings.LLM_ROUTING_ENABLED:
+            configs = small_provider_configs()
+            if configs:
+                # Cache keys include the model, so the routes can share it. The
+                # scheduler is shared so both routes stay within one set of
+                # rate limits, and a provider on an endpoint the large pool
+                # also uses shares its breaker and stats
+                small = LLMClient(configs, cache=llm_client.cache, scheduler=llm_client.scheduler)
+                small.share_endpoint_health(llm_client)
+                self.clients["small"] = small
+
+    async def connect(self):
+        """Connect clients owned by the router (llm_client is connected by the app)"""
+        for client in self.clients.values():
+            if client is not llm_client:
+                await client.connect()
+
+    async def close(self):
+        for client in self.clients.values():
+            if client is not llm_client:
+                await client.close()
+
+    def choose(
+        self,
+        question: str,
+        intent: str,
+        entity_count: int,
+        triple_count: int,
+    ) -> Tuple[str, str]:
+        """Pick (route, reason) from signals computed earlier in the pipeline"""
+        if "small" not in self.clients:
+            return "large", "no_small_model"
+        if intent in settings.LLM_ROUTE_LARGE_INTENTS:
+            return "large", "ambiguous_intent"
+        if estimate_tokens(question) > settings.LLM_ROUTE_MAX_QUESTION_TOKENS:
+            return "large", "long_question"
+        if entity_count > settings.LLM_ROUTE_MAX_ENTITIES:
+            return "large", "many_entities"
+        if triple_count < settings.LLM_ROUTE_MIN_TRIPLES:
+            return "large", "thin_evidence"
+        return "small", "simple"
+
+    def client(self, route: str) -> LLMClient:
+        return self.clients.get(route, llm_client)
+
+    def record(
+        self,
+        route: str,
+        reason: str,
+        result: Optional[LLMResult],
+        prompt_tokens: int,
+        completion_tokens: int = 0,
+    ):
+        self.stats[route].record(reason, result, prompt_tokens, completion_tokens)
+
+    async def complete(
+        self,
+        route: str,
+        reason: str,
+        messages: List[Dict[str, str]],
+        prefix_hash: Optional[str] = None,
+        priority: str = "interactive",
+    ) -> Tuple[LLMResult, Dict[str, Any]]:
+        """
+        Generate on a route and account for it
+
+        Returns the result and per-call routing details for DebugInfo. When
+        the small route is unavailable the call escalates to the large one;
+        LLMUnavailableError is raised only when the large route fails too.
+        """
+        prompt_tokens = sum(estimate_tokens(m["content"]) for m in messages)
+        try:
+            result = await self.client(route).complete(messages, prefix_hash=prefix_hash, priority=priority)
+        except LLMUnavailableError:
+            self.record(route, reason, None, prompt_tokens)
+            if route == "large":
+                raise
+            return await self.complete("large", "small_unavailable", messages, prefix_hash, priority)
+
+        completion_tokens = estimate_tokens(result.text)
+        self.record(route, reason, result, prompt_tokens, completion_tokens)
+        return result, {
+            "route": route,
+            "reason": reason,
+            "model": result.model,
+            "provider": result.provider,
+            "cache": result.cache,
+            "latency_ms": round(result.latency_ms, 1),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        """Per-route model, latency and token totals"""
+        return {
+            name: {
+                "model": self.clients[name].model if name in self.clients else None,
+                **self.stats[name].summary(),
+            }
+            for name in ROUTES
+        }
+
+
+model_router = ModelRouter()
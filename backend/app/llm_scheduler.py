@@ -0,0 +1,210 @@
+import time
+import heapq
+import asyncio
+import itertools
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Optional, List, Dict, Any, AsyncIterator, Iterator
+
+from app.config import settings
+from app.llm_providers import LLMError
+from app.tracing import tracer
+
+# Lower value is served first
+PRIORITIES = {
+    "interactive": 0,
+    "batch": 1,
+}
+
+
+class LLMQueueFullError(LLMError):
+    """Raised when the scheduler queue for a priority class is full"""
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at rate_per_minute; 0 means unlimited"""
+
+    def __init__(self, rate_per_minute: float):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = rate_per_minute
+        self.tokens = rate_per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount tokens are available (0 if available now)"""
+        if not self.rate:
+            return 0.0
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float):
+        if self.rate:
+            self.tokens -= min(amount, self.capacity)
+
+
+class _Waiter:
+    def __init__(self, priority: int, tokens: int):
+        self.priority = priority
+        self.tokens = tokens
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.enqueued = time.monotonic()
+
+
+class LLMScheduler:
+    """
+    Admission control for LLM calls
+
+    Calls wait in a priority queue until an in-flight slot is free and the
+    requests-per-minute and tokens-per-minute buckets allow them. Interactive
+    calls are always dispatched before batch calls, and batch calls may not
+    take the last interactive_reserve slots, so batch work only soaks up
+    spare capacity. A class whose queue is at max_queue rejects new calls
+    with LLMQueueFullError instead of letting latency grow without bound.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 16,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        max_queue: Optional[Dict[str, int]] = None,
+        interactive_reserve: int = 2,
+    ):
+        self.max_in_flight = max_in_flight
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_queue = max_queue or {}
+        self.interactive_reserve = interactive_reserve
+        self.in_flight = 0
+        self.heap: List = []
+        self.seq = itertools.count()
+        self.depth = {name: 0 for name in PRIORITIES}
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.queue_times = {name: deque(maxlen=1000) for name in PRIORITIES}
+        self.admitted = {name: 0 for name in PRIORITIES}
+        self.rejected = {name: 0 for name in PRIORITIES}
+
+    def _dispatch(self):
+        """Grant slots to queued calls while capacity and rate limits allow"""
+        self.timer = None
+        while self.heap:
+            priority, _, name, waiter = self.heap[0]
+            if waiter.future.done():
+                # Cancelled while queued; slot() already uncounted it
+                heapq.heappop(self.heap)
+                continue
+
+            limit = self.max_in_flight
+            if priority > PRIORITIES["interactive"]:
+                limit = max(1, self.max_in_flight - self.interactive_reserve)
+            if self.in_flight >= limit:
+                return
+
+            wait = max(self.requests.wait_time(1), self.tokens.wait_time(waiter.tokens))
+            if wait > 0:
+                self.timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+
+            heapq.heappop(self.heap)
+            self.depth[name] -= 1
+            self.requests.take(1)
+            self.tokens.take(waiter.tokens)
+            self.in_flight += 1
+            self.queue_times[name].append(time.monotonic() - waiter.enqueued)
+            self.admitted[name] += 1
+            waiter.future.set_result(None)
+
+    def _release(self):
+        self.in_flight -= 1
+        if self.timer is None:
+            self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, priority: str = "interactive", tokens: int = 0) -> AsyncIterator[None]:
+        """Hold one in-flight LLM slot for the duration of the block"""
+        name = priority if priority in PRIORITIES else "interactive"
+        limit = self.max_queue.get(name, 0)
+        if limit and self.depth[name] >= limit:
+            self.rejected[name] += 1
+            raise LLMQueueFullError(f"LLM queue full for {name} requests ({limit} waiting)")
+
+        waiter = _Waiter(PRIORITIES[name], tokens)
+        heapq.heappush(self.heap, (waiter.priority, next(self.seq), name, waiter))
+        self.depth[name] += 1
+        if self.timer is None:
+            self._dispatch()
+
+        try:
+            with tracer.span("llm.queue_wait", priority=name):
+                await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted just before the cancellation landed
+                self._release()
+            else:
+                # Stop counting it against max_queue now, not when it reaches the head
+                waiter.future.cancel()
+                self.depth[name] -= 1
+            raise
+
+        try:
+            yield
+        finally:
+            self._release()
+
+    @contextmanager
+    def hedge(self, tokens: int = 0) -> Iterator[None]:
+        """
+        Account for a hedge request sent on behalf of a call holding a slot
+
+        The hedge fires without queueing, since it exists to cut latency,
+        but it counts as in flight and is charged to the request and token
+        buckets so later admissions pay for it.
+        """
+        self.requests.take(1)
+        self.tokens.take(tokens)
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self._release()
+
+    def summary(self) -> Dict[str, Any]:
+        """Queue depth, in-flight count and queue-time percentiles per class"""
+        classes = {}
+        for name in PRIORITIES:
+            ordered = sorted(self.queue_times[name])
+            classes[name] = {
+                "queued": self.depth[name],
+                "admitted": self.admitted[name],
+                "rejected": self.rejected[name],
+                "queue_ms_p50": round(ordered[len(ordered) // 2] * 1000, 1) if ordered else None,
+                "queue_ms_p95": round(ordered[int(len(ordered) * 0.95)] * 1000, 1) if ordered else None,
+            }
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "classes": classes,
+        }
+
+
+def create_scheduler() -> LLMScheduler:
+    """Build the scheduler from settings"""
+    return LLMScheduler(
+        max_in_flight=settings.LLM_MAX_IN_FLIGHT,
+        requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+        tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+        max_queue={
+            "interactive": settings.LLM_MAX_QUEUE_INTERACTIVE,
+            "batch": settings.LLM_MAX_QUEUE_BATCH,
+        },
+        interactive_reserve=settings.LLM_INTERACTIVE_RESERVE,
+    )
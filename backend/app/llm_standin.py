@@ -0,0 +1,260 @@
+"""
+Local OpenAI-compatible stand-in LLM server
+
+Speaks /v1/chat/completions (plain and streaming) with configurable
+time-to-first-token, per-token latency, jitter and error rate, so the
+LLM client and the whole /ask path can be load-tested without network
+access.
+
+In-process (shares the running event loop):
+    server = await start_standin("typical", port=0)
+    ... server.base_url ...
+    await server.stop()
+
+As a subprocess:
+    python -m app.llm_standin --profile slow --port 9001
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import random
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.prompt_builder import estimate_tokens
+
+
+class LatencyProfile:
+    def __init__(
+        self,
+        ttft_ms: float = 300.0,
+        per_token_ms: float = 20.0,
+        jitter: float = 0.2,
+        error_rate: float = 0.0,
+        output_tokens: int = 120,
+        max_concurrency: int = 0,
+    ):
+        self.ttft_ms = ttft_ms  # time to first token
+        self.per_token_ms = per_token_ms  # inter-token latency
+        self.jitter = jitter  # +/- fraction applied to every delay
+        self.error_rate = error_rate  # share of requests answered with 429/500
+        self.output_tokens = output_tokens
+        self.max_concurrency = max_concurrency  # 0 = unlimited, else requests queue
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(vars(self))
+
+
+LATENCY_PROFILES: Dict[str, LatencyProfile] = {
+    "instant": LatencyProfile(ttft_ms=0, per_token_ms=0, jitter=0, output_tokens=40),
+    "fast": LatencyProfile(ttft_ms=150, per_token_ms=8, jitter=0.1),
+    "typical": LatencyProfile(ttft_ms=400, per_token_ms=25, jitter=0.25),
+    "slow": LatencyProfile(ttft_ms=1500, per_token_ms=60, jitter=0.4, output_tokens=200),
+    "flaky": LatencyProfile(ttft_ms=400, per_token_ms=25, jitter=0.5, error_rate=0.1),
+}
+
+STANDIN_ANSWER = (
+    "结论：根据提供的证据信息，无法明确判断。\n"
+    "引用：无\n"
+    "需要补充：请提供被保险人的年龄、健康状况以及具体产品名称。"
+)
+
+# Unlabeled text padding longer answers; parse_answer reads it as lead-in
+STANDIN_FILLER = "本回答由本地替身模型生成，仅用于压测。"
+
+
+def _delay(ms: float, jitter: float) -> float:
+    """Seconds to sleep for a jittered delay"""
+    if ms <= 0:
+        return 0.0
+    return max(0.0, ms * (1 + random.uniform(-jitter, jitter))) / 1000
+
+
+def _answer_tokens(n: int) -> list:
+    """
+    Deterministic answer of about n tokens, one character per token
+
+    The structured answer is kept whole: a longer answer is padded with an
+    unlabeled lead-in before it, and a shorter one drops whole trailing
+    lines (never the conclusion line), so parsers always see labels intact.
+    """
+    pad = n - len(STANDIN_ANSWER)
+    if pad >= 0:
+        lead = (STANDIN_FILLER * (pad // len(STANDIN_FILLER) + 1))[:pad - 1] + "\n" if pad else ""
+        return list(lead + STANDIN_ANSWER)
+
+    lines = STANDIN_ANSWER.split("\n")
+    kept = lines[:1]
+    for line in lines[1:]:
+        if len("\n".join(kept + [line])) > n:
+            break
+        kept.append(line)
+    return list("\n".join(kept))
+
+
+def create_app(profile: LatencyProfile) -> FastAPI:
+    """Build the stand-in ASGI app for a latency profile"""
+    app = FastAPI(title="LLM stand-in", docs_url=None, redoc_url=None)
+    app.state.profile = profile
+    app.state.slots = asyncio.Semaphore(profile.max_concurrency) if profile.max_concurrency else None
+
+    @app.get("/v1/models")
+    async def list_models():
+        return {"object": "list", "data": [{"id": "standin", "object": "model"}]}
+
+    @app.get("/v1/profile")
+    async def get_profile():
+        return profile.to_dict()
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body.get("model", "standin")
+        prompt_tokens = sum(estimate_tokens(m.get("content", "")) for m in body.get("messages", []))
+        max_tokens = body.get("max_tokens") or profile.output_tokens
+        tokens = _answer_tokens(min(max_tokens, profile.output_tokens))
+
+        if random.random() < profile.error_rate:
+            await asyncio.sleep(_delay(profile.ttft_ms, profile.jitter))
+            status = random.choice([429, 500])
+            return JSONResponse(
+                status_code=status,
+                content={"error": {"message": "stand-in injected error", "code": status}},
+            )
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(tokens),
+            "total_tokens": prompt_tokens + len(tokens),
+        }
+
+        if body.get("stream"):
+            async def events():
+                async with app.state.slots or contextlib.nullcontext():
+                    await asyncio.sleep(_delay(profile.ttft_ms, profile.jitter))
+                    for i, token in enumerate(tokens):
+                        if i:
+                            await asyncio.sleep(_delay(profile.per_token_ms, profile.jitter))
+                        chunk = {
+                            "id": completion_id,
+                            "object": "chat.completion.chunk",
+                            "created": created,
+                            "model": model,
+                            "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+                        }
+                        yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+                    final = {
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "created": created,
+                        "model": model,
+                        "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                        "usage": usage,
+                    }
+                    yield f"data: {json.dumps(final, ensure_ascii=False)}\n\n"
+                    yield "data: [DONE]\n\n"
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        async with app.state.slots or contextlib.nullcontext():
+            total = _delay(profile.ttft_ms, profile.jitter) + sum(
+                _delay(profile.per_token_ms, profile.jitter) for _ in tokens[1:]
+            )
+            await asyncio.sleep(total)
+
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(tokens)},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        }
+
+    return app
+
+
+class StandinServer:
+    """Stand-in server running on the current event loop"""
+
+    def __init__(self, profile: LatencyProfile, host: str = "127.0.0.1", port: int = 0):
+        config = uvicorn.Config(create_app(profile), host=host, port=port, log_level="warning")
+        self.server = uvicorn.Server(config)
+        self.task: Optional[asyncio.Task] = None
+        self.host = host
+
+    @property
+    def base_url(self) -> str:
+        port = self.server.servers[0].sockets[0].getsockname()[1]
+        return f"http://{self.host}:{port}/v1"
+
+    async def start(self):
+        self.task = asyncio.create_task(self.server.serve())
+        while not self.server.started:
+            if self.task.done():
+                # Surface bind errors instead of waiting forever
+                self.task.result()
+            await asyncio.sleep(0.01)
+
+    async def stop(self):
+        self.server.should_exit = True
+        if self.task is not None:
+            await self.task
+
+
+def get_profile(name: str) -> LatencyProfile:
+    """Look up a named latency profile"""
+    if name not in LATENCY_PROFILES:
+        raise ValueError(f"Unknown stand-in profile: {name} (choose from {', '.join(LATENCY_PROFILES)})")
+    return LATENCY_PROFILES[name]
+
+
+async def start_standin(
+    profile: str = "typical",
+    host: str = "127.0.0.1",
+    port: int = 0,
+) -> StandinServer:
+    """Start a stand-in server in-process; port 0 picks a free port"""
+    server = StandinServer(get_profile(profile), host=host, port=port)
+    await server.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the OpenAI-compatible LLM stand-in")
+    parser.add_argument("--profile", default="typical", choices=list(LATENCY_PROFILES))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9001)
+    parser.add_argument("--ttft-ms", type=float, help="Override time to first token")
+    parser.add_argument("--per-token-ms", type=float, help="Override inter-token latency")
+    parser.add_argument("--jitter", type=float, help="Override jitter fraction")
+    parser.add_argument("--error-rate", type=float, help="Override injected error rate")
+    parser.add_argument("--output-tokens", type=int, help="Override answer length")
+    parser.add_argument("--max-concurrency", type=int, help="Override concurrent request slots")
+    args = parser.parse_args()
+
+    profile = LatencyProfile(**get_profile(args.profile).to_dict())
+    for field in ("ttft_ms", "per_token_ms", "jitter", "error_rate", "output_tokens", "max_concurrency"):
+        value = getattr(args, field)
+        if value is not None:
+            setattr(profile, field, value)
+
+    print(f"LLM stand-in on http://{args.host}:{args.port}/v1 with {profile.to_dict()}")
+    uvicorn.run(create_app(profile), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
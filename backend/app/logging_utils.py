@@ -1,9 +1,20 @@
 import os
 import json
+import gzip
+import atexit
+import time
+import queue
+import asyncio
+import shutil
+import threading
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Optional, Dict, Any, List, Union, Callable
 
 from app.config import settings
+from app.qa_log import BLOB_DIR, BlobStore, compact_entry
+from app.qa_store import QA_DB_FILE, QAStore
+
+QA_LOG_FILE = "qa_logs.jsonl"
 
 
 def get_log_dir() -> str:
@@ -17,16 +28,271 @@ def get_log_dir() -> str:
     return log_dir
 
 
-def log_question(
+class JsonlLogWriter:
+    """
+    Background JSONL writer
+
+    write() only enqueues; a daemon thread serializes entries, appends them
+    in batches of up to batch_size (or every flush_interval seconds) and
+    rotates the file once it exceeds rotate_bytes or is older than
+    rotate_interval seconds. Rotated files get a timestamp suffix and are
+    gzipped when compress is set. When the queue is full the "drop" policy
+    discards the entry, "block" waits up to block_timeout seconds first;
+    from the event loop use write_async(), which does that wait in a
+    worker thread.
+    transform, if given, rewrites each entry on the writer thread; sink
+    receives every batch as queued, before the transform.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_queue: int = 10000,
+        batch_size: int = 256,
+        flush_interval: float = 1.0,
+        rotate_bytes: int = 0,
+        rotate_interval: float = 0,
+        compress: bool = False,
+        overflow: str = "drop",
+        block_timeout: float = 1.0,
+        transform: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+        sink: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+    ):
+        self.path = path
+        self.queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=max_queue)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.rotate_bytes = rotate_bytes
+        self.rotate_interval = rotate_interval
+        self.compress = compress
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.transform = transform
+        self.sink = sink
+        self.file = None
+        self.opened_at = 0.0
+        self.thread: Optional[threading.Thread] = None
+        self.start_lock = threading.Lock()
+        self.stats = {
+            "written": 0,
+            "dropped": 0,
+            "batches": 0,
+            "rotations": 0,
+            "errors": 0,
+        }
+
+    def start(self):
+        with self.start_lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name="jsonl-log-writer", daemon=True)
+                self.thread.start()
+
+    def write(self, entry: Dict[str, Any]) -> bool:
+        """Queue one entry; returns False if it was dropped"""
+        if self.thread is None:
+            self.start()
+        try:
+            if self.overflow == "block":
+                self.queue.put(entry, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(entry)
+        except queue.Full:
+            self.stats["dropped"] += 1
+            return False
+        return True
+
+    async def write_async(self, entry: Dict[str, Any]) -> bool:
+        """write() that never blocks the event loop under the block policy"""
+        if self.thread is None:
+            self.start()
+        try:
+            self.queue.put_nowait(entry)
+            return True
+        except queue.Full:
+            if self.overflow != "block":
+                self.stats["dropped"] += 1
+                return False
+        try:
+            await asyncio.to_thread(self.queue.put, entry, timeout=self.block_timeout)
+        except queue.Full:
+            self.stats["dropped"] += 1
+            return False
+        return True
+
+    def close(self, timeout: float = 5.0):
+        """Flush queued entries and stop the writer thread"""
+        if self.thread is None:
+            return
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self.thread.join(timeout)
+        self.thread = None
+
+    def summary(self) -> Dict[str, Any]:
+        return {**self.stats, "queued": self.queue.qsize()}
+
+    # Writer thread
+
+    def _run(self):
+        while True:
+            try:
+                entry = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self._maybe_rotate()
+                continue
+
+            batch = [entry]
+            while entry is not None and len(batch) < self.batch_size:
+                try:
+                    entry = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(entry)
+
+            stop = batch[-1] is None
+            self._write_batch([e for e in batch if e is not None])
+            if stop:
+                self._close_file()
+                return
+
+    def _write_batch(self, batch: List[Dict[str, Any]]):
+        if not batch:
+            return
+        if self.sink is not None:
+            try:
+                self.sink(batch)
+            except Exception:
+                self.stats["errors"] += 1
+        try:
+            if self.transform is not None:
+                batch = [self.transform(e) for e in batch]
+            self._maybe_rotate()
+            if self.file is None:
+                self._open()
+            self.file.write("".join(json.dumps(e, ensure_ascii=False) + "\n" for e in batch))
+            self.file.flush()
+            self.stats["written"] += len(batch)
+            self.stats["batches"] += 1
+        except Exception:
+            # Never let a logging failure kill the writer
+            self.stats["errors"] += 1
+            self._close_file()
+
+    def _open(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.file = open(self.path, "a", encoding="utf-8")
+        self.opened_at = time.time()
+
+    def _close_file(self):
+        if self.file is not None:
+            try:
+                self.file.close()
+            finally:
+                self.file = None
+
+    def _maybe_rotate(self):
+        if self.file is None:
+            return
+        size = self.file.tell()
+        if not size:
+            return
+        too_big = self.rotate_bytes and size >= self.rotate_bytes
+        too_old = self.rotate_interval and time.time() - self.opened_at >= self.rotate_interval
+        if too_big or too_old:
+            self._rotate()
+
+    def _rotate(self):
+        self._close_file()
+        base, ext = os.path.splitext(self.path)
+        rotated = f"{base}-{datetime.now().strftime('%Y%m%dT%H%M%S')}{ext}"
+        suffix = 1
+        while os.path.exists(rotated) or os.path.exists(rotated + ".gz"):
+            rotated = f"{base}-{datetime.now().strftime('%Y%m%dT%H%M%S')}-{suffix}{ext}"
+            suffix += 1
+        os.replace(self.path, rotated)
+        self.stats["rotations"] += 1
+        if self.compress:
+            with open(rotated, "rb") as src, gzip.open(rotated + ".gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(rotated)
+
+
+def create_qa_log_writer() -> JsonlLogWriter:
+    """Build the QA log writer (and QA store, with LOG_SQLITE) from settings"""
+    global qa_store, qa_blob_store
+    log_dir = get_log_dir()
+    transform = None
+    if settings.LOG_BLOBS:
+        store = qa_blob_store = BlobStore(os.path.join(log_dir, BLOB_DIR))
+        transform = lambda entry: compact_entry(entry, store)  # noqa: E731
+    sink = None
+    if settings.LOG_SQLITE:
+        qa_store = QAStore(os.path.join(log_dir, QA_DB_FILE))
+        sink = qa_store.insert_many
+    return JsonlLogWriter(
+        os.path.join(log_dir, QA_LOG_FILE),
+        max_queue=settings.LOG_QUEUE_SIZE,
+        batch_size=settings.LOG_BATCH_SIZE,
+        flush_interval=settings.LOG_FLUSH_INTERVAL,
+        rotate_bytes=settings.LOG_ROTATE_MAX_MB * 1024 * 1024,
+        rotate_interval=settings.LOG_ROTATE_INTERVAL,
+        compress=settings.LOG_COMPRESS,
+        overflow=settings.LOG_OVERFLOW,
+        block_timeout=settings.LOG_BLOCK_TIMEOUT,
+        transform=transform,
+        sink=sink,
+    )
+
+
+qa_log_writer: Optional[JsonlLogWriter] = None
+qa_store: Optional[QAStore] = None
+qa_blob_store: Optional[BlobStore] = None
+
+
+def get_qa_log_writer() -> JsonlLogWriter:
+    """Shared QA log writer, created on first use"""
+    global qa_log_writer
+    if qa_log_writer is None:
+        qa_log_writer = create_qa_log_writer()
+        # Scripts may never run the app lifespan; flush on exit anyway
+        atexit.register(close_qa_log_writer)
+    return qa_log_writer
+
+
+def close_qa_log_writer():
+    """Flush and stop the QA log writer"""
+    global qa_log_writer, qa_store
+    if qa_log_writer is not None:
+        qa_log_writer.close()
+        qa_log_writer = None
+    if qa_store is not None:
+        qa_store.close()
+        qa_store = None
+
+
+async def log_question(
     question: str,
     linked_entities: List[Dict[str, Any]],
     cypher: str,
     triples: List[Dict[str, Any]],
-    prompt: str,
+    prompt: Union[str, List[Dict[str, str]]],
     answer: str,
     citations: List[Dict[str, Any]],
+    intent: Optional[str] = None,
+    confidence: Optional[str] = None,
+    latency_ms: Optional[float] = None,
+    answered_by: str = "llm",
+    degraded: bool = False,
+    route: Optional[Dict[str, Any]] = None,
 ) -> None:
-    """Log question and answer to JSONL file"""
+    """
+    Queue question and answer for the background JSONL writer
+
+    prompt is the rendered prompt or its chat messages; with LOG_BLOBS the
+    prompt and triples are stored as content-addressed blobs (see qa_log).
+    """
 
     log_entry = {
         "timestamp": datetime.now().isoformat(),
@@ -37,8 +303,12 @@ def log_question(
         "prompt": prompt,
         "answer": answer,
         "citations": citations,
+        "intent": intent,
+        "confidence": confidence,
+        "latency_ms": round(latency_ms, 1) if latency_ms is not None else None,
+        "answered_by": answered_by,
+        "degraded": degraded,
+        "route": route,
     }
 
-    log_file = os.path.join(get_log_dir(), "qa_logs.jsonl")
-    with open(log_file, "a", encoding="utf-8") as f:
-        f.write(json.dumps(log_entry, ensure_ascii=False) + "\n")
+    await get_qa_log_writer().write_async(log_entry)
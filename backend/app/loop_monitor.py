@@ -0,0 +1,233 @@
+"""
+Event loop lag monitor and blocking-call detector
+
+LoopLagMonitor samples how late the loop runs a periodic timer and feeds
+the lag metrics. With LOOP_BLOCK_DETECT it also runs a BlockingDetector: a
+heartbeat task beats every few milliseconds and a watchdog thread that
+sees no beat for LOOP_BLOCK_THRESHOLD_MS grabs the loop thread's stack.
+Each stall is attributed to the innermost backend frame that was running,
+so blocking calls show up as call sites in /api/v1/loop.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import threading
+import traceback
+from collections import deque
+from typing import Optional, List, Dict, Any
+
+from app.config import settings
+from app.metrics import LOOP_LAG, LOOP_LAG_LAST, LOOP_BLOCKS
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(BACKEND_DIR, "app") + os.sep
+
+
+class BlockingSite:
+    """Stalls attributed to one call site"""
+
+    def __init__(self, site: str, stack: List[str]):
+        self.site = site
+        self.stack = stack  # outermost first, from the most recent stall
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_seen = 0.0
+
+    def record(self, blocked_ms: float, stack: List[str]):
+        self.count += 1
+        self.total_ms += blocked_ms
+        self.max_ms = max(self.max_ms, blocked_ms)
+        self.last_seen = time.time()
+        self.stack = stack
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "site": self.site,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 1),
+            "max_ms": round(self.max_ms, 1),
+            "last_seen": self.last_seen,
+            "stack": self.stack,
+        }
+
+
+def _call_site(frames: List[traceback.FrameSummary]) -> str:
+    """Innermost backend frame, or the innermost frame when none is ours"""
+    for frame in reversed(frames):
+        if frame.filename.startswith(APP_DIR):
+            break
+    else:
+        frame = frames[-1]
+    filename = os.path.relpath(frame.filename, BACKEND_DIR) if frame.filename.startswith(BACKEND_DIR) else frame.filename
+    return f"{filename}:{frame.lineno} in {frame.name}"
+
+
+def _count_block(site: str):
+    LOOP_BLOCKS.labels(site).inc()
+
+
+class BlockingDetector:
+    """
+    Watchdog thread that captures the loop's stack while it is blocked
+
+    The stack is taken once per stall, as soon as the heartbeat is
+    threshold_ms late; the stall's full duration is recorded when the next
+    beat arrives. Sites beyond max_sites are folded into "other".
+    """
+
+    def __init__(self, threshold_ms: float = 100.0, max_sites: int = 50, stack_depth: int = 20):
+        self.threshold = threshold_ms / 1000
+        self.beat_interval = max(self.threshold / 4, 0.005)
+        self.max_sites = max_sites
+        self.stack_depth = stack_depth
+        self.beat = time.monotonic()
+        self.sites: Dict[str, BlockingSite] = {}
+        self.stalls = 0
+        self.loop_thread_id: Optional[int] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.task: Optional[asyncio.Task] = None
+        self.thread: Optional[threading.Thread] = None
+        self.stopping = threading.Event()
+        self.lock = threading.Lock()
+
+    def start(self):
+        """Start on the running loop; call from the loop thread"""
+        if self.task is not None:
+            return
+        self.loop_thread_id = threading.get_ident()
+        self.loop = asyncio.get_running_loop()
+        self.beat = time.monotonic()
+        self.stopping.clear()
+        self.task = asyncio.create_task(self._heartbeat())
+        self.thread = threading.Thread(target=self._watch, name="loop-block-watchdog", daemon=True)
+        self.thread.start()
+
+    async def stop(self):
+        self.stopping.set()
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        if self.thread is not None:
+            self.thread.join(1.0)
+            self.thread = None
+
+    async def _heartbeat(self):
+        while True:
+            self.beat = time.monotonic()
+            await asyncio.sleep(self.beat_interval)
+
+    def _watch(self):
+        stalled_since: Optional[float] = None  # beat that went stale
+        stack: List[str] = []
+        site = ""
+        while not self.stopping.wait(self.beat_interval / 2):
+            beat = self.beat
+            if time.monotonic() - beat >= self.threshold:
+                if stalled_since != beat:
+                    stalled_since = beat
+                    site, stack = self._capture()
+                continue
+            if stalled_since is not None:
+                # The loop is back; the stall lasted until this beat
+                blocked_ms = max(0.0, beat - stalled_since - self.beat_interval) * 1000
+                self._record(site, stack, max(blocked_ms, self.threshold * 1000))
+                stalled_since = None
+
+    def _capture(self):
+        frame = sys._current_frames().get(self.loop_thread_id)
+        if frame is None:
+            return "unknown", []
+        frames = traceback.extract_stack(frame, limit=self.stack_depth)
+        stack = [f"{f.filename}:{f.lineno} in {f.name}" for f in frames]
+        return _call_site(frames), stack
+
+    def _record(self, site: str, stack: List[str], blocked_ms: float):
+        with self.lock:
+            self.stalls += 1
+            if site not in self.sites and len(self.sites) >= self.max_sites:
+                site = "other"
+            entry = self.sites.get(site)
+            if entry is None:
+                entry = self.sites[site] = BlockingSite(site, stack)
+            entry.record(blocked_ms, stack)
+        try:
+            # Metrics are only written from the loop thread
+            self.loop.call_soon_threadsafe(_count_block, site)
+        except RuntimeError:
+            pass  # loop already closed
+
+    def summary(self, limit: int = 20) -> Dict[str, Any]:
+        with self.lock:
+            sites = sorted(self.sites.values(), key=lambda s: -s.total_ms)[:limit]
+            return {
+                "threshold_ms": self.threshold * 1000,
+                "stalls": self.stalls,
+                "sites": [s.summary() for s in sites],
+            }
+
+
+class LoopLagMonitor:
+    """Background task sampling how late the event loop runs timers"""
+
+    def __init__(self, interval: float = 0.5, window: int = 600, detector: Optional[BlockingDetector] = None):
+        self.interval = interval
+        self.samples = deque(maxlen=window)  # seconds
+        self.detector = detector
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+            if self.detector is not None:
+                self.detector.start()
+
+    async def stop(self):
+        if self.detector is not None:
+            await self.detector.stop()
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self.samples.append(lag)
+            LOOP_LAG.observe(lag)
+            LOOP_LAG_LAST.set(lag)
+
+    def summary(self) -> Dict[str, Any]:
+        ordered = sorted(self.samples)
+        lag = {
+            "samples": len(ordered),
+            "interval_ms": self.interval * 1000,
+            "p50_ms": round(ordered[len(ordered) // 2] * 1000, 2) if ordered else None,
+            "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000, 2) if ordered else None,
+            "max_ms": round(ordered[-1] * 1000, 2) if ordered else None,
+        }
+        return {
+            "lag": lag,
+            "blocking": self.detector.summary() if self.detector is not None else None,
+        }
+
+
+def create_loop_monitor() -> LoopLagMonitor:
+    """Build the lag monitor, with a blocking detector under LOOP_BLOCK_DETECT"""
+    detector = BlockingDetector(settings.LOOP_BLOCK_THRESHOLD_MS) if settings.LOOP_BLOCK_DETECT else None
+    return LoopLagMonitor(settings.METRICS_LOOP_LAG_INTERVAL, detector=detector)
+
+
+loop_monitor = create_loop_monitor()
@@ -1,19 +1,41 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from app.config import settings
 from app.models import HealthResponse
 from app.neo4j_client import neo4j_client
+from app.llm_client import llm_client
+from app.llm_router import model_router
 from app import routes
+from app import logging_utils
+from app.tracing import tracer
+from app import metrics
+from app import profiling
+from app import memory
+from app.loop_monitor import loop_monitor
+from app.health import health_prober
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    memory.start_tracemalloc()
     await neo4j_client.connect()
+    await llm_client.connect()
+    await model_router.connect()
+    await health_prober.start()
+    if settings.METRICS_ENABLED or settings.LOOP_BLOCK_DETECT:
+        loop_monitor.start()
     yield
     # Shutdown
+    await health_prober.stop()
+    await loop_monitor.stop()
+    await model_router.close()
+    await llm_client.close()
+    logging_utils.close_qa_log_writer()
+    tracer.close()
     await neo4j_client.close()
 
 
@@ -33,18 +55,43 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.PROFILE_TOKEN:
+    app.add_middleware(profiling.ProfilingMiddleware)
+if settings.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+
 # Include routers
 app.include_router(routes.router, prefix="/api/v1")
 
 
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
-    """Health check endpoint"""
-    neo4j_status = "ok" if await neo4j_client.health_check() else "fail"
-    llm_status = "ok"  # Mock for MVP
+    """Health check endpoint, from the background prober's latest results"""
+    neo4j_status = "ok" if health_prober.status("neo4j") == "ok" else "fail"
+    llm_status = "ok" if health_prober.status("llm") == "ok" else "fail"
 
     return HealthResponse(
         status="ok" if neo4j_status == "ok" else "degraded",
         neo4j=neo4j_status,
         llm=llm_status,
+        checked_at=health_prober.components["neo4j"].checked_at,
     )
+
+
+@app.get("/health/live")
+async def liveness():
+    """Liveness: the worker's event loop is serving requests"""
+    return {"status": "ok"}
+
+
+@app.get("/health/ready")
+async def readiness():
+    """Readiness: required components passed their latest probe; 503 otherwise"""
+    summary = health_prober.summary()
+    return JSONResponse(summary, status_code=200 if summary["status"] == "ok" else 503)
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus text exposition of request, pipeline, Neo4j and LLM metrics"""
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,251 @@
+"""
+Memory introspection for one worker
+
+memory_report() combines process RSS, tracemalloc's top allocation sites
+(optionally as a diff against a baseline snapshot), garbage collector
+counts, and a deep-size estimate of every registered in-memory structure.
+Structures are registered by name with register_memory_source(); each is
+reported with its approximate bytes, object count and string statistics.
+duplicate_bytes is what interning repeated strings would save.
+
+tracemalloc slows allocation, so it only runs with MEMORY_TRACEMALLOC.
+"""
+
+import gc
+import sys
+import types
+import asyncio
+import tracemalloc
+from collections import deque
+from typing import Optional, List, Dict, Any, Callable
+
+from app.config import settings
+
+# Object types never descended into when sizing
+_OPAQUE = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+
+def rss_bytes() -> Dict[str, Optional[int]]:
+    """Current and peak resident set size of this process"""
+    result: Dict[str, Optional[int]] = {"rss": None, "peak": None}
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    result["rss"] = int(line.split()[1]) * 1024
+                elif line.startswith("VmHWM:"):
+                    result["peak"] = int(line.split()[1]) * 1024
+    except OSError:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        result["peak"] = peak if sys.platform == "darwin" else peak * 1024
+    return result
+
+
+def deep_sizeof(root: Any, max_objects: int = 1_000_000) -> Dict[str, Any]:
+    """
+    Approximate bytes reachable from root, counting shared objects once
+
+    Follows containers, instance __dict__ and __slots__; modules, classes
+    and functions are not followed. Stops after max_objects objects.
+    """
+    seen = set()
+    values_seen = set()
+    stack = [root]
+    size = objects = strings = duplicate_bytes = 0
+    while stack and objects < max_objects:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _OPAQUE):
+            continue
+        seen.add(id(obj))
+        objects += 1
+        obj_size = sys.getsizeof(obj)
+        size += obj_size
+
+        if isinstance(obj, str):
+            strings += 1
+            if obj in values_seen:
+                duplicate_bytes += obj_size
+            else:
+                values_seen.add(obj)
+        elif isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+            stack.extend(obj)
+        elif not isinstance(obj, (bytes, int, float, bool)) and obj is not None:
+            if hasattr(obj, "__dict__"):
+                stack.append(obj.__dict__)
+            for slot in getattr(type(obj), "__slots__", ()):
+                if hasattr(obj, slot):
+                    stack.append(getattr(obj, slot))
+    return {
+        "bytes": size,
+        "objects": objects,
+        "truncated": bool(stack),
+        "strings": {"count": strings, "unique": len(values_seen), "duplicate_bytes": duplicate_bytes},
+    }
+
+
+# name -> callable returning the structure to size (or None when absent)
+MEMORY_SOURCES: Dict[str, Callable[[], Any]] = {}
+
+
+def register_memory_source(name: str, getter: Callable[[], Any]):
+    MEMORY_SOURCES[name] = getter
+
+
+class AllocationTracker:
+    """tracemalloc control plus a baseline snapshot for diffs"""
+
+    def __init__(self):
+        self.baseline: Optional[tracemalloc.Snapshot] = None
+
+    def start(self, frames: int = 1):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self.baseline = tracemalloc.take_snapshot()
+
+    def stop(self):
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.baseline = None
+
+    def reset_baseline(self):
+        if tracemalloc.is_tracing():
+            self.baseline = tracemalloc.take_snapshot()
+
+    def top(self, limit: int = 20, diff: bool = True, group_by: str = "lineno") -> List[Dict[str, Any]]:
+        """Top allocation sites, by growth since the baseline when diff is set"""
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        if diff and self.baseline is not None:
+            return [
+                {
+                    "site": _site(stat.traceback),
+                    "size_diff": stat.size_diff,
+                    "count_diff": stat.count_diff,
+                    "size": stat.size,
+                    "count": stat.count,
+                }
+                for stat in snapshot.compare_to(self.baseline, group_by)[:limit]
+            ]
+        return [
+            {"site": _site(stat.traceback), "size": stat.size, "count": stat.count}
+            for stat in snapshot.statistics(group_by)[:limit]
+        ]
+
+
+def _site(traceback: tracemalloc.Traceback) -> str:
+    frame = traceback[0]
+    return f"{frame.filename}:{frame.lineno}"
+
+
+allocation_tracker = AllocationTracker()
+
+
+def start_tracemalloc():
+    """Start tracing allocations when MEMORY_TRACEMALLOC is set"""
+    if settings.MEMORY_TRACEMALLOC:
+        allocation_tracker.start(settings.MEMORY_TRACEMALLOC_FRAMES)
+
+
+async def memory_report(top: int = 20, diff: bool = True, group_by: str = "lineno") -> Dict[str, Any]:
+    """RSS, tracemalloc top sites, gc counts and per-structure size estimates"""
+    tracing = tracemalloc.is_tracing()
+    allocations = None
+    if tracing:
+        # Snapshots take a while on a large heap; keep them off the loop
+        allocations = await asyncio.to_thread(allocation_tracker.top, top, diff, group_by)
+        current, peak = tracemalloc.get_traced_memory()
+
+    # Sized on the loop so no structure changes while it is walked
+    sources = {}
+    for name, getter in MEMORY_SOURCES.items():
+        try:
+            obj = getter()
+            if obj is not None:
+                sources[name] = deep_sizeof(obj)
+        except Exception as e:
+            sources[name] = {"error": str(e)}
+
+    return {
+        "process": {**rss_bytes(), "allocated_blocks": sys.getallocatedblocks()},
+        "gc": {"counts": gc.get_count(), "collections": [s["collections"] for s in gc.get_stats()]},
+        "tracemalloc": {
+            "enabled": tracing,
+            "traced_bytes": current if tracing else None,
+            "traced_peak_bytes": peak if tracing else None,
+            "diff_against_baseline": bool(tracing and diff and allocation_tracker.baseline is not None),
+            "top": allocations,
+        },
+        "sources": sources,
+    }
+
+
+# In-memory structures worth watching; imported lazily so this module can
+# be imported from anywhere
+
+
+def _llm_cache_memory():
+    from app.llm_client import llm_client
+
+    return llm_client.cache.memory if llm_client.cache is not None else None
+
+
+def _synonyms():
+    from app.entity_linker import SYNONYMS
+
+    return SYNONYMS
+
+
+def _intent_model():
+    from app.intent_classifier import intent_classifier
+
+    return intent_classifier
+
+
+def _trace_buffer():
+    from app.tracing import ring_buffer
+
+    return ring_buffer.traces
+
+
+def _qa_blob_keys():
+    from app import logging_utils
+
+    return logging_utils.qa_blob_store.known if logging_utils.qa_blob_store is not None else None
+
+
+def _llm_stats():
+    from app.llm_router import model_router
+
+    return {
+        "routes": model_router.stats,
+        "providers": [p.stats for client in model_router.clients.values() for p in client.providers],
+    }
+
+
+def _loop_lag_samples():
+    from app.loop_monitor import loop_monitor
+
+    return loop_monitor.samples
+
+
+def _metrics():
+    from app.metrics import registry
+
+    return registry.metrics
+
+
+register_memory_source("llm_cache", _llm_cache_memory)
+register_memory_source("linking_synonyms", _synonyms)
+register_memory_source("intent_classifier", _intent_model)
+register_memory_source("trace_buffer", _trace_buffer)
+register_memory_source("qa_blob_keys", _qa_blob_keys)
+register_memory_source("llm_stats", _llm_stats)
+register_memory_source("loop_lag_samples", _loop_lag_samples)
+register_memory_source("metrics", _metrics)
@@ -0,0 +1,395 @@
+"""
+Prometheus-style metrics
+
+Counters, gauges and histograms hold plain Python numbers written only
+from the event loop thread (other threads hand updates over with
+call_soon_threadsafe), so the hot path takes no locks: an observation is
+a dict lookup, a bisect and two additions. Values other modules already
+keep (LLM scheduler, routes, cache, QA log writer) are read by collectors
+at scrape time instead of being counted twice. render() produces the text
+exposition format served by /metrics.
+"""
+
+import time
+from bisect import bisect_left
+from typing import Optional, List, Dict, Any, Tuple, Callable, Iterable
+
+from app.config import settings
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; request and stage latencies span sub-millisecond rule answers
+# to multi-second LLM calls
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# (labels, value) pairs of one family, as returned by collectors
+Samples = List[Tuple[Dict[str, str], float]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.children: Dict[Tuple[str, ...], Any] = {}
+
+    def labels(self, *values: str):
+        """Child for one label combination, created on first use"""
+        child = self.children.get(values)
+        if child is None:
+            child = self.children[values] = self._new_child()
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _label_dict(self, values: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self._label_dict(k))} {_format_value(c.value)}"
+            for k, c in self.children.items()
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0):
+        self.labels().dec(amount)
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+
+class _HistogramValue:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # per bucket, last is +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, child in self.children.items():
+            labels = self._label_dict(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(child.sum)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Registered metrics plus scrape-time collectors"""
+
+    def __init__(self):
+        self.metrics: List[_Metric] = []
+        self.collectors: List[Callable[[], Iterable[Tuple[str, str, str, Samples]]]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def _register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, Samples]]]):
+        """collector() yields (name, kind, help, samples) families at scrape time"""
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            if metric.children:
+                lines.append(f"# HELP {metric.name} {metric.documentation}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+                lines.extend(metric.render())
+        for collector in self.collectors:
+            try:
+                families = list(collector())
+            except Exception:
+                # A broken collector must not take the whole scrape down
+                continue
+            for name, kind, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUESTS = registry.counter(
+    "graphrag_http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+)
+HTTP_LATENCY = registry.histogram(
+    "graphrag_http_request_duration_seconds", "HTTP request latency by route", ("method", "route")
+)
+HTTP_IN_FLIGHT = registry.gauge("graphrag_http_requests_in_flight", "HTTP requests being served")
+STAGE_LATENCY = registry.histogram(
+    "graphrag_stage_duration_seconds", "Time per /ask pipeline stage (see DebugInfo.stages)", ("stage",)
+)
+ANSWERS = registry.counter(
+    "graphrag_answers_total", "Answers by source and confidence", ("answered_by", "confidence", "degraded")
+)
+NEO4J_LATENCY = registry.histogram(
+    "graphrag_neo4j_query_duration_seconds", "Neo4j query latency by operation", ("operation",)
+)
+NEO4J_ERRORS = registry.counter("graphrag_neo4j_errors_total", "Failed Neo4j queries by operation", ("operation",))
+NEO4J_SESSIONS = registry.gauge("graphrag_neo4j_sessions_in_use", "Neo4j sessions (pool connections) in use")
+LOOP_LAG = registry.histogram(
+    "graphrag_event_loop_lag_seconds", "How late periodic event loop wake-ups were", buckets=LAG_BUCKETS
+)
+LOOP_LAG_LAST = registry.gauge("graphrag_event_loop_lag_last_seconds", "Most recent event loop lag sample")
+LOOP_BLOCKS = registry.counter(
+    "graphrag_event_loop_blocks_total", "Event loop stalls over LOOP_BLOCK_THRESHOLD_MS by call site", ("site",)
+)
+
+
+def observe_stages(stages: Optional[Dict[str, float]]):
+    """Record DebugInfo.stages (milliseconds) into the stage histogram; empty without tracing"""
+    if not stages:
+        return
+    for stage, ms in stages.items():
+        STAGE_LATENCY.labels(stage).observe(ms / 1000)
+
+
+def route_label(scope) -> str:
+    """
+    Path template of the matched route, with any router prefix
+
+    Included routers may report their routes without the prefix, so the
+    prefix is taken from the leading segments of the request path.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if template is None:
+        return "unmatched"
+    segments = scope.get("path", "").rstrip("/").split("/")
+    depth = len(template.rstrip("/").split("/"))
+    prefix = "/".join(segments[:len(segments) - depth + 1])
+    return prefix + template if prefix and not template.startswith(prefix + "/") else template
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting requests and their latency per route
+
+    Routes are labelled by their path template ("/api/v1/ask"), never the
+    raw path, so label cardinality stays bounded; unmatched paths share one
+    label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = route_label(scope)
+            method = scope.get("method", "")
+            HTTP_LATENCY.labels(method, route).observe(time.perf_counter() - start)
+            HTTP_REQUESTS.labels(method, route, str(status)).inc()
+
+
+# Scrape-time collectors for state other modules already keep
+
+
+def _collect_llm():
+    from app.llm_client import llm_client
+    from app.llm_router import model_router
+
+    scheduler = llm_client.scheduler.summary()
+    classes = scheduler["classes"]
+    yield "graphrag_llm_queue_depth", "gauge", "LLM calls waiting for a scheduler slot", [
+        ({"priority": name}, c["queued"]) for name, c in classes.items()
+    ]
+    yield "graphrag_llm_in_flight", "gauge", "LLM calls holding a scheduler slot", [({}, scheduler["in_flight"])]
+    yield "graphrag_llm_max_in_flight", "gauge", "Scheduler slot limit", [({}, scheduler["max_in_flight"])]
+    yield "graphrag_llm_admitted_total", "counter", "LLM calls admitted by the scheduler", [
+        ({"priority": name}, c["admitted"]) for name, c in classes.items()
+    ]
+    yield "graphrag_llm_rejected_total", "counter", "LLM calls rejected with a full queue", [
+        ({"priority": name}, c["rejected"]) for name, c in classes.items()
+    ]
+
+    routes = model_router.stats
+    yield "graphrag_llm_route_requests_total", "counter", "Generations per model route", [
+        ({"route": name}, s.requests) for name, s in routes.items()
+    ]
+    yield "graphrag_llm_route_failures_total", "counter", "Failed generations per model route", [
+        ({"route": name}, s.failures) for name, s in routes.items()
+    ]
+    yield "graphrag_llm_tokens_total", "counter", "Estimated tokens sent to and generated by models", [
+        ({"route": name, "kind": kind}, value)
+        for name, s in routes.items()
+        for kind, value in (("prompt", s.prompt_tokens), ("completion", s.completion_tokens))
+    ]
+
+    # Providers sharing an endpoint share stats; report each endpoint once
+    providers = list({
+        p.endpoint: p for client in reversed(list(model_router.clients.values())) for p in client.providers
+    }.values())
+    yield "graphrag_llm_provider_calls_total", "counter", "Calls per LLM provider", [
+        ({"provider": p.name, "model": p.model}, p.stats.calls) for p in providers
+    ]
+    yield "graphrag_llm_provider_failures_total", "counter", "Failed calls per LLM provider", [
+        ({"provider": p.name, "model": p.model}, p.stats.failures) for p in providers
+    ]
+    yield "graphrag_llm_provider_breaker_open", "gauge", "1 while a provider's circuit is open", [
+        ({"provider": p.name, "model": p.model}, 1 if p.breaker.state == "open" else 0) for p in providers
+    ]
+
+    cache = llm_client.cache
+    if cache is not None:
+        stats = cache.summary()
+        yield "graphrag_llm_cache_lookups_total", "counter", "LLM response cache lookups by result", [
+            ({"result": "memory_hit"}, stats["memory_hits"]),
+            ({"result": "disk_hit"}, stats["disk_hits"]),
+            ({"result": "miss"}, stats["misses"]),
+        ]
+        yield "graphrag_llm_cache_hit_ratio", "gauge", "LLM response cache hits per lookup", [
+            ({}, stats["hit_ratio"])
+        ]
+        yield "graphrag_llm_cache_memory_entries", "gauge", "Entries in the memory cache tier", [
+            ({}, stats["memory_entries"])
+        ]
+
+
+def _collect_neo4j():
+    yield "graphrag_neo4j_pool_max_size", "gauge", "Neo4j connection pool size limit", [
+        ({}, settings.NEO4J_MAX_POOL_SIZE)
+    ]
+
+
+def _collect_qa_log():
+    from app import logging_utils
+
+    writer = logging_utils.qa_log_writer
+    if writer is None:
+        return
+    stats = writer.summary()
+    yield "graphrag_qa_log_queue_depth", "gauge", "QA log entries waiting for the writer thread", [
+        ({}, stats["queued"])
+    ]
+    yield "graphrag_qa_log_entries_total", "counter", "QA log entries by outcome", [
+        ({"outcome": "written"}, stats["written"]),
+        ({"outcome": "dropped"}, stats["dropped"]),
+        ({"outcome": "error"}, stats["errors"]),
+    ]
+
+
+def _collect_health():
+    from app.health import health_prober
+
+    components = health_prober.components
+    yield "graphrag_component_up", "gauge", "1 while a component's latest fresh probe passed", [
+        ({"component": name}, 1 if health_prober.status(name) == "ok" else 0) for name in components
+    ]
+    yield "graphrag_component_probe_age_seconds", "gauge", "Seconds since a component was last probed", [
+        ({"component": name}, time.time() - c.checked_at)
+        for name, c in components.items()
+        if c.checked_at is not None
+    ]
+
+
+registry.add_collector(_collect_llm)
+registry.add_collector(_collect_neo4j)
+registry.add_collector(_collect_qa_log)
+registry.add_collector(_collect_health)
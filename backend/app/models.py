@@ -1,4 +1,4 @@
-from typing import Optional, List, Any, Dict
+from typing import Optional, List, Any, Dict, Literal
 from pydantic import BaseModel
 
 
@@ -7,6 +7,7 @@ class HealthResponse(BaseModel):
     status: str
     neo4j: str
     llm: str
+    checked_at: Optional[float] = None  # when the components were last probed
 
 
 # Linked Entity
@@ -15,6 +16,7 @@ class LinkedEntity(BaseModel):
     node_id: str
     label: str
     score: float
+    name: Optional[str] = None
 
 
 # Triple
@@ -53,6 +55,7 @@ class AskRequest(BaseModel):
     question: str
     hop: int = 2
     limit: int = 20
+    priority: Literal["interactive", "batch"] = "interactive"
 
 
 # Citation
@@ -66,6 +69,11 @@ class DebugInfo(BaseModel):
     linked_entities: List[Dict[str, Any]]
     cypher: str
     triples_used: int
+    answered_by: str = "llm"  # llm | rules
+    intent: Optional[str] = None
+    route: Optional[Dict[str, Any]] = None  # model route, latency and token counts
+    stages: Optional[Dict[str, float]] = None  # milliseconds per pipeline stage, when tracing
+    trace_id: Optional[str] = None  # look up in /api/v1/traces
 
 
 # Ask Response
@@ -74,3 +82,4 @@ class AskResponse(BaseModel):
     citations: List[Citation]
     confidence: str
     debug: DebugInfo
+    degraded: bool = False  # True when no LLM provider could answer
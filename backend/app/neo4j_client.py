@@ -1,7 +1,10 @@
+import time
 from typing import List, Optional, Dict, Any
 from neo4j import AsyncGraphDatabase, AsyncDriver
 
 from app.config import settings
+from app.tracing import tracer
+from app.metrics import NEO4J_LATENCY, NEO4J_ERRORS, NEO4J_SESSIONS
 
 
 class Neo4jClient:
@@ -13,6 +16,7 @@ class Neo4jClient:
         self.driver = AsyncGraphDatabase.driver(
             settings.NEO4J_URI,
             auth=(settings.NEO4J_USER, settings.NEO4J_PASSWORD),
+            max_connection_pool_size=settings.NEO4J_MAX_POOL_SIZE,
         )
 
     async def close(self):
@@ -20,13 +24,34 @@ class Neo4jClient:
         if self.driver:
             await self.driver.close()
 
+    async def _run(
+        self, operation: str, query: str, params: Dict[str, Any], **span_attributes
+    ) -> List[Dict[str, Any]]:
+        """Run a read query in its own session, traced and timed per operation"""
+        start = time.perf_counter()
+        NEO4J_SESSIONS.inc()
+        try:
+            with tracer.span(f"neo4j.{operation}", **span_attributes) as span:
+                async with self.driver.session() as session:
+                    result = await session.run(query, **params)
+                    records = await result.data()
+                if span is not None:
+                    span.set("records", len(records))
+        except Exception:
+            NEO4J_ERRORS.labels(operation).inc()
+            raise
+        finally:
+            NEO4J_SESSIONS.dec()
+            NEO4J_LATENCY.labels(operation).observe(time.perf_counter() - start)
+        return records
+
     async def health_check(self) -> bool:
         """Check if Neo4j is reachable"""
+        if not self.driver:
+            return False
         try:
-            async with self.driver.session() as session:
-                result = await session.run("RETURN 1 AS n")
-                await result.single()
-                return True
+            await self._run("health_check", "RETURN 1 AS n", {})
+            return True
         except Exception:
             return False
 
@@ -48,21 +73,18 @@ class Neo4jClient:
         LIMIT $topk
         """
 
-        async with self.driver.session() as session:
-            result = await session.run(
-                query, name=mention.strip(), topk=topk
-            )
-            records = await result.data()
-
-        return records
+        return await self._run(
+            "find_nodes", query, {"name": mention.strip(), "topk": topk}, mention=mention
+        )
 
     async def fetch_subgraph(
         self,
         node_ids: List[str],
         hop: int = 2,
         limit: int = 20,
+        relations: Optional[List[str]] = None,
     ) -> List[Dict[str, Any]]:
-        """Fetch subgraph around given nodes"""
+        """Fetch subgraph around given nodes, optionally only the given relation types"""
         if not self.driver or not node_ids:
             return []
 
@@ -70,20 +92,55 @@ class Neo4jClient:
         query = """
         MATCH (a)-[r]-(b)
         WHERE a.node_id IN $node_ids
+          AND ($relations IS NULL OR type(r) IN $relations)
         RETURN a.name AS head,
                type(r) AS relation,
                b.name AS tail,
+               CASE type(r)
+                   WHEN 'AGE_RANGE'
+                   THEN coalesce(r.value, toString(b.age_min) + '-' + toString(b.age_max))
+               END AS age_range,
                r.source_id AS source_id,
                a.node_id AS head_id,
                b.node_id AS tail_id
         LIMIT $limit
         """
 
-        async with self.driver.session() as session:
-            result = await session.run(query, node_ids=node_ids, limit=limit)
-            records = await result.data()
+        return await self._run(
+            "fetch_subgraph",
+            query,
+            {"node_ids": node_ids, "relations": relations, "limit": limit},
+            nodes=len(node_ids),
+            relations=relations,
+        )
 
-        return records
+    async def fetch_node_properties(
+        self, node_ids: List[str], properties: List[str]
+    ) -> List[Dict[str, Any]]:
+        """Non-null values of the given properties on the given nodes"""
+        if not self.driver or not node_ids or not properties:
+            return []
+
+        query = """
+        MATCH (a)
+        WHERE a.node_id IN $node_ids
+        UNWIND $properties AS property
+        WITH a, property, a[property] AS value
+        WHERE value IS NOT NULL
+        RETURN a.name AS head,
+               property,
+               value,
+               a.source_id AS source_id,
+               a.node_id AS head_id
+        """
+
+        return await self._run(
+            "fetch_node_properties",
+            query,
+            {"node_ids": node_ids, "properties": properties},
+            nodes=len(node_ids),
+            properties=properties,
+        )
 
 
 neo4j_client = Neo4jClient()
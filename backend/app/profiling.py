@@ -0,0 +1,256 @@
+"""
+On-demand request profiling
+
+A request carrying X-Profile: <PROFILE_TOKEN> (or ?profile=<token>) runs
+while a sampling thread records the event loop thread's stack every
+PROFILE_INTERVAL_MS. The profile is stored under LOG_DIR/profiles as
+collapsed stacks keyed by request id, and the response carries the id plus
+a short summary of the hottest frames in headers. Unprofiled requests only
+pay for a header scan.
+
+Samples cover everything the loop ran while the request was in flight,
+including other requests; samples where the loop was waiting for I/O are
+counted as "(idle)".
+"""
+
+import os
+import sys
+import hmac
+import json
+import time
+import uuid
+import asyncio
+import threading
+from typing import Optional, List, Dict, Any, Tuple
+from urllib.parse import parse_qs
+
+from app.config import settings
+from app.logging_utils import get_log_dir
+
+IDLE_FRAME = "(idle)"
+PROFILE_HEADER = b"x-profile"
+REQUEST_ID_HEADER = b"x-request-id"
+
+
+def _frame_label(code, lineno: int) -> str:
+    filename = code.co_filename
+    marker = os.sep + "app" + os.sep
+    short = filename[filename.rfind(marker) + 1:] if marker in filename else os.path.basename(filename)
+    return f"{code.co_name} ({short}:{lineno})"
+
+
+class SamplingProfiler:
+    """Thread sampling one thread's stack into collapsed-stack counts"""
+
+    def __init__(self, thread_id: int, interval: float = 0.001, max_seconds: float = 30.0, max_depth: int = 64):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.max_depth = max_depth
+        self.stacks: Dict[str, int] = {}
+        self.samples = 0
+        self.stopping = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(1.0)
+
+    def _run(self):
+        deadline = time.monotonic() + self.max_seconds
+        while not self.stopping.wait(self.interval) and time.monotonic() < deadline:
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            if frame.f_code.co_filename.endswith("selectors.py"):
+                key = IDLE_FRAME
+            else:
+                labels = []
+                while frame is not None and len(labels) < self.max_depth:
+                    labels.append(_frame_label(frame.f_code, frame.f_lineno))
+                    frame = frame.f_back
+                key = ";".join(reversed(labels))
+            self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.samples += 1
+
+
+def summarize(stacks: Dict[str, int], top: int = 10) -> Dict[str, Any]:
+    """Hottest frames by self and inclusive samples, with percentages"""
+    total = sum(stacks.values())
+    self_counts: Dict[str, int] = {}
+    inclusive: Dict[str, int] = {}
+    for stack, count in stacks.items():
+        frames = stack.split(";")
+        self_counts[frames[-1]] = self_counts.get(frames[-1], 0) + count
+        for frame in set(frames):
+            inclusive[frame] = inclusive.get(frame, 0) + count
+
+    def ranked(counts: Dict[str, int]) -> List[Dict[str, Any]]:
+        return [
+            {"frame": frame, "samples": n, "pct": round(100 * n / total, 1)}
+            for frame, n in sorted(counts.items(), key=lambda item: -item[1])[:top]
+        ]
+
+    return {
+        "samples": total,
+        "idle_pct": round(100 * stacks.get(IDLE_FRAME, 0) / total, 1) if total else 0.0,
+        "self": ranked(self_counts),
+        # Backend frames only; runtime frames are in every stack
+        "inclusive": ranked({f: n for f, n in inclusive.items() if f"(app{os.sep}" in f}),
+    }
+
+
+def to_folded(stacks: Dict[str, int]) -> str:
+    """Collapsed-stack text, as read by flamegraph.pl and speedscope"""
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
+
+
+def get_profile_dir() -> str:
+    path = settings.PROFILE_DIR
+    if not os.path.isabs(path):
+        path = os.path.join(get_log_dir(), path)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _profile_path(request_id: str) -> str:
+    # Request ids may come from clients; keep them to a safe file name
+    safe = "".join(c for c in request_id if c.isalnum() or c in "-_")[:64]
+    return os.path.join(get_profile_dir(), f"{safe}.json")
+
+
+def save_profile(profile: Dict[str, Any]):
+    with open(_profile_path(profile["request_id"]), "w", encoding="utf-8") as f:
+        json.dump(profile, f, ensure_ascii=False)
+
+
+def load_profile(request_id: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(_profile_path(request_id), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def is_authorized(token: Optional[str]) -> bool:
+    """Whether token matches PROFILE_TOKEN; always False when profiling is off"""
+    if not settings.PROFILE_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token.encode(), settings.PROFILE_TOKEN.encode())
+
+
+def _requested_token(scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER:
+            return value.decode("latin-1")
+    query = scope.get("query_string", b"")
+    if b"profile=" in query:
+        return parse_qs(query.decode("latin-1")).get("profile", [None])[0]
+    return None
+
+
+def _header(scope, wanted: bytes) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == wanted:
+            return value.decode("latin-1")
+    return None
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling requests that present the profile token
+
+    One profile runs at a time; a profiled request arriving while another
+    is being profiled is served normally with X-Profile: busy.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.active = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.PROFILE_TOKEN:
+            await self.app(scope, receive, send)
+            return
+        token = _requested_token(scope)
+        if token is None:
+            await self.app(scope, receive, send)
+            return
+        if not is_authorized(token) or self.active:
+            status = b"busy" if self.active and is_authorized(token) else b"denied"
+            await self.app(scope, receive, _with_headers(send, [(b"x-profile", status)]))
+            return
+
+        request_id = _header(scope, REQUEST_ID_HEADER) or uuid.uuid4().hex[:16]
+        profiler = SamplingProfiler(
+            threading.get_ident(),
+            interval=settings.PROFILE_INTERVAL_MS / 1000,
+            max_seconds=settings.PROFILE_MAX_SECONDS,
+        )
+        status_code = 500
+        pending_start = None
+
+        async def send_after_profile(message):
+            # Hold the response start until the profile summary is known
+            nonlocal status_code, pending_start
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                pending_start = message
+                return
+            if pending_start is not None and not message.get("more_body", False):
+                start_message, pending_start = pending_start, None
+                profiler.stop()
+                await send(_add_headers(start_message, _summary_headers(request_id, profiler)))
+            elif pending_start is not None:
+                start_message, pending_start = pending_start, None
+                await send(_add_headers(start_message, [(b"x-request-id", request_id.encode())]))
+            await send(message)
+
+        self.active = True
+        start = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_after_profile)
+        finally:
+            profiler.stop()
+            self.active = False
+
+        profile = {
+            "request_id": request_id,
+            "method": scope.get("method"),
+            "path": scope.get("path"),
+            "status": status_code,
+            "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+            "interval_ms": settings.PROFILE_INTERVAL_MS,
+            "timestamp": time.time(),
+            "stacks": profiler.stacks,
+        }
+        await asyncio.to_thread(save_profile, profile)
+
+
+def _summary_headers(request_id: str, profiler: SamplingProfiler) -> List[Tuple[bytes, bytes]]:
+    summary = summarize(profiler.stacks, top=4)
+    top = "; ".join(f"{f['frame']} {f['pct']}%" for f in summary["self"] if f["frame"] != IDLE_FRAME)
+    return [
+        (b"x-request-id", request_id.encode()),
+        (b"x-profile-samples", str(summary["samples"]).encode()),
+        (b"x-profile-idle-pct", str(summary["idle_pct"]).encode()),
+        (b"x-profile-top", top.encode("ascii", "replace")),
+    ]
+
+
+def _add_headers(message: Dict[str, Any], headers: List[Tuple[bytes, bytes]]) -> Dict[str, Any]:
+    return {**message, "headers": list(message.get("headers", [])) + headers}
+
+
+def _with_headers(send, headers: List[Tuple[bytes, bytes]]):
+    async def wrapped(message):
+        if message["type"] == "http.response.start":
+            message = _add_headers(message, headers)
+        await send(message)
+    return wrapped
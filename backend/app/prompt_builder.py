@@ -1,4 +1,9 @@
-from typing import List
+import re
+import json
+import hashlib
+from functools import lru_cache
+from typing import Dict, List, Optional
+from app.config import settings
 from app.models import Triple
 
 SYSTEM_PROMPT = """你是一个保险咨询专家。你的职责是根据提供的证据（三元组）回答用户的问题。
@@ -6,30 +11,281 @@ SYSTEM_PROMPT = """你是一个保险咨询专家。你的职责是根据提供
 重要规则：
 1. 只根据提供的三元组证据进行回答，禁止编造信息
 2. 如果证据不足以回答问题，明确说明"无法判断"，并列出需要补充的信息
-3. 回答必须包含对证据的引用（使用source_id）
+3. 回答必须列出所依据证据的引用编号（见证据格式说明）
 4. 用中文回答
 
-回答格式：
-- 结论：根据证据说明答案
-- 依据：列出引用的证据（source_id）
-- 需要补充：如证据不足，说明还需要什么信息
+回答格式（只输出以下三行）：
+结论：一到三句话给出答案
+引用：所依据证据的引用编号，用逗号分隔；没有可用证据时写"无"
+需要补充：证据不足时说明还需要什么信息，否则写"无"
 """
 
+USER_PROMPT_TEMPLATE = """用户问题：{question}
 
-def build_prompt(question: str, triples: List[Triple]) -> str:
-    """Build prompt for LLM"""
+证据三元组：
+{triples_text}
 
-    # Format triples
-    triples_text = ""
-    for i, t in enumerate(triples, 1):
-        source_info = f" [source_id={t.source_id}]" if t.source_id else ""
-        triples_text += f"{i}) ({t.h}, {t.r}, {t.t}){source_info}\n"
+请根据上述证据回答问题。"""
 
-    user_prompt = f"""用户问题：{question}
+NO_EVIDENCE_TEXT = "（无证据）"
 
-证据三元组：
-{triples_text if triples_text else "（无证据）"}
+# Stable evidence-schema preamble per format; sent as its own message after
+# SYSTEM_PROMPT so that everything before the question is a cacheable prefix
+EVIDENCE_PREAMBLES = {
+    "lines": "证据格式：每行一个三元组，形如 序号) (头实体, 关系, 尾实体) [source_id=来源编号]。引用证据时请使用source_id。",
+    "grouped": "证据格式：每行一个头实体，形如 头实体 | 关系: 尾实体 [引用编号], 尾实体 [引用编号]; 关系: ...。引用证据时请使用方括号中的编号，如[S1]。",
+}
+
+EVIDENCE_FORMATS = tuple(EVIDENCE_PREAMBLES)
+
+# Bump when build_messages or format_evidence lay prompts out differently;
+# edits to the template text above change PROMPT_VERSION on their own
+PROMPT_LAYOUT_VERSION = 1
+PROMPT_VERSION = f"{PROMPT_LAYOUT_VERSION}-" + hashlib.sha256(
+    json.dumps(
+        [SYSTEM_PROMPT, USER_PROMPT_TEMPLATE, NO_EVIDENCE_TEXT, EVIDENCE_PREAMBLES],
+        ensure_ascii=False,
+        sort_keys=True,
+    ).encode("utf-8")
+).hexdigest()[:8]
+
+_HANDLE_PATTERN = re.compile(r"\[(S\d+)\]")
+
+# CJK ideographs and full-width punctuation are roughly one token each
+_CJK_PATTERN = re.compile(r"[\u3000-\u303f\u4e00-\u9fff\uff00-\uffef]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate token count without a tokenizer
+
+    Counts one token per CJK character and one per ~4 other characters,
+    which slightly over-estimates common BPE vocabularies.
+    """
+    cjk = len(_CJK_PATTERN.findall(text))
+    other = len(text) - cjk
+    return cjk + (other + 3) // 4
+
+
+def get_token_budget(model: Optional[str] = None) -> int:
+    """Get prompt token budget for model"""
+    model = model or settings.LLM_MODEL
+    return settings.PROMPT_TOKEN_BUDGETS.get(model, settings.PROMPT_TOKEN_BUDGET)
+
+
+def dedupe_triples(triples: List[Triple]) -> List[Triple]:
+    """
+    Drop duplicate and symmetric triples, keeping the first occurrence
+
+    The subgraph query matches edges undirected, so the same edge comes
+    back as (h, r, t) and (t, r, h) when both endpoints are linked.
+    """
+    seen = set()
+    result = []
+    for t in triples:
+        key = (min(t.h, t.t), max(t.h, t.t), t.r, t.source_id)
+        if key in seen:
+            continue
+        seen.add(key)
+        result.append(t)
+    return result
+
+
+def format_triple_line(index: int, t: Triple) -> str:
+    """Format one triple as an evidence line"""
+    source_info = f" [source_id={t.source_id}]" if t.source_id else ""
+    return f"{index}) ({t.h}, {t.r}, {t.t}){source_info}"
+
+
+def citation_handles(triples: List[Triple]) -> Dict[str, str]:
+    """
+    Assign short citation handles to source ids
+
+    Returns a source_id -> handle mapping ("clause_12" -> "S1") in order of
+    first appearance; deterministic for a given triple list.
+    """
+    handles: Dict[str, str] = {}
+    for t in triples:
+        if t.source_id and t.source_id not in handles:
+            handles[t.source_id] = f"S{len(handles) + 1}"
+    return handles
+
+
+def _format_grouped_item(t: Triple, handles: Dict[str, str]) -> str:
+    """Format the tail of one triple inside a relation list"""
+    handle = handles.get(t.source_id) if t.source_id else None
+    return f"{t.t} [{handle}]" if handle else t.t
+
+
+def format_triples_grouped(triples: List[Triple], handles: Dict[str, str]) -> str:
+    """
+    Format triples grouped by head entity
+
+    Each head is written once followed by its relations, e.g.
+    XX护理险 | COVERS: 高血压 [S1], 阿尔茨海默病 [S2]; EXCLUDES: 高血压 [S3]
+    """
+    groups: Dict[str, Dict[str, List[str]]] = {}
+    for t in triples:
+        relations = groups.setdefault(t.h, {})
+        relations.setdefault(t.r, []).append(_format_grouped_item(t, handles))
+
+    lines = []
+    for head, relations in groups.items():
+        parts = [f"{r}: {', '.join(items)}" for r, items in relations.items()]
+        lines.append(f"{head} | {'; '.join(parts)}")
+    return "\n".join(lines)
+
+
+def format_evidence(
+    triples: List[Triple],
+    evidence_format: Optional[str] = None,
+) -> str:
+    """Format evidence block in the configured format"""
+    evidence_format = evidence_format or settings.PROMPT_EVIDENCE_FORMAT
+    if not triples:
+        return NO_EVIDENCE_TEXT
+    if evidence_format == "grouped":
+        text = format_triples_grouped(triples, citation_handles(triples))
+        return text + "\n"
+    text = "\n".join(format_triple_line(i, t) for i, t in enumerate(triples, 1))
+    return text + "\n"
+
+
+def expand_citation_handles(text: str, handles: Dict[str, str]) -> str:
+    """Replace citation handles in text with their full source ids"""
+    by_handle = {h: source_id for source_id, h in handles.items()}
+    return _HANDLE_PATTERN.sub(
+        lambda m: f"[{by_handle[m.group(1)]}]" if m.group(1) in by_handle else m.group(0),
+        text,
+    )
+
+
+def _evidence_cost(
+    t: Triple,
+    packed: List[Triple],
+    handles: Dict[str, str],
+    evidence_format: str,
+) -> int:
+    """Estimate tokens added by appending one triple to the packed evidence"""
+    if evidence_format != "grouped":
+        # Line numbers are at most a few characters; count the next one
+        return estimate_tokens(format_triple_line(len(packed) + 1, t)) + 1
+
+    if t.source_id and t.source_id not in handles:
+        handles = {**handles, t.source_id: f"S{len(handles) + 1}"}
+    cost = estimate_tokens(_format_grouped_item(t, handles)) + 1
+    if not any(p.h == t.h for p in packed):
+        cost += estimate_tokens(f"{t.h} | ") + 1
+    if not any(p.h == t.h and p.r == t.r for p in packed):
+        cost += estimate_tokens(f"{t.r}: ")
+    return cost
+
+
+def pack_evidence(
+    question: str,
+    triples: List[Triple],
+    token_budget: Optional[int] = None,
+    evidence_format: Optional[str] = None,
+) -> List[Triple]:
+    """
+    Select the evidence that fits into the prompt token budget
+
+    Triples are expected in ranked order (see subgraph.prioritize_triples).
+    After de-duplication they are packed greedily: each triple is kept if
+    its line still fits, otherwise skipped in favour of shorter later ones.
+    """
+    if token_budget is None:
+        token_budget = get_token_budget()
+    evidence_format = evidence_format or settings.PROMPT_EVIDENCE_FORMAT
+
+    overhead = (
+        estimate_tokens(SYSTEM_PROMPT)
+        + estimate_tokens(EVIDENCE_PREAMBLES.get(evidence_format, ""))
+        + estimate_tokens(USER_PROMPT_TEMPLATE.format(question=question, triples_text=""))
+    )
+    remaining = token_budget - overhead
+
+    packed: List[Triple] = []
+    handles: Dict[str, str] = {}
+    for t in dedupe_triples(triples):
+        cost = _evidence_cost(t, packed, handles, evidence_format)
+        if cost > remaining:
+            continue
+        packed.append(t)
+        if t.source_id and t.source_id not in handles:
+            handles[t.source_id] = f"S{len(handles) + 1}"
+        remaining -= cost
+
+    return packed
+
+
+def prefix_messages(evidence_format: str) -> List[Dict[str, str]]:
+    """Static messages shared by every prompt in the given format"""
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "system", "content": EVIDENCE_PREAMBLES.get(evidence_format, EVIDENCE_PREAMBLES["lines"])},
+    ]
+
+
+@lru_cache(maxsize=None)
+def _prefix_hash_for(evidence_format: str) -> str:
+    """Hash of the static prefix, computed once per format"""
+    payload = json.dumps(prefix_messages(evidence_format), ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def build_messages(
+    question: str,
+    triples: List[Triple],
+    evidence_format: Optional[str] = None,
+) -> List[Dict[str, str]]:
+    """
+    Build chat messages for LLM
+
+    Layout is [fixed system prompt, evidence-schema preamble, question and
+    evidence]; only the last message varies between calls.
+    """
+    evidence_format = evidence_format or settings.PROMPT_EVIDENCE_FORMAT
+
+    user_prompt = USER_PROMPT_TEMPLATE.format(
+        question=question,
+        triples_text=format_evidence(triples, evidence_format),
+    )
+
+    return prefix_messages(evidence_format) + [{"role": "user", "content": user_prompt}]
+
+
+def messages_format(messages: List[Dict[str, str]]) -> Optional[str]:
+    """Evidence format whose static prefix precedes the last message, if any"""
+    for evidence_format in EVIDENCE_FORMATS:
+        if messages[:-1] == prefix_messages(evidence_format):
+            return evidence_format
+    return None
+
+
+def prefix_hash(messages: List[Dict[str, str]]) -> str:
+    """
+    Stable hash of every message except the last
+
+    Usable as a provider prompt-cache key: prompts with the same prefix
+    hash differ only in their final user message.
+    """
+    evidence_format = messages_format(messages)
+    if evidence_format is not None:
+        return _prefix_hash_for(evidence_format)
+    payload = json.dumps(messages[:-1], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def render_messages(messages: List[Dict[str, str]]) -> str:
+    """Flatten chat messages into a single prompt string"""
+    return "\n\n".join(m["content"] for m in messages)
 
-请根据上述证据回答问题。"""
 
-    return f"{SYSTEM_PROMPT}\n\n{user_prompt}"
+def build_prompt(
+    question: str,
+    triples: List[Triple],
+    evidence_format: Optional[str] = None,
+) -> str:
+    """Build prompt for LLM as a single string"""
+    return render_messages(build_messages(question, triples, evidence_format))
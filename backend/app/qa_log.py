@@ -0,0 +1,251 @@
+"""
+Compact QA log format and reader
+
+Prompts, evidence sets and answers are stored once in a content-addressed
+blob store next to the log (blobs/<key[:2]>/<key>.json); log lines keep
+only their keys. The static system messages of every prompt share one blob,
+and the question-and-evidence message is not stored at all: it is rebuilt
+from the question and the triples blob, as long as the prompt templates
+are still those it was logged with (prompt_builder.PROMPT_VERSION). A line
+shrinks to the timestamp, question and a few references.
+
+Usage:
+    python -m app.qa_log                 # rehydrated entries as JSONL
+    python -m app.qa_log --raw --tail 5  # stored lines, without rehydration
+"""
+
+import os
+import re
+import sys
+import json
+import gzip
+import hashlib
+import argparse
+import threading
+from collections import deque
+from typing import Optional, List, Dict, Any, Iterator, Union
+
+from app import prompt_builder
+from app.models import Triple
+
+LOG_FORMAT_VERSION = 4
+BLOB_DIR = "blobs"
+
+
+def blob_key(obj: Any) -> str:
+    """Content hash of a JSON-serializable object"""
+    payload = json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class BlobStore:
+    """Write-once JSON blobs addressed by content hash"""
+
+    def __init__(self, root: str, max_known: int = 100000):
+        self.root = root
+        self.max_known = max_known
+        self.known = set()
+        self.lock = threading.Lock()
+        self.stats = {"written": 0, "reused": 0}
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.json")
+
+    def put(self, obj: Any) -> str:
+        """Store obj unless already present; returns its key"""
+        key = blob_key(obj)
+        with self.lock:
+            if key in self.known:
+                self.stats["reused"] += 1
+                return key
+            path = self._path(key)
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp = f"{path}.{os.getpid()}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(obj, f, ensure_ascii=False)
+                os.replace(tmp, path)
+                self.stats["written"] += 1
+            else:
+                self.stats["reused"] += 1
+            if len(self.known) >= self.max_known:
+                # Bound memory; forgotten keys are found on disk again
+                self.known.clear()
+            self.known.add(key)
+        return key
+
+    def get(self, key: str) -> Any:
+        with open(self._path(key), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+
+# Entry fields stored together as one blob each; triples are blobbed on
+# their own so identical evidence dedupes across different questions
+BLOB_GROUPS = {
+    "triples_ref": ("triples",),
+    "retrieval_ref": ("linked_entities", "cypher"),
+    "answer_ref": ("answer", "citations"),
+}
+
+
+def _compact_prompt(prompt: List[Dict[str, str]], store: BlobStore) -> Dict[str, Any]:
+    """
+    Reference to the static prefix blob, plus how to get the last message
+
+    A prompt with a known prefix comes from prompt_builder.build_messages,
+    so its last message is only the question and the logged triples; it is
+    recorded as the evidence format and prompt version needed to rebuild
+    it. Other prompts keep the last message as a blob of its own.
+    """
+    ref = {"prefix": store.put(prompt[:-1])}
+    evidence_format = prompt_builder.messages_format(prompt)
+    if evidence_format is not None:
+        ref["format"] = evidence_format
+        ref["version"] = prompt_builder.PROMPT_VERSION
+    else:
+        ref["last"] = store.put(prompt[-1])
+    return ref
+
+
+def _rehydrate_prompt(
+    entry: Dict[str, Any], prompt_ref: Dict[str, Any], store: BlobStore
+) -> Optional[List[Dict[str, str]]]:
+    """Stored messages, or None when they cannot be rebuilt exactly"""
+    messages = store.get(prompt_ref["prefix"])
+    if "last" in prompt_ref:
+        return messages + [store.get(prompt_ref["last"])]
+    if prompt_ref.get("version") != prompt_builder.PROMPT_VERSION:
+        return None
+    triples = [Triple(**t) for t in entry.get("triples") or []]
+    rebuilt = prompt_builder.build_messages(entry.get("question", ""), triples, prompt_ref["format"])
+    return messages + rebuilt[-1:]
+
+
+def compact_entry(entry: Dict[str, Any], store: BlobStore) -> Dict[str, Any]:
+    """
+    Replace the bulky fields of a log entry with blob references
+
+    A prompt given as chat messages keeps its shared system messages in one
+    blob and, when built by prompt_builder, drops the question-and-evidence
+    message, which rehydration rebuilds; a plain string prompt is one
+    blob. Triples, retrieval details and the answer are stored as one blob
+    each (see BLOB_GROUPS), so repeated evidence adds only a short line.
+    """
+    entry = dict(entry)
+    prompt = entry.pop("prompt", None)
+    if isinstance(prompt, list) and prompt:
+        entry["prompt_ref"] = _compact_prompt(prompt, store)
+    elif prompt:
+        entry["prompt_ref"] = store.put(prompt)
+    for ref, fields in BLOB_GROUPS.items():
+        if any(field in entry for field in fields):
+            entry[ref] = store.put({field: entry.pop(field, None) for field in fields})
+    entry["v"] = LOG_FORMAT_VERSION
+    return entry
+
+
+def rehydrate_entry(entry: Dict[str, Any], store: BlobStore) -> Dict[str, Any]:
+    """
+    Resolve blob references back into the original fields
+
+    Entries in the original inline format are returned unchanged. The
+    prompt is rendered as a single string as before; chat prompts are
+    also returned as messages. A prompt logged under a different
+    prompt_builder.PROMPT_VERSION is not rebuilt: prompt is None and
+    prompt_error says why.
+    """
+    if "v" not in entry:
+        return entry
+    entry = dict(entry)
+    prompt_ref = entry.pop("prompt_ref", None)
+    # Blobs of older versions group fields differently; each blob is a dict
+    # of the fields it holds, so any grouping resolves the same way
+    for ref in (*BLOB_GROUPS, "evidence_ref"):
+        key = entry.pop(ref, None)
+        if key:
+            entry.update(store.get(key))
+
+    if isinstance(prompt_ref, dict):
+        messages = _rehydrate_prompt(entry, prompt_ref, store)
+        if messages is None:
+            entry["prompt"] = None
+            entry["prompt_error"] = (
+                f"logged with prompt version {prompt_ref.get('version')}, "
+                f"current is {prompt_builder.PROMPT_VERSION}; not rebuilt"
+            )
+            return entry
+    elif isinstance(prompt_ref, list):
+        # Version 2: one blob per message
+        messages = [store.get(key) for key in prompt_ref]
+    else:
+        entry["prompt"] = store.get(prompt_ref) if prompt_ref else ""
+        return entry
+    entry["messages"] = messages
+    entry["prompt"] = prompt_builder.render_messages(messages)
+    return entry
+
+
+def log_files(log_dir: str, name: str = "qa_logs.jsonl") -> List[str]:
+    """Rotated files oldest first, then the active file"""
+    base, ext = os.path.splitext(name)
+    pattern = re.compile(rf"^{re.escape(base)}-(\d{{8}}T\d{{6}})(?:-(\d+))?{re.escape(ext)}(\.gz)?$")
+    rotated = []
+    for filename in os.listdir(log_dir) if os.path.isdir(log_dir) else []:
+        match = pattern.match(filename)
+        if match:
+            rotated.append((match.group(1), int(match.group(2) or 0), filename))
+    files = [os.path.join(log_dir, f) for _, _, f in sorted(rotated)]
+    active = os.path.join(log_dir, name)
+    if os.path.exists(active):
+        files.append(active)
+    return files
+
+
+def _open_log(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def read_qa_log(
+    paths: Union[str, List[str]],
+    store: Optional[BlobStore] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate log entries from one or more (optionally gzipped) files
+
+    With a blob store, compact entries are rehydrated; without one they
+    are yielded as stored. Partial trailing lines are skipped.
+    """
+    for path in [paths] if isinstance(paths, str) else paths:
+        with _open_log(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                yield rehydrate_entry(entry, store) if store is not None else entry
+
+
+def main():
+    from app.logging_utils import get_log_dir
+
+    parser = argparse.ArgumentParser(description="Read QA logs")
+    parser.add_argument("--log-dir", default=None, help="Log directory (default: LOG_DIR)")
+    parser.add_argument("--raw", action="store_true", help="Print stored lines without rehydrating")
+    parser.add_argument("--tail", type=int, default=0, help="Only the last N entries")
+    args = parser.parse_args()
+
+    log_dir = args.log_dir or get_log_dir()
+    entries = read_qa_log(log_files(log_dir))
+    if args.tail:
+        entries = deque(entries, maxlen=args.tail)
+    store = None if args.raw else BlobStore(os.path.join(log_dir, BLOB_DIR))
+    for entry in entries:
+        if store is not None:
+            entry = rehydrate_entry(entry, store)
+        sys.stdout.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Indexed SQLite store for QA interactions
+
+Written in batches from the QA log writer thread when LOG_SQLITE is on.
+Timestamp, latency, intent, confidence, answer-cache state and linked
+node ids are indexed, so typical investigations take milliseconds.
+
+Usage:
+    python -m app.qa_store latency --by intent --since 1h
+    python -m app.qa_store node d_001 --since 1d
+    python -m app.qa_store recent --confidence low --min-latency 2000
+    python -m app.qa_store sql "SELECT cache, COUNT(*) FROM qa GROUP BY cache"
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import argparse
+import threading
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Tuple
+
+QA_DB_FILE = "qa_logs.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS qa (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    question TEXT NOT NULL,
+    intent TEXT,
+    confidence TEXT,
+    answered_by TEXT,
+    degraded INTEGER NOT NULL DEFAULT 0,
+    route TEXT,
+    model TEXT,
+    cache TEXT,
+    latency_ms REAL,
+    triples_used INTEGER,
+    answer TEXT,
+    citations TEXT
+);
+CREATE INDEX IF NOT EXISTS qa_ts ON qa (ts);
+CREATE INDEX IF NOT EXISTS qa_latency ON qa (latency_ms);
+CREATE INDEX IF NOT EXISTS qa_intent_ts ON qa (intent, ts);
+CREATE INDEX IF NOT EXISTS qa_confidence_ts ON qa (confidence, ts);
+CREATE INDEX IF NOT EXISTS qa_cache_ts ON qa (cache, ts);
+CREATE TABLE IF NOT EXISTS qa_nodes (
+    qa_id INTEGER NOT NULL REFERENCES qa (id),
+    node_id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS qa_nodes_node ON qa_nodes (node_id, qa_id);
+"""
+
+GROUP_COLUMNS = ("intent", "confidence", "answered_by", "route", "model", "cache")
+
+
+def _timestamp(value: Any) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return time.time()
+
+
+def _row(entry: Dict[str, Any]) -> Tuple:
+    route = entry.get("route") or {}
+    cache = route.get("cache") or ("rules" if entry.get("answered_by") == "rules" else None)
+    return (
+        _timestamp(entry.get("timestamp")),
+        entry.get("question", ""),
+        entry.get("intent"),
+        entry.get("confidence"),
+        entry.get("answered_by"),
+        int(bool(entry.get("degraded"))),
+        route.get("route"),
+        route.get("model"),
+        cache,
+        entry.get("latency_ms"),
+        len(entry.get("triples") or []),
+        entry.get("answer"),
+        json.dumps(entry.get("citations") or [], ensure_ascii=False),
+    )
+
+
+class QAStore:
+    """SQLite (WAL) table of QA interactions with their linked nodes"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.db: Optional[sqlite3.Connection] = None
+        self.lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.db is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(SCHEMA)
+            self.db = db
+        return self.db
+
+    def insert_many(self, entries: List[Dict[str, Any]]):
+        """Insert a batch of log entries in one transaction"""
+        if not entries:
+            return
+        with self.lock:
+            db = self._connect()
+            with db:
+                for entry in entries:
+                    cursor = db.execute(
+                        "INSERT INTO qa (ts, question, intent, confidence, answered_by, degraded, "
+                        "route, model, cache, latency_ms, triples_used, answer, citations) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        _row(entry),
+                    )
+                    node_ids = {e["node_id"] for e in entry.get("linked_entities") or [] if e.get("node_id")}
+                    db.executemany(
+                        "INSERT INTO qa_nodes (qa_id, node_id) VALUES (?, ?)",
+                        [(cursor.lastrowid, node_id) for node_id in sorted(node_ids)],
+                    )
+
+    def query(self, sql: str, params: Tuple = ()) -> List[sqlite3.Row]:
+        with self.lock:
+            db = self._connect()
+            db.row_factory = sqlite3.Row
+            try:
+                return db.execute(sql, params).fetchall()
+            finally:
+                db.row_factory = None
+
+    def close(self):
+        with self.lock:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
+
+    # Queries used by the CLI
+
+    def latency(self, by: Optional[str] = None, since: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Count and latency percentiles, optionally grouped by a column"""
+        if by is not None and by not in GROUP_COLUMNS:
+            raise ValueError(f"cannot group by {by}; choose from {', '.join(GROUP_COLUMNS)}")
+        group = by or "'all'"
+        rows = self.query(
+            f"SELECT {group} AS grp, latency_ms FROM qa "
+            f"WHERE ts >= ? AND latency_ms IS NOT NULL ORDER BY grp, latency_ms",
+            (since or 0,),
+        )
+        groups: Dict[Any, List[float]] = {}
+        for row in rows:
+            groups.setdefault(row["grp"], []).append(row["latency_ms"])
+        return [
+            {
+                by or "group": name,
+                "count": len(values),
+                "p50": _percentile(values, 0.50),
+                "p95": _percentile(values, 0.95),
+                "p99": _percentile(values, 0.99),
+                "max": values[-1],
+            }
+            for name, values in sorted(groups.items(), key=lambda g: -len(g[1]))
+        ]
+
+    def by_node(self, node_id: str, since: Optional[float] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Questions whose linked entities include node_id, newest first"""
+        rows = self.query(
+            "SELECT qa.ts, qa.question, qa.intent, qa.confidence, qa.latency_ms, qa.answer "
+            "FROM qa_nodes JOIN qa ON qa.id = qa_nodes.qa_id "
+            "WHERE qa_nodes.node_id = ? AND qa.ts >= ? ORDER BY qa.ts DESC LIMIT ?",
+            (node_id, since or 0, limit),
+        )
+        return [dict(row) for row in rows]
+
+    def recent(
+        self,
+        since: Optional[float] = None,
+        confidence: Optional[str] = None,
+        min_latency: Optional[float] = None,
+        limit: int = 50,
+    ) -> List[Dict[str, Any]]:
+        """Latest questions, optionally only low-confidence or slow ones"""
+        sql = "SELECT ts, question, intent, confidence, cache, latency_ms, answer FROM qa WHERE ts >= ?"
+        params: List[Any] = [since or 0]
+        if confidence:
+            sql += " AND confidence = ?"
+            params.append(confidence)
+        if min_latency is not None:
+            sql += " AND latency_ms >= ?"
+            params.append(min_latency)
+        sql += " ORDER BY ts DESC LIMIT ?"
+        params.append(limit)
+        return [dict(row) for row in self.query(sql, tuple(params))]
+
+
+def _percentile(ordered: List[float], q: float) -> Optional[float]:
+    if not ordered:
+        return None
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * q))], 1)
+
+
+def parse_since(value: Optional[str]) -> Optional[float]:
+    """Turn "15m", "1h", "2d" or an ISO timestamp into an epoch cutoff"""
+    if not value:
+        return None
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([smhd])", value.strip())
+    if match:
+        seconds = float(match.group(1)) * {"s": 1, "m": 60, "h": 3600, "d": 86400}[match.group(2)]
+        return time.time() - seconds
+    return datetime.fromisoformat(value).timestamp()
+
+
+def _print_rows(rows: List[Dict[str, Any]]):
+    for row in rows:
+        if "ts" in row:
+            row = {**row, "ts": datetime.fromtimestamp(row["ts"]).isoformat(timespec="seconds")}
+        print(json.dumps(row, ensure_ascii=False))
+
+
+def main():
+    from app.logging_utils import get_log_dir
+
+    parser = argparse.ArgumentParser(description="Query the QA log store")
+    parser.add_argument("--db", default=None, help=f"SQLite file (default: LOG_DIR/{QA_DB_FILE})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    latency = commands.add_parser("latency", help="Latency percentiles")
+    latency.add_argument("--by", choices=GROUP_COLUMNS)
+    latency.add_argument("--since", help="e.g. 15m, 1h, 2d or an ISO timestamp")
+
+    node = commands.add_parser("node", help="Questions touching a graph node")
+    node.add_argument("node_id")
+    node.add_argument("--since")
+    node.add_argument("--limit", type=int, default=50)
+
+    recent = commands.add_parser("recent", help="Latest questions")
+    recent.add_argument("--since")
+    recent.add_argument("--confidence", choices=["low", "medium", "high"])
+    recent.add_argument("--min-latency", type=float, help="Only at least this many ms")
+    recent.add_argument("--limit", type=int, default=50)
+
+    sql = commands.add_parser("sql", help="Run a read-only SQL query")
+    sql.add_argument("query")
+
+    args = parser.parse_args()
+    store = QAStore(args.db or os.path.join(get_log_dir(), QA_DB_FILE))
+    start = time.perf_counter()
+
+    try:
+        if args.command == "latency":
+            rows = store.latency(args.by, parse_since(args.since))
+        elif args.command == "node":
+            rows = store.by_node(args.node_id, parse_since(args.since), args.limit)
+        elif args.command == "recent":
+            rows = store.recent(parse_since(args.since), args.confidence, args.min_latency, args.limit)
+        else:
+            store._connect().execute("PRAGMA query_only = ON")
+            rows = [dict(row) for row in store.query(args.query)]
+    except (sqlite3.Error, ValueError) as e:
+        parser.exit(1, f"error: {e}\n")
+
+    _print_rows(rows)
+    print(f"-- {len(rows)} rows in {(time.perf_counter() - start) * 1000:.1f}ms")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
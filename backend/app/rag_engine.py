@@ -1,4 +1,6 @@
-from typing import Dict, Any, List
+import time
+import asyncio
+from typing import Optional, Dict, Any, List, Tuple
 
 from app.models import (
     AskResponse,
@@ -6,23 +8,68 @@ from app.models import (
     DebugInfo,
     Triple,
 )
+from app.config import settings
 from app.neo4j_client import neo4j_client
 from app import entity_linker
 from app import subgraph as subgraph_module
 from app import prompt_builder
-from app.llm_client import llm_client
+from app import answer_rules
+from app import answer_parser
+from app import intent_classifier
+from app.llm_router import model_router
+from app.llm_providers import LLMUnavailableError
 from app import logging_utils
+from app.tracing import tracer
+from app import metrics
+
+DEGRADED_ANSWER = "问答服务暂时不可用，以下仅列出检索到的相关证据，请稍后重试。"
 
 
 async def answer_question(
     question: str,
     hop: int = 2,
     limit: int = 20,
+    priority: str = "interactive",
+) -> AskResponse:
+    """
+    Main RAG orchestration
+
+    Runs under an "ask" trace; stage durations and the trace id are
+    reported in DebugInfo when tracing is enabled.
+    """
+    with tracer.span("ask", priority=priority) as span:
+        response = await _answer_question(question, hop, limit, priority)
+        if span is not None:
+            span.set("answered_by", response.debug.answered_by)
+            response.debug.stages = tracer.stages(span)
+            response.debug.trace_id = span.trace.trace_id
+    metrics.observe_stages(response.debug.stages)
+    metrics.ANSWERS.labels(
+        response.debug.answered_by, response.confidence, str(response.degraded).lower()
+    ).inc()
+    return response
+
+
+async def _answer_question(
+    question: str,
+    hop: int,
+    limit: int,
+    priority: str,
 ) -> AskResponse:
-    """Main RAG orchestration"""
+    start = time.perf_counter()
 
-    # Step 1: Entity linking
-    linked_entities = await entity_linker.link_entities(question)
+    # Step 1: Classify intent to pick the relation types worth fetching
+    with tracer.span("intent", stage="intent") as span:
+        intent, _ = intent_classifier.classify(question)
+        if span is not None:
+            span.set("intent", intent)
+    profile = intent_classifier.get_profile(intent)
+    relations = profile["relations"]
+
+    # Step 2-3: Entity linking overlapped with subgraph retrieval
+    linked_entities, triples = await _link_and_retrieve(
+        question, hop=hop, limit=limit, relations=relations, properties=profile.get("properties")
+    )
 
     if not linked_entities:
         # No entities found - return empty response
@@ -34,58 +81,296 @@ async def answer_question(
                 linked_entities=[],
                 cypher="",
                 triples_used=0,
+                intent=intent,
             ),
         )
 
-    # Step 2: Get node IDs and fetch subgraph
     node_ids = [e["node_id"] for e in linked_entities]
-    raw_triples = await neo4j_client.fetch_subgraph(node_ids, hop=hop, limit=limit)
-
-    # Step 3: Format and prioritize triples
-    triples = subgraph_module.format_triples(raw_triples)
+    cypher = f"MATCH (a)-[r]-(b) WHERE a.node_id IN {node_ids}"
+    if relations:
+        cypher += f" AND type(r) IN {relations}"
     triples = subgraph_module.prioritize_triples(triples, topk=limit)
 
-    # Step 4: Build prompt
-    prompt = prompt_builder.build_prompt(question, triples)
+    # Fast path: eligibility questions the evidence settles skip the LLM
+    with tracer.span("rules", stage="rules"):
+        ruled = answer_rules.evaluate(question, linked_entities, triples)
+    if ruled is not None:
+        return await _rule_response(question, linked_entities, cypher, intent, triples, ruled, start)
+
+    # Step 4: Route to a model and pack evidence into its token budget
+    with tracer.span("prompt", stage="prompt") as span:
+        route, route_reason = model_router.choose(
+            question,
+            intent,
+            entity_count=len(linked_entities),
+            triple_count=len(prompt_builder.dedupe_triples(triples)),
+        )
+        triples = prompt_builder.pack_evidence(
+            question,
+            triples,
+            token_budget=prompt_builder.get_token_budget(model_router.client(route).model),
+        )
+        messages = prompt_builder.build_messages(question, triples)
+        if span is not None:
+            span.set("route", route)
+            span.set("triples", len(triples))
 
     # Step 5: Generate answer
-    answer_text = await llm_client.generate(prompt)
+    degraded = False
+    route_info = None
+    with tracer.span("llm", stage="llm") as span:
+        try:
+            result, route_info = await model_router.complete(
+                route,
+                route_reason,
+                messages,
+                prefix_hash=prompt_builder.prefix_hash(messages),
+                priority=priority,
+            )
+            answer_text = result.text
+        except LLMUnavailableError:
+            # Report the outage explicitly instead of passing an error off as an answer
+            degraded = True
+            answer_text = DEGRADED_ANSWER
+        if span is not None:
+            span.set("degraded", degraded)
+            if route_info is not None:
+                span.set("model", route_info["model"])
+                span.set("cache", route_info["cache"])
+
+    # Step 6-7: Citations and confidence from the answer's own structure
+    with tracer.span("citations", stage="citations"):
+        answer_text, cited_triples, confidence = _cite_and_score(
+            answer_text, triples, linked_entities, degraded
+        )
+        citations = [
+            Citation(
+                triple=f"({t.h}, {t.r}, {t.t})",
+                source_id=t.source_id,
+            )
+            for t in cited_triples
+        ]
+
+    # Step 8: Log the interaction
+    with tracer.span("logging", stage="logging"):
+        await logging_utils.log_question(
+            question=question,
+            linked_entities=linked_entities,
+            cypher=cypher,
+            triples=[t.model_dump() for t in triples],
+            prompt=messages,
+            answer=answer_text,
+            citations=[c.model_dump() for c in citations],
+            intent=intent,
+            confidence=confidence,
+            latency_ms=(time.perf_counter() - start) * 1000,
+            degraded=degraded,
+            route=route_info,
+        )
+
+    return AskResponse(
+        answer=answer_text,
+        citations=citations,
+        confidence=confidence,
+        degraded=degraded,
+        debug=DebugInfo(
+            linked_entities=linked_entities,
+            cypher=cypher,
+            triples_used=len(triples),
+            intent=intent,
+            route=route_info,
+        ),
+    )
+
+
+def _cite_and_score(
+    answer_text: str,
+    triples: List[Triple],
+    linked_entities: List[Dict[str, Any]],
+    degraded: bool,
+) -> Tuple[str, List[Triple], str]:
+    """
+    Derive citations and confidence from the generated answer
 
-    # Step 6: Build citations from top triples
+    A structured answer (结论/引用/需要补充) is re-rendered with full source
+    ids, cites exactly the triples behind its handles and reports its own
+    confidence. Unstructured answers fall back to handles found anywhere in
+    the text, or the top 5 triples, and the evidence heuristic.
+    """
+    if degraded:
+        return answer_text, triples[:5], "low"
+
+    evidence_format = settings.PROMPT_EVIDENCE_FORMAT
+    handles = prompt_builder.citation_handles(triples)
+    parsed = answer_parser.parse_answer(answer_text)
+    if parsed.structured:
+        cited = answer_parser.resolve_references(
+            parsed.references, triples, line_numbers=evidence_format != "grouped"
+        ) or answer_parser.resolve_references(parsed.conclusion, triples)
+        parsed.conclusion = prompt_builder.expand_citation_handles(parsed.conclusion, handles)
+        return (
+            answer_parser.render_answer(parsed, cited),
+            cited,
+            answer_parser.answer_confidence(parsed, cited),
+        )
+
+    cited = answer_parser.resolve_references(answer_text, triples)
+    if evidence_format == "grouped":
+        answer_text = prompt_builder.expand_citation_handles(answer_text, handles)
+    return answer_text, cited or triples[:5], _calculate_confidence(triples, linked_entities)
+
+
+async def _rule_response(
+    question: str,
+    linked_entities: List[Dict[str, Any]],
+    cypher: str,
+    intent: str,
+    triples: List[Triple],
+    ruled: answer_rules.RuleAnswer,
+    start: float,
+) -> AskResponse:
+    """Build and log the response for a rule-decided answer"""
     citations = [
         Citation(
             triple=f"({t.h}, {t.r}, {t.t})",
             source_id=t.source_id,
         )
-        for t in triples[:5]  # Top 5 citations
+        for t in ruled.triples
     ]
 
-    # Step 7: Calculate confidence
-    confidence = _calculate_confidence(triples, linked_entities)
-
-    # Step 8: Log the interaction
-    logging_utils.log_question(
-        question=question,
-        linked_entities=linked_entities,
-        cypher=f"MATCH (a)-[r]-(b) WHERE a.node_id IN {node_ids}",
-        triples=[t.model_dump() for t in triples],
-        prompt=prompt,
-        answer=answer_text,
-        citations=[c.model_dump() for c in citations],
-    )
+    with tracer.span("logging", stage="logging"):
+        await logging_utils.log_question(
+            question=question,
+            linked_entities=linked_entities,
+            cypher=cypher,
+            triples=[t.model_dump() for t in triples],
+            prompt="",
+            answer=ruled.answer,
+            citations=[c.model_dump() for c in citations],
+            intent=intent,
+            confidence="high",
+            latency_ms=(time.perf_counter() - start) * 1000,
+            answered_by="rules",
+        )
 
     return AskResponse(
-        answer=answer_text,
+        answer=ruled.answer,
         citations=citations,
-        confidence=confidence,
+        confidence="high",
         debug=DebugInfo(
             linked_entities=linked_entities,
-            cypher=f"MATCH (a)-[r]-(b) WHERE a.node_id IN {node_ids}",
+            cypher=cypher,
             triples_used=len(triples),
+            answered_by="rules",
+            intent=intent,
         ),
     )
 
 
+async def _expand_entity(
+    node_id: str,
+    hop: int,
+    limit: int,
+    relations: Optional[List[str]] = None,
+    properties: Optional[List[str]] = None,
+) -> List[Triple]:
+    """
+    Fetch and format the subgraph around a single linked entity
+
+    properties are node properties returned as facts ahead of the edges.
+    When relations are given but the entity has none of them and no
+    property facts, the whole neighborhood is fetched instead so a
+    misclassified question still gets evidence.
+    """
+    with tracer.span("expand_entity", node_id=node_id) as span:
+        raw_triples, raw_properties = await asyncio.gather(
+            neo4j_client.fetch_subgraph([node_id], hop=hop, limit=limit, relations=relations),
+            neo4j_client.fetch_node_properties([node_id], properties or []),
+        )
+        if relations and not raw_triples and not raw_properties:
+            raw_triples = await neo4j_client.fetch_subgraph([node_id], hop=hop, limit=limit)
+            if span is not None:
+                span.set("relation_fallback", True)
+        return subgraph_module.format_property_facts(raw_properties) + subgraph_module.format_triples(raw_triples)
+
+
+async def _link_and_retrieve(
+    question: str,
+    hop: int,
+    limit: int,
+    relations: Optional[List[str]] = None,
+    properties: Optional[List[str]] = None,
+) -> Tuple[List[Dict[str, Any]], List[Triple]]:
+    """
+    Link entities and speculatively expand each one as soon as it resolves
+
+    Every new node above SPECULATIVE_MIN_SCORE starts its subgraph fetch while
+    the remaining terms are still being linked. Candidates for an already
+    linked node are merged into it, starting its fetch if the merge raises
+    its score over the threshold; once more than SPECULATIVE_MAX_ENTITIES
+    nodes are in flight the lowest-scored fetch is cancelled (the newest
+    among equal scores) and that node is not fetched again.
+    relations limits each fetch to those relation types and properties adds
+    node property facts (see _expand_entity).
+
+    Returns linked entities sorted by score and the merged, de-duplicated
+    triples of the entities that were kept.
+    """
+    linked_entities: List[Dict[str, Any]] = []
+    fetches: Dict[str, asyncio.Task] = {}
+    dropped = set()  # node ids whose fetch was cancelled
+
+    def _score(node_id: str) -> float:
+        return next(e["score"] for e in linked_entities if e["node_id"] == node_id)
+
+    try:
+        # Fetches started here overlap linking; "retrieval" is only the wait after it
+        with tracer.span("entity_linking", stage="linking"):
+            async for entity in entity_linker.iter_linked_entities(question):
+                node_id = entity["node_id"]
+                previous = next((e["score"] for e in linked_entities if e["node_id"] == node_id), None)
+                entity_linker.merge_linked_entity(linked_entities, entity)
+                score = _score(node_id)
+                # New nodes, and known ones a merge lifted over the threshold
+                raised = previous is None or score > previous
+                if node_id in fetches or node_id in dropped:
+                    continue
+                if not raised or score < settings.SPECULATIVE_MIN_SCORE:
+                    continue
+
+                fetches[node_id] = asyncio.create_task(
+                    _expand_entity(
+                        node_id, hop=hop, limit=limit, relations=relations, properties=properties
+                    )
+                )
+                if len(fetches) > settings.SPECULATIVE_MAX_ENTITIES:
+                    # Newest first, so ties cancel the fetch that just started
+                    weakest = min(reversed(list(fetches)), key=_score)
+                    fetches.pop(weakest).cancel()
+                    dropped.add(weakest)
+
+        linked_entities.sort(key=lambda x: x["score"], reverse=True)
+
+        # Merge per-entity results in score order, dropping duplicate edges
+        triples: List[Triple] = []
+        seen = set()
+        with tracer.span("retrieval", stage="retrieval"):
+            for e in linked_entities:
+                task = fetches.get(e["node_id"])
+                if task is None:
+                    continue
+                for t in await task:
+                    key = (t.h, t.r, t.t, t.source_id)
+                    if key not in seen:
+                        seen.add(key)
+                        triples.append(t)
+    finally:
+        for task in fetches.values():
+            task.cancel()
+
+    return linked_entities, triples
+
+
 def _calculate_confidence(triples: List[Triple], linked_entities: List[Dict[str, Any]]) -> str:
     """Calculate confidence based on evidence"""
     if not triples:
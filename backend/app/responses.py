@@ -0,0 +1,88 @@
+"""
+Fast JSON responses for the hot routes
+
+FastJSONResponse serializes plain dicts with orjson (stdlib json when it
+is not installed) and pydantic models with pydantic-core's own JSON writer.
+Routes that return one skip FastAPI's re-validation of the response
+against response_model. /subgraph builds a plain dict matching
+SubgraphResponse, so no models are constructed at all. The model stays on
+the route for the OpenAPI schema.
+"""
+
+import json
+from typing import Any, List, Dict
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON, converting any pydantic models left in content"""
+    if isinstance(content, BaseModel):
+        # pydantic-core writes JSON directly, without an intermediate dict
+        return content.__pydantic_serializer__.to_json(content)
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with dumps()"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def subgraph_payload(
+    query: str,
+    hop: int,
+    limit: int,
+    linked_entities: List[Dict[str, Any]],
+    raw_triples: List[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """
+    SubgraphResponse as a plain dict, straight from linker and Neo4j rows
+
+    Nothing validates the dict afterwards, so rows are coerced the way the
+    model would require: rows missing a head or tail name are skipped and
+    names and source ids are sent as strings.
+    """
+    node_ids = [e["node_id"] for e in linked_entities]
+    triples = [
+        {
+            "h": str(t["head"]),
+            "r": str(t["relation"]),
+            "t": str(t["tail"]),
+            "source_id": None if t.get("source_id") is None else str(t["source_id"]),
+        }
+        for t in raw_triples
+        if t.get("head") is not None and t.get("tail") is not None
+    ]
+    return {
+        "query": query,
+        "hop": hop,
+        "linked_entities": [
+            {
+                "mention": e.get("mention", ""),
+                "node_id": e["node_id"],
+                "label": e.get("label", ""),
+                "score": float(e.get("score", 0.0)),
+                "name": None,
+            }
+            for e in linked_entities
+        ],
+        "triples": triples,
+        "cypher": f"MATCH (a)-[r]-(b) WHERE a.node_id IN {node_ids} RETURN a,r,b LIMIT {limit}" if node_ids else "",
+        "stats": {"triples": len(triples), "nodes": len(node_ids)},
+    }
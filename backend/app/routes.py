@@ -1,26 +1,31 @@
-from fastapi import APIRouter, Query, HTTPException
+import asyncio
+from fastapi import APIRouter, Query, Header, HTTPException
+from fastapi.responses import PlainTextResponse
 from typing import Optional
 
 from app.models import (
     SubgraphResponse,
-    SubgraphStats,
-    LinkedEntity,
-    Triple,
     AskRequest,
     AskResponse,
-    Citation,
-    DebugInfo,
 )
 from app.config import settings
 from app.neo4j_client import neo4j_client
 from app import entity_linker
 from app import subgraph
 from app import rag_engine
+from app.llm_scheduler import LLMQueueFullError
+from app.llm_client import llm_client
+from app.llm_router import model_router
+from app.tracing import ring_buffer
+from app.loop_monitor import loop_monitor
+from app import profiling
+from app import memory
+from app.responses import FastJSONResponse, subgraph_payload
 
 router = APIRouter()
 
 
-@router.get("/subgraph", response_model=SubgraphResponse)
+@router.get("/subgraph", response_model=SubgraphResponse, response_class=FastJSONResponse)
 async def get_subgraph(
     query: str = Query(..., description="Entity mention to search"),
     hop: int = Query(settings.SUBGRAPH_DEFAULT_HOP, ge=1, le=3),
@@ -30,57 +35,17 @@ async def get_subgraph(
     # Entity linking
     linked_entities = await entity_linker.link_entities(query)
 
-    if not linked_entities:
-        return SubgraphResponse(
-            query=query,
-            hop=hop,
-            linked_entities=[],
-            triples=[],
-            cypher="",
-            stats=SubgraphStats(triples=0, nodes=0),
-        )
-
-    # Get node IDs
-    node_ids = [e["node_id"] for e in linked_entities]
-
     # Fetch subgraph
-    raw_triples = await neo4j_client.fetch_subgraph(node_ids, hop=hop, limit=limit)
-
-    # Format triples
-    triples = [
-        Triple(
-            h=t["head"],
-            r=t["relation"],
-            t=t["tail"],
-            source_id=t.get("source_id"),
-        )
-        for t in raw_triples
-    ]
-
-    # Build response
-    linked = [
-        LinkedEntity(
-            mention=e.get("mention", ""),
-            node_id=e["node_id"],
-            label=e.get("label", ""),
-            score=e.get("score", 0.0),
-        )
-        for e in linked_entities
-    ]
-
-    cypher = f"MATCH (a)-[r]-(b) WHERE a.node_id IN {node_ids} RETURN a,r,b LIMIT {limit}"
+    raw_triples = []
+    if linked_entities:
+        node_ids = [e["node_id"] for e in linked_entities]
+        raw_triples = await neo4j_client.fetch_subgraph(node_ids, hop=hop, limit=limit)
 
-    return SubgraphResponse(
-        query=query,
-        hop=hop,
-        linked_entities=linked,
-        triples=triples,
-        cypher=cypher,
-        stats=SubgraphStats(triples=len(triples), nodes=len(node_ids)),
-    )
+    # Plain dicts, serialized without building and re-validating models
+    return FastJSONResponse(subgraph_payload(query, hop, limit, linked_entities, raw_triples))
 
 
-@router.post("/ask", response_model=AskResponse)
+@router.post("/ask", response_model=AskResponse, response_class=FastJSONResponse)
 async def ask_question(request: AskRequest):
     """Ask a question using GraphRAG"""
     try:
@@ -88,7 +53,84 @@ async def ask_question(request: AskRequest):
             question=request.question,
             hop=request.hop,
             limit=request.limit,
+            priority=request.priority,
         )
-        return result
+        return FastJSONResponse(result)
+    except LLMQueueFullError as e:
+        # Shed load instead of queueing past the LLM rate limits
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/llm/stats")
+async def llm_stats():
+    """Per-route model usage plus provider, scheduler and cache state"""
+    return {
+        "routes": model_router.summary(),
+        "providers": llm_client.describe(),
+        "scheduler": llm_client.scheduler.summary(),
+        "cache": llm_client.cache.summary() if llm_client.cache is not None else None,
+    }
+
+
+@router.get("/traces")
+async def recent_traces(
+    limit: int = Query(20, ge=1, le=200),
+    min_ms: float = Query(0.0, ge=0, description="Only traces at least this slow"),
+    x_profile_token: Optional[str] = Header(None),
+):
+    """Most recent request traces with their spans and stage durations (needs X-Profile-Token)"""
+    if not profiling.is_authorized(x_profile_token):
+        raise HTTPException(status_code=403, detail="profile token required")
+    return {"traces": ring_buffer.recent(limit=limit, min_ms=min_ms)}
+
+
+@router.get("/loop")
+async def event_loop_health(x_profile_token: Optional[str] = Header(None)):
+    """Event loop lag and, with LOOP_BLOCK_DETECT, blocking call sites (needs X-Profile-Token)"""
+    if not profiling.is_authorized(x_profile_token):
+        raise HTTPException(status_code=403, detail="profile token required")
+    return loop_monitor.summary()
+
+
+@router.get("/profiles/{request_id}")
+async def get_profile(
+    request_id: str,
+    format: str = Query("summary", pattern="^(summary|folded)$"),
+    x_profile_token: Optional[str] = Header(None),
+):
+    """Stored request profile as a summary or collapsed stacks (needs X-Profile-Token)"""
+    if not profiling.is_authorized(x_profile_token):
+        raise HTTPException(status_code=403, detail="profile token required")
+    profile = profiling.load_profile(request_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="profile not found")
+    if format == "folded":
+        return PlainTextResponse(profiling.to_folded(profile["stacks"]))
+    stacks = profile.pop("stacks")
+    return {**profile, **profiling.summarize(stacks)}
+
+
+@router.get("/memory")
+async def get_memory(
+    top: int = Query(20, ge=1, le=200),
+    diff: bool = Query(True),
+    group_by: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+    x_profile_token: Optional[str] = Header(None),
+):
+    """Worker memory: RSS, top allocation sites and structure sizes (needs X-Profile-Token)"""
+    if not profiling.is_authorized(x_profile_token):
+        raise HTTPException(status_code=403, detail="profile token required")
+    return await memory.memory_report(top=top, diff=diff, group_by=group_by)
+
+
+@router.post("/memory/baseline")
+async def reset_memory_baseline(x_profile_token: Optional[str] = Header(None)):
+    """Take a new tracemalloc baseline for later diffs (needs X-Profile-Token)"""
+    if not profiling.is_authorized(x_profile_token):
+        raise HTTPException(status_code=403, detail="profile token required")
+    if not memory.tracemalloc.is_tracing():
+        raise HTTPException(status_code=409, detail="tracemalloc is not running (MEMORY_TRACEMALLOC)")
+    await asyncio.to_thread(memory.allocation_tracker.reset_baseline)
+    return {"status": "ok"}
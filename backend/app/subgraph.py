@@ -4,6 +4,7 @@ from app.models import Triple
 # Priority order for relations
 RELATION_PRIORITY = [
     "AGE_RANGE",
+    "WAITING_PERIOD",
     "EXCLUDES",
     "COVERS",
     "TREATS",
@@ -12,30 +13,59 @@ RELATION_PRIORITY = [
 
 
 def format_triples(raw_triples: List[Dict[str, Any]]) -> List[Triple]:
-    """Format raw Neo4j results into Triple objects"""
+    """
+    Format raw Neo4j results into Triple objects
+
+    AGE_RANGE tails become the "min-max" range when the edge or product
+    carries one, so answer_rules can check ages. /subgraph keeps the node
+    name as the tail.
+    """
     triples = []
     for t in raw_triples:
         triples.append(
             Triple(
                 h=t.get("head", ""),
                 r=t.get("relation", ""),
-                t=t.get("tail", ""),
+                t=t.get("age_range") or t.get("tail", ""),
                 source_id=t.get("source_id"),
             )
         )
     return triples
 
 
+# Node properties served as facts: property -> (relation, tail template)
+PROPERTY_FACTS = {
+    "waiting_period_days": ("WAITING_PERIOD", "{}天"),
+}
+
+
+def format_property_facts(rows: List[Dict[str, Any]]) -> List[Triple]:
+    """Format fetch_node_properties rows as (node, relation, value) triples"""
+    triples = []
+    for row in rows:
+        relation, template = PROPERTY_FACTS[row["property"]]
+        triples.append(
+            Triple(
+                h=row.get("head", ""),
+                r=relation,
+                t=template.format(row["value"]),
+                source_id=row.get("source_id"),
+            )
+        )
+    return triples
+
+
 def prioritize_triples(triples: List[Triple], topk: int = 20) -> List[Triple]:
     """
     Prioritize triples by relation type
 
     Priority order:
     1. AGE_RANGE
-    2. EXCLUDES
-    3. COVERS
-    4. TREATS
-    5. PROVIDES
+    2. WAITING_PERIOD
+    3. EXCLUDES
+    4. COVERS
+    5. TREATS
+    6. PROVIDES
     """
     # Sort by priority
     sorted_triples = sorted(
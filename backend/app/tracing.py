@@ -0,0 +1,255 @@
+"""
+Lightweight span tracing for the GraphRAG pipeline
+
+tracer.span() opens a span under the current one (tracked per asyncio task
+through a context variable, so tasks created inside a span inherit it).
+A span without a parent starts a trace; when it ends the whole trace goes
+to the exporters: an in-memory ring buffer served by /api/v1/traces and,
+with TRACE_OTLP_FILE, OTLP/JSON lines written by a background thread.
+Spans given a stage also add their duration to the trace's stage totals,
+which answer_question reports in DebugInfo.
+"""
+
+import os
+import time
+import atexit
+import random
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, List, Dict, Any, Iterator
+
+from app.config import settings
+from app.logging_utils import JsonlLogWriter, get_log_dir
+
+
+class Span:
+    """One timed operation within a trace"""
+
+    __slots__ = (
+        "name", "trace", "span_id", "parent_id", "stage", "attributes",
+        "start_ns", "start_unix_ns", "end_ns", "error",
+    )
+
+    def __init__(self, name: str, trace: "Trace", parent_id: Optional[str], stage: Optional[str], attributes):
+        self.name = name
+        self.trace = trace
+        self.span_id = "%016x" % random.getrandbits(64)
+        self.parent_id = parent_id
+        self.stage = stage
+        self.attributes: Dict[str, Any] = attributes
+        self.start_unix_ns = time.time_ns()
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    def set(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.perf_counter_ns()
+        return (end - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ms": round((self.start_ns - self.trace.root.start_ns) / 1e6, 3),
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class Trace:
+    """Spans sharing one root, plus per-stage duration totals"""
+
+    __slots__ = ("trace_id", "root", "spans", "stages")
+
+    def __init__(self):
+        self.trace_id = "%032x" % random.getrandbits(128)
+        self.root: Optional[Span] = None
+        self.spans: List[Span] = []
+        self.stages: Dict[str, float] = {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.root.name,
+            "start": self.root.start_unix_ns / 1e9,
+            "duration_ms": round(self.root.duration_ms, 3),
+            "stages": {k: round(v, 3) for k, v in self.stages.items()},
+            "spans": [s.to_dict() for s in self.spans],
+        }
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class RingBufferExporter:
+    """Keep the most recent traces in memory"""
+
+    def __init__(self, capacity: int = 200):
+        self.traces: deque = deque(maxlen=capacity)
+
+    def export(self, trace: Trace):
+        self.traces.append(trace)
+
+    def recent(self, limit: int = 20, min_ms: float = 0.0) -> List[Dict[str, Any]]:
+        """Newest traces first, optionally only those slower than min_ms"""
+        result = []
+        for trace in reversed(list(self.traces)):
+            if trace.root.duration_ms >= min_ms:
+                result.append(trace.to_dict())
+                if len(result) >= limit:
+                    break
+        return result
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(v) for v in value]}}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": k, "value": _otlp_value(v)} for k, v in attributes.items() if v is not None]
+
+
+def to_otlp(trace: Trace, service_name: str) -> Dict[str, Any]:
+    """One trace as an OTLP/JSON ExportTraceServiceRequest"""
+    spans = []
+    for span in trace.spans:
+        end_unix_ns = span.start_unix_ns + (span.end_ns - span.start_ns)
+        otlp_span = {
+            "traceId": trace.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(span.start_unix_ns),
+            "endTimeUnixNano": str(end_unix_ns),
+            "attributes": _otlp_attributes(
+                dict(span.attributes, stage=span.stage) if span.stage else span.attributes
+            ),
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+        }
+        if span.parent_id:
+            otlp_span["parentSpanId"] = span.parent_id
+        spans.append(otlp_span)
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": _otlp_attributes({"service.name": service_name})},
+            "scopeSpans": [{"scope": {"name": "app.tracing"}, "spans": spans}],
+        }]
+    }
+
+
+class OtlpJsonExporter:
+    """
+    Append traces as OTLP/JSON lines, one request per trace
+
+    The format matches the OpenTelemetry collector's file exporter, so the
+    file can be replayed into any OTLP backend. Conversion and writing run
+    on the background JSONL writer thread.
+    """
+
+    def __init__(self, path: str, service_name: str):
+        self.writer = JsonlLogWriter(
+            path,
+            max_queue=settings.LOG_QUEUE_SIZE,
+            rotate_bytes=settings.LOG_ROTATE_MAX_MB * 1024 * 1024,
+            compress=settings.LOG_COMPRESS,
+            transform=lambda trace: to_otlp(trace, service_name),
+        )
+
+    def export(self, trace: Trace):
+        self.writer.write(trace)
+
+    def close(self):
+        self.writer.close()
+
+
+class Tracer:
+    """Creates spans and hands finished traces to the exporters"""
+
+    def __init__(self, enabled: bool = True, exporters: Optional[List[Any]] = None):
+        self.enabled = enabled
+        self.exporters = exporters or []
+
+    @contextmanager
+    def span(self, name: str, stage: Optional[str] = None, **attributes) -> Iterator[Optional[Span]]:
+        """Time the enclosed block; yields None when tracing is off"""
+        if not self.enabled:
+            yield None
+            return
+
+        parent = _current_span.get()
+        trace = parent.trace if parent is not None else Trace()
+        span = Span(name, trace, parent.span_id if parent is not None else None, stage, attributes)
+        if parent is None:
+            trace.root = span
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = type(e).__name__
+            raise
+        finally:
+            span.end_ns = time.perf_counter_ns()
+            _current_span.reset(token)
+            trace.spans.append(span)
+            if stage:
+                trace.stages[stage] = trace.stages.get(stage, 0.0) + span.duration_ms
+            if parent is None:
+                self._export(trace)
+
+    def _export(self, trace: Trace):
+        for exporter in self.exporters:
+            try:
+                exporter.export(trace)
+            except Exception:
+                # Tracing must never fail a request
+                pass
+
+    def current_span(self) -> Optional[Span]:
+        return _current_span.get()
+
+    def stages(self, span: Optional[Span]) -> Optional[Dict[str, float]]:
+        """Stage durations of span's trace so far, plus its total, in ms"""
+        if span is None:
+            return None
+        stages = {k: round(v, 1) for k, v in span.trace.stages.items()}
+        stages["total"] = round(span.duration_ms, 1)
+        return stages
+
+    def close(self):
+        """Flush exporters that write in the background"""
+        for exporter in self.exporters:
+            if hasattr(exporter, "close"):
+                exporter.close()
+
+
+def create_tracer() -> Tracer:
+    """Build the tracer and its exporters from settings"""
+    exporters: List[Any] = [RingBufferExporter(settings.TRACE_BUFFER_SIZE)]
+    if settings.TRACE_OTLP_FILE:
+        path = settings.TRACE_OTLP_FILE
+        if not os.path.isabs(path):
+            path = os.path.join(get_log_dir(), path)
+        exporters.append(OtlpJsonExporter(path, settings.TRACE_SERVICE_NAME))
+    tracer = Tracer(settings.TRACING_ENABLED, exporters)
+    # Scripts may never run the app lifespan; flush on exit anyway
+    atexit.register(tracer.close)
+    return tracer
+
+
+tracer = create_tracer()
+ring_buffer: RingBufferExporter = tracer.exporters[0]
@@ -0,0 +1,82 @@
+import pytest
+
+from app.answer_parser import SECTION_LABELS, StructuredAnswerParser, parse_answer
+
+
+def test_sections_on_separate_lines():
+    answer = parse_answer("结论：可以报销。\n引用：[S1][S2]\n需要补充：无")
+    assert answer.structured
+    assert answer.conclusion == "可以报销。"
+    assert answer.references == "[S1][S2]"
+    assert answer.missing == ""
+
+
+def test_sections_on_one_line_with_markdown():
+    answer = parse_answer("**结论**: 不在保障范围内 **依据**：S3 **需要补充**：既往病史")
+    assert answer.conclusion == "不在保障范围内"
+    assert answer.references == "S3"
+    assert answer.missing == "既往病史"
+
+
+def test_text_before_first_label_is_conclusion():
+    answer = parse_answer("根据证据，\n引用：S1")
+    assert answer.conclusion == "根据证据，"
+    assert answer.references == "S1"
+
+
+def test_unstructured_answer():
+    answer = parse_answer("  只有一句话。 ")
+    assert not answer.structured
+    assert answer.conclusion == "只有一句话。"
+
+
+STREAMED_ANSWERS = [
+    "结论：XX医疗险可以报销高血压住院费用。\n引用：S1, S2\n需要补充：既往病史",
+    "**结论**: 不在保障范围内 **依据**：S3 **需要补充**：投保年龄",
+    "- 结论： 等待期为90天\n- 引用： S2\n- 需要补充： 首次投保日期",
+]
+
+
+def _is_prefix(partial: str, final: str) -> bool:
+    return final.startswith(partial)
+
+
+@pytest.mark.parametrize("text", STREAMED_ANSWERS)
+def test_partial_sections_only_grow_at_every_split(text):
+    final = parse_answer(text)
+    for i in range(len(text) + 1):
+        partial = parse_answer(text[:i], final=False)
+        assert _is_prefix(partial.conclusion, final.conclusion), (i, partial.conclusion)
+        assert _is_prefix(partial.references, final.references), (i, partial.references)
+        assert _is_prefix(partial.missing, final.missing), (i, partial.missing)
+
+
+@pytest.mark.parametrize("text", STREAMED_ANSWERS)
+def test_parser_fed_in_chunks_matches_one_shot_parse(text):
+    for size in (1, 2, 3, 5, 7):
+        parser = StructuredAnswerParser()
+        for start in range(0, len(text), size):
+            parser.feed(text[start:start + size])
+            partial = parser.partial()
+            for label in SECTION_LABELS:
+                assert label not in partial.conclusion + partial.references + partial.missing
+        result = parser.result()
+        expected = parse_answer(text)
+        assert (result.conclusion, result.references, result.missing) == (
+            expected.conclusion, expected.references, expected.missing
+        )
+
+
+def test_partial_holds_back_label_waiting_for_colon():
+    parser = StructuredAnswerParser()
+    for chunk in ("结论：可以报销。\n", "**需要", "补充**"):
+        parser.feed(chunk)
+    assert parser.partial().conclusion == "可以报销。"
+    parser.feed("：既往病史")
+    assert parser.partial().missing == "既往病史"
+
+
+def test_final_parse_keeps_trailing_label_text():
+    # Once the stream has ended a trailing word is content, not a label
+    assert parse_answer("结论：需要", final=True).conclusion == "需要"
+    assert parse_answer("结论：需要", final=False).conclusion == ""
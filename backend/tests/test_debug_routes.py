@@ -0,0 +1,34 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app import routes
+from app.config import settings
+
+
+def _get(path: str, token=None) -> httpx.Response:
+    app = FastAPI()
+    app.include_router(routes.router, prefix="/api/v1")
+    headers = {"X-Profile-Token": token} if token else {}
+
+    async def get():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.get(path, headers=headers)
+
+    return asyncio.run(get())
+
+
+@pytest.mark.parametrize("path", ["/api/v1/traces", "/api/v1/loop"])
+def test_debug_endpoint_needs_profile_token(monkeypatch, path):
+    monkeypatch.setattr(settings, "PROFILE_TOKEN", "secret")
+    assert _get(path).status_code == 403
+    assert _get(path, "wrong").status_code == 403
+    assert _get(path, "secret").status_code == 200
+
+
+@pytest.mark.parametrize("path", ["/api/v1/traces", "/api/v1/loop"])
+def test_debug_endpoint_is_closed_without_profile_token(monkeypatch, path):
+    monkeypatch.setattr(settings, "PROFILE_TOKEN", "")
+    assert _get(path, "anything").status_code == 403
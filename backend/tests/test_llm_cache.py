@@ -0,0 +1,54 @@
+import asyncio
+
+from app.llm_cache import LLMResponseCache, hash_messages, make_cache_key
+from app.llm_client import LLMClient
+from app.llm_scheduler import LLMScheduler
+
+PROMPT = [{"role": "user", "content": "XX医疗险保高血压吗"}]
+
+
+def _client(cache, *providers):
+    configs = [
+        {"provider": "mock", "name": name, "model": model, "temperature": temperature}
+        for name, model, temperature in providers
+    ]
+    return LLMClient(configs, cache=cache, scheduler=LLMScheduler())
+
+
+def test_hit_reports_provider_and_model_stored_with_entry():
+    cache = LLMResponseCache()
+    key = make_cache_key("fallback", "small", 0, hash_messages(PROMPT))
+    asyncio.run(cache.put(key, "fallback", "small", "结论：可以。"))
+    client = _client(cache, ("primary", "big", 0), ("fallback", "small", 0))
+
+    result = asyncio.run(client.complete(PROMPT))
+    assert (result.text, result.provider, result.model, result.cache) == ("结论：可以。", "fallback", "small", "memory")
+
+
+def test_disk_hit_reports_stored_provider_and_model(tmp_path):
+    path = str(tmp_path / "llm_cache.sqlite3")
+    key = make_cache_key("primary", "big", 0, hash_messages(PROMPT))
+    asyncio.run(LLMResponseCache(path).put(key, "primary", "big", "结论：可以。"))
+
+    cached, tier = asyncio.run(LLMResponseCache(path).get([key]))
+    assert tier == "disk"
+    assert (cached.answer, cached.provider, cached.model) == ("结论：可以。", "primary", "big")
+
+
+def test_default_temperature_is_never_cached():
+    cache = LLMResponseCache()
+    client = _client(cache, ("primary", "big", None))
+
+    first = asyncio.run(client.complete(PROMPT))
+    second = asyncio.run(client.complete(PROMPT))
+    assert first.cache == second.cache == "off"
+    assert not cache.memory
+
+
+def test_zero_temperature_is_cached():
+    cache = LLMResponseCache()
+    client = _client(cache, ("primary", "big", 0))
+
+    assert asyncio.run(client.complete(PROMPT)).cache == "miss"
+    second = asyncio.run(client.complete(PROMPT))
+    assert (second.provider, second.model, second.cache) == ("primary", "big", "memory")
@@ -0,0 +1,37 @@
+from app.llm_client import LLMClient
+from app.llm_scheduler import LLMScheduler
+
+
+def _client(*providers, scheduler=None):
+    configs = [
+        {"provider": "openai_compatible", "name": name, "model": model, "base_url": base_url, "api_key": "k"}
+        for name, model, base_url in providers
+    ]
+    return LLMClient(configs, cache=None, scheduler=scheduler or LLMScheduler())
+
+
+def test_same_endpoint_and_model_share_health():
+    large = _client(("primary", "big", "http://llm/v1"))
+    small = _client(("fallback", "big", "http://llm/v1/"), scheduler=large.scheduler)
+    small.share_endpoint_health(large)
+
+    assert small.providers[0].breaker is large.providers[0].breaker
+    assert small.providers[0].stats is large.providers[0].stats
+
+
+def test_other_model_on_same_base_url_keeps_its_own_breaker():
+    large = _client(("primary", "big", "http://llm/v1"))
+    small = _client(("primary", "small", "http://llm/v1"))
+    small.share_endpoint_health(large)
+
+    assert small.providers[0].breaker is not large.providers[0].breaker
+    for _ in range(large.providers[0].breaker.failure_threshold):
+        small.providers[0].breaker.record_failure()
+    assert large.providers[0].breaker.available()
+
+
+def test_standin_providers_never_collide_before_connect():
+    configs = [{"provider": "standin", "name": "standin", "model": "m", "profile": "instant"}] * 2
+    client = LLMClient(configs, cache=None, scheduler=LLMScheduler())
+    first, second = client.providers
+    assert first.endpoint != second.endpoint
@@ -0,0 +1,62 @@
+import asyncio
+import time
+
+from app.llm_client import LLMClient
+from app.llm_scheduler import LLMScheduler
+from app.llm_standin import LatencyProfile, StandinServer
+
+CONCURRENCY = 20
+DELAY = 0.3  # seconds per generation
+MAX_LAG = 0.1  # seconds the loop may fall behind
+
+
+async def _measure_lag(stop: asyncio.Event, interval: float, samples: list):
+    """Record how late each periodic wake-up is"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        samples.append(loop.time() - expected)
+
+
+async def _generate_concurrently():
+    server = StandinServer(LatencyProfile(ttft_ms=DELAY * 1000, per_token_ms=0, jitter=0, output_tokens=2))
+    await server.start()
+    # Admit every call at once, so only the transport could serialize them
+    client = LLMClient(
+        [{
+            "provider": "openai_compatible",
+            "name": "check",
+            "model": "standin",
+            "base_url": server.base_url,
+            "api_key": "check",
+        }],
+        scheduler=LLMScheduler(max_in_flight=CONCURRENCY),
+    )
+    client.cache = None  # every generation must reach the server
+    await client.connect()
+
+    stop = asyncio.Event()
+    samples = []
+    monitor = asyncio.create_task(_measure_lag(stop, 0.01, samples))
+    try:
+        start = time.perf_counter()
+        answers = await asyncio.gather(*(client.generate("ping") for _ in range(CONCURRENCY)))
+        elapsed = time.perf_counter() - start
+    finally:
+        stop.set()
+        await monitor
+        await client.close()
+        await server.stop()
+    return answers, elapsed, samples
+
+
+def test_generation_keeps_event_loop_responsive():
+    answers, elapsed, samples = asyncio.run(_generate_concurrently())
+
+    assert len(answers) == CONCURRENCY
+    assert all(answers)
+    # Concurrent generations overlap instead of queueing behind each other
+    assert elapsed < DELAY * 2, f"{CONCURRENCY} generations of {DELAY}s took {elapsed:.2f}s"
+    assert samples
+    assert max(samples) < MAX_LAG, f"event loop lagged {max(samples) * 1000:.0f}ms"
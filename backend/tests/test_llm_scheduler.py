@@ -0,0 +1,192 @@
+import asyncio
+
+import pytest
+
+from app import llm_scheduler
+from app.llm_scheduler import TokenBucket, LLMScheduler, LLMQueueFullError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(llm_scheduler.time, "monotonic", clock)
+    return clock
+
+
+async def _hold(scheduler, priority, order, release):
+    async with scheduler.slot(priority):
+        order.append(priority)
+        await release.wait()
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_token_bucket_unlimited():
+    bucket = TokenBucket(0)
+    bucket.take(1000)
+    assert bucket.wait_time(1000) == 0.0
+
+
+def test_token_bucket_refills_over_time(clock):
+    bucket = TokenBucket(60)  # one per second
+    bucket.take(60)
+    assert bucket.wait_time(1) == pytest.approx(1.0)
+    clock.now += 0.5
+    assert bucket.wait_time(1) == pytest.approx(0.5)
+    clock.now += 100
+    assert bucket.wait_time(1) == 0.0
+    assert bucket.tokens == 60  # capped at capacity
+
+
+def test_token_bucket_caps_request_at_capacity(clock):
+    bucket = TokenBucket(60)
+    # A request larger than the bucket waits for a full bucket, not forever
+    assert bucket.wait_time(500) == 0.0
+
+
+def test_slot_admits_up_to_max_in_flight():
+    async def main():
+        scheduler = LLMScheduler(max_in_flight=1)
+        order, release = [], asyncio.Event()
+        first = asyncio.create_task(_hold(scheduler, "interactive", order, release))
+        second = asyncio.create_task(_hold(scheduler, "interactive", order, release))
+        await _settle()
+        assert order == ["interactive"]
+        assert scheduler.in_flight == 1
+        assert scheduler.depth["interactive"] == 1
+
+        release.set()
+        await asyncio.gather(first, second)
+        assert order == ["interactive", "interactive"]
+        assert scheduler.in_flight == 0
+        assert scheduler.depth["interactive"] == 0
+
+    asyncio.run(main())
+
+
+def test_interactive_served_before_earlier_batch():
+    async def main():
+        scheduler = LLMScheduler(max_in_flight=1, interactive_reserve=0)
+        order, release = [], asyncio.Event()
+        holder = asyncio.create_task(_hold(scheduler, "interactive", order, release))
+        await _settle()
+        batch = asyncio.create_task(_hold(scheduler, "batch", order, release))
+        await _settle()
+        interactive = asyncio.create_task(_hold(scheduler, "interactive", order, release))
+        await _settle()
+
+        release.set()
+        await asyncio.gather(holder, batch, interactive)
+        assert order == ["interactive", "interactive", "batch"]
+
+    asyncio.run(main())
+
+
+def test_batch_leaves_interactive_reserve():
+    async def main():
+        scheduler = LLMScheduler(max_in_flight=3, interactive_reserve=2)
+        order, release = [], asyncio.Event()
+        batch = [asyncio.create_task(_hold(scheduler, "batch", order, release)) for _ in range(2)]
+        await _settle()
+        assert order == ["batch"]
+        assert scheduler.depth["batch"] == 1
+
+        interactive = asyncio.create_task(_hold(scheduler, "interactive", order, release))
+        await _settle()
+        assert order == ["batch", "interactive"]
+
+        release.set()
+        await asyncio.gather(*batch, interactive)
+
+    asyncio.run(main())
+
+
+def test_full_queue_rejects():
+    async def main():
+        scheduler = LLMScheduler(max_in_flight=1, max_queue={"interactive": 1})
+        order, release = [], asyncio.Event()
+        holder = asyncio.create_task(_hold(scheduler, "interactive", order, release))
+        queued = asyncio.create_task(_hold(scheduler, "interactive", order, release))
+        await _settle()
+
+        with pytest.raises(LLMQueueFullError):
+            async with scheduler.slot("interactive"):
+                pass
+        assert scheduler.rejected["interactive"] == 1
+
+        release.set()
+        await asyncio.gather(holder, queued)
+
+    asyncio.run(main())
+
+
+def test_cancelled_waiter_is_uncounted_at_once():
+    async def main():
+        scheduler = LLMScheduler(max_in_flight=1, max_queue={"interactive": 1})
+        order, release = [], asyncio.Event()
+        holder = asyncio.create_task(_hold(scheduler, "interactive", order, release))
+        queued = asyncio.create_task(_hold(scheduler, "interactive", order, release))
+        await _settle()
+        assert scheduler.depth["interactive"] == 1
+
+        queued.cancel()
+        await _settle()
+        # The cancelled waiter is still in the heap, but no longer fills the queue
+        assert scheduler.depth["interactive"] == 0
+        replacement = asyncio.create_task(_hold(scheduler, "interactive", order, release))
+        await _settle()
+        assert scheduler.rejected["interactive"] == 0
+
+        release.set()
+        await asyncio.gather(holder, replacement)
+        assert queued.cancelled()
+        assert order == ["interactive", "interactive"]
+        assert scheduler.depth["interactive"] == 0
+        assert scheduler.in_flight == 0
+        assert not scheduler.heap
+
+    asyncio.run(main())
+
+
+def test_cancel_after_grant_releases_slot():
+    async def main():
+        scheduler = LLMScheduler(max_in_flight=1)
+        order, release = [], asyncio.Event()
+        holder = asyncio.create_task(_hold(scheduler, "interactive", order, release))
+        queued = asyncio.create_task(_hold(scheduler, "interactive", order, release))
+        await _settle()
+
+        # Release the holder and cancel the next waiter before it resumes
+        release.set()
+        await holder
+        queued.cancel()
+        await asyncio.gather(queued, return_exceptions=True)
+        assert scheduler.in_flight == 0
+        assert scheduler.depth["interactive"] == 0
+
+    asyncio.run(main())
+
+
+def test_hedge_counts_in_flight_and_charges_buckets(clock):
+    async def main():
+        scheduler = LLMScheduler(max_in_flight=2, requests_per_minute=60, tokens_per_minute=600)
+        async with scheduler.slot("interactive", tokens=100):
+            with scheduler.hedge(tokens=100):
+                assert scheduler.in_flight == 2
+            assert scheduler.in_flight == 1
+        assert scheduler.in_flight == 0
+        assert scheduler.requests.tokens == 58
+        assert scheduler.tokens.tokens == 400
+
+    asyncio.run(main())
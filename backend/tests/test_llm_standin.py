@@ -0,0 +1,25 @@
+import pytest
+
+from app.answer_parser import SECTION_LABELS, parse_answer
+from app.llm_standin import LATENCY_PROFILES, STANDIN_ANSWER, _answer_tokens
+
+LENGTHS = sorted({p.output_tokens for p in LATENCY_PROFILES.values()} | {1, len(STANDIN_ANSWER), 500})
+
+
+@pytest.mark.parametrize("n", LENGTHS)
+def test_answer_keeps_labels_whole(n):
+    text = "".join(_answer_tokens(n))
+    for label in SECTION_LABELS:
+        assert text.count(label) <= 1
+    answer = parse_answer(text)
+    assert answer.structured
+    assert answer.conclusion.endswith("无法明确判断。")
+
+
+@pytest.mark.parametrize("n", LENGTHS)
+def test_answer_ends_on_a_line_of_the_template(n):
+    text = "".join(_answer_tokens(n))
+    assert text.split("\n")[-1] in STANDIN_ANSWER.split("\n")
+    if n >= len(STANDIN_ANSWER):
+        assert len(text) == n
+        assert text.endswith(STANDIN_ANSWER)
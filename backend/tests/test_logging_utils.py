@@ -0,0 +1,35 @@
+import asyncio
+
+from app.logging_utils import JsonlLogWriter
+from app.qa_log import log_files, read_qa_log
+
+
+def test_writes_every_entry_in_order(tmp_path):
+    writer = JsonlLogWriter(str(tmp_path / "qa_logs.jsonl"), batch_size=7)
+    for i in range(50):
+        assert writer.write({"i": i})
+    writer.close()
+
+    assert [e["i"] for e in read_qa_log(log_files(str(tmp_path)))] == list(range(50))
+    assert writer.stats["written"] == 50
+
+
+def test_rotates_by_size_and_compresses(tmp_path):
+    writer = JsonlLogWriter(str(tmp_path / "qa_logs.jsonl"), batch_size=1, rotate_bytes=200, compress=True)
+    for i in range(30):
+        writer.write({"i": i, "pad": "x" * 20})
+    writer.close()
+
+    files = log_files(str(tmp_path))
+    assert writer.stats["rotations"] >= 1
+    assert all(f.endswith(".gz") for f in files[:-1])
+    assert [e["i"] for e in read_qa_log(files)] == list(range(30))
+
+
+def test_drop_policy_counts_overflow(tmp_path):
+    writer = JsonlLogWriter(str(tmp_path / "qa_logs.jsonl"), max_queue=1)
+    writer.thread = object()  # no writer thread, so the queue stays full
+    assert writer.write({"i": 0})
+    assert not writer.write({"i": 1})
+    assert not asyncio.run(writer.write_async({"i": 2}))
+    assert writer.stats["dropped"] == 2
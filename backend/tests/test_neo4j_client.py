@@ -0,0 +1,55 @@
+import asyncio
+
+from app.metrics import NEO4J_ERRORS, NEO4J_LATENCY
+from app.neo4j_client import Neo4jClient
+
+
+class _Result:
+    async def data(self):
+        return [{"n": 1}]
+
+
+class _Session:
+    def __init__(self, fail: bool):
+        self.fail = fail
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def run(self, query, **params):
+        if self.fail:
+            raise ConnectionError("unreachable")
+        return _Result()
+
+
+class _Driver:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+
+    def session(self):
+        return _Session(self.fail)
+
+
+def _client(fail: bool) -> Neo4jClient:
+    client = Neo4jClient()
+    client.driver = _Driver(fail)
+    return client
+
+
+def test_health_check_is_timed_like_other_queries():
+    before = sum(NEO4J_LATENCY.labels("health_check").counts)
+    assert asyncio.run(_client(fail=False).health_check())
+    assert sum(NEO4J_LATENCY.labels("health_check").counts) == before + 1
+
+
+def test_failed_health_check_counts_as_error():
+    before = NEO4J_ERRORS.labels("health_check").value
+    assert not asyncio.run(_client(fail=True).health_check())
+    assert NEO4J_ERRORS.labels("health_check").value == before + 1
+
+
+def test_health_check_without_driver():
+    assert not asyncio.run(Neo4jClient().health_check())
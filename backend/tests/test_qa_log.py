@@ -0,0 +1,67 @@
+from app import prompt_builder
+from app.models import Triple
+from app.qa_log import BlobStore, compact_entry, rehydrate_entry
+
+TRIPLES = [
+    Triple(h="XX医疗险", r="COVERS", t="高血压", source_id="clause_08"),
+    Triple(h="XX医疗险", r="AGE_RANGE", t="18-60", source_id="clause_02"),
+]
+
+
+def _entry(question: str, triples=TRIPLES, prompt=None):
+    return {
+        "timestamp": "2026-10-19T12:00:00",
+        "question": question,
+        "linked_entities": [{"mention": question[:4], "node_id": "p_002", "score": 1.0}],
+        "cypher": "MATCH (a)-[r]-(b) RETURN a,r,b",
+        "triples": [t.model_dump() for t in triples],
+        "prompt": prompt if prompt is not None else prompt_builder.build_messages(question, triples),
+        "answer": "结论：可以。\n引用：S1\n需要补充：无",
+        "citations": [],
+    }
+
+
+def test_chat_prompt_round_trips_without_storing_last_message(tmp_path):
+    store = BlobStore(str(tmp_path))
+    entry = _entry("XX医疗险保高血压吗")
+    compact = compact_entry(entry, store)
+
+    assert "last" not in compact["prompt_ref"]
+    restored = rehydrate_entry(compact, store)
+    assert restored["messages"] == entry["prompt"]
+    assert restored["prompt"] == prompt_builder.render_messages(entry["prompt"])
+    for field in ("triples", "linked_entities", "cypher", "answer", "citations"):
+        assert restored[field] == entry[field]
+
+
+def test_identical_evidence_is_one_blob(tmp_path):
+    store = BlobStore(str(tmp_path))
+    first = compact_entry(_entry("XX医疗险保高血压吗"), store)
+    second = compact_entry(_entry("高血压住院XX医疗险能报吗"), store)
+    assert first["triples_ref"] == second["triples_ref"]
+    assert first["retrieval_ref"] != second["retrieval_ref"]
+
+
+def test_prompt_from_other_version_is_not_rebuilt(tmp_path):
+    store = BlobStore(str(tmp_path))
+    compact = compact_entry(_entry("XX医疗险保高血压吗"), store)
+    compact["prompt_ref"]["version"] = "0-00000000"
+
+    restored = rehydrate_entry(compact, store)
+    assert restored["prompt"] is None
+    assert "messages" not in restored
+    assert "0-00000000" in restored["prompt_error"]
+
+
+def test_other_chat_prompts_keep_last_message(tmp_path):
+    store = BlobStore(str(tmp_path))
+    prompt = [{"role": "system", "content": "自定义"}, {"role": "user", "content": "问题"}]
+    compact = compact_entry(_entry("问题", prompt=prompt), store)
+
+    assert "last" in compact["prompt_ref"]
+    assert rehydrate_entry(compact, store)["messages"] == prompt
+
+
+def test_inline_entries_pass_through(tmp_path):
+    entry = {"question": "q", "prompt": "p", "triples": []}
+    assert rehydrate_entry(entry, BlobStore(str(tmp_path))) == entry
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from app import rag_engine, entity_linker
+from app.config import settings
+from app.models import Triple
+
+
+@pytest.fixture
+def linker(monkeypatch):
+    """Feed _link_and_retrieve a fixed stream of linked entities"""
+    started, cancelled = [], []
+    stream = []
+
+    async def fake_iter(question):
+        for entity in stream:
+            yield dict(entity, mention=entity["node_id"], label="L")
+            await asyncio.sleep(0)
+
+    async def fetch(node_id):
+        try:
+            await asyncio.sleep(0.01)
+        except asyncio.CancelledError:
+            cancelled.append(node_id)
+            raise
+        return [Triple(h=node_id, r="COVERS", t="x", source_id=node_id)]
+
+    def fake_expand(node_id, hop, limit, relations=None, properties=None):
+        # Counted when the fetch is created; a task cancelled before it
+        # first runs never enters fetch()
+        started.append(node_id)
+        return fetch(node_id)
+
+    monkeypatch.setattr(entity_linker, "iter_linked_entities", fake_iter)
+    monkeypatch.setattr(rag_engine, "_expand_entity", fake_expand)
+    monkeypatch.setattr(settings, "SPECULATIVE_MIN_SCORE", 0.5)
+    monkeypatch.setattr(settings, "SPECULATIVE_MAX_ENTITIES", 2)
+
+    def run(*entities):
+        stream[:] = [{"node_id": node_id, "score": score} for node_id, score in entities]
+        _, triples = asyncio.run(rag_engine._link_and_retrieve("q", 2, 20))
+        return [t.h for t in triples], started, cancelled
+
+    return run
+
+
+def test_merge_over_threshold_starts_fetch(linker):
+    fetched, started, _ = linker(("a", 0.3), ("a", 0.9), ("b", 0.2))
+    assert started == ["a"]
+    assert fetched == ["a"]
+
+
+def test_tie_cancels_newest_fetch(linker):
+    # Exact-name matches all score 1.0
+    fetched, started, cancelled = linker(("a", 1.0), ("b", 1.0), ("c", 1.0))
+    assert started == ["a", "b", "c"]
+    assert "a" not in cancelled and "b" not in cancelled
+    assert fetched == ["a", "b"]
+
+
+def test_cancelled_node_is_not_fetched_again(linker):
+    fetched, started, _ = linker(("a", 0.9), ("b", 0.9), ("c", 0.6), ("c", 0.95))
+    assert started == ["a", "b", "c"]
+    assert fetched == ["a", "b"]
@@ -191,8 +191,9 @@ class EntityRequest(BaseModel):
     entity_name: str
 
 
+# 同步 Neo4j 驱动 / requests 调用会阻塞事件循环，接口声明为普通函数，由 FastAPI 线程池执行
 @app.post("/subgraph", response_model=List[Dict])
-async def api_subgraph(request: EntityRequest):
+def api_subgraph(request: EntityRequest):
     """POST /subgraph - 图谱三元组查询接口"""
     try:
         return get_subgraph(request.entity_name, return_json=True)
@@ -477,8 +477,9 @@ class EntityRequest(BaseModel):
     entity_name: str
 
 
+# 同步 Neo4j 驱动 / requests 调用会阻塞事件循环，接口声明为普通函数，由 FastAPI 线程池执行
 @app.post("/subgraph", response_model=List[Dict])
-async def api_subgraph(request: EntityRequest):
+def api_subgraph(request: EntityRequest):
     """POST /subgraph - 图谱三元组查询接口"""
     try:
         return get_subgraph(request.entity_name, return_json=True)
@@ -494,8 +495,9 @@ class ChatRequest(BaseModel):
     limit: int = 20
 
 
+# 同步 Neo4j 驱动 / requests 调用会阻塞事件循环，接口声明为普通函数，由 FastAPI 线程池执行
 @app.post("/api/v1/chat")
-async def api_chat(request: ChatRequest):
+def api_chat(request: ChatRequest):
     """POST /api/v1/chat - 完整 GraphRAG 问答接口"""
     try:
         # 1. 提取实体
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Benchmark response building and serialization for /subgraph and /ask
+
+Mounts the same synthetic payload on two throwaway routes: the model path
+(nested pydantic models returned through response_model, as the routes
+used to do) and the fast path (a FastJSONResponse holding plain dicts for
+/subgraph, and the unrevalidated AskResponse for /ask). Each is
+called straight through ASGI, so the numbers are FastAPI's per-response
+overhead without Neo4j, the LLM or a network. Bodies of both paths are
+checked to decode to the same JSON, and to validate against the route's
+response model, since the fast path is never validated by FastAPI.
+
+Usage:
+    python scripts/bench_response_serialization.py
+    python scripts/bench_response_serialization.py --triples 20 100 --iterations 5000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from typing import List, Dict, Any, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from fastapi import FastAPI  # noqa: E402
+from pydantic import ValidationError  # noqa: E402
+
+from app.models import (  # noqa: E402
+    SubgraphResponse,
+    SubgraphStats,
+    LinkedEntity,
+    Triple,
+    AskResponse,
+    Citation,
+    DebugInfo,
+)
+from app.responses import FastJSONResponse, subgraph_payload, orjson  # noqa: E402
+
+RESPONSE_MODELS = {"subgraph": SubgraphResponse, "ask": AskResponse}
+
+
+def synthetic_rows(n_triples: int) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Linker results and Neo4j rows shaped like the real ones"""
+    linked = [
+        {"mention": "职工医保", "node_id": f"N{i}", "label": "Insurance", "score": 0.92}
+        for i in range(3)
+    ]
+    rows = [
+        {
+            "head": f"城镇职工基本医疗保险{i % 7}",
+            "relation": "报销比例",
+            "tail": f"三级医院住院费用报销{60 + i % 30}%",
+            "source_id": f"policy_2024_{i:04d}#p{i % 12}",
+        }
+        for i in range(n_triples)
+    ]
+    return linked, rows
+
+
+def subgraph_models(query: str, hop: int, limit: int, linked, rows) -> SubgraphResponse:
+    """SubgraphResponse built the way /subgraph used to build it"""
+    node_ids = [e["node_id"] for e in linked]
+    triples = [Triple(h=t["head"], r=t["relation"], t=t["tail"], source_id=t.get("source_id")) for t in rows]
+    entities = [
+        LinkedEntity(
+            mention=e.get("mention", ""),
+            node_id=e["node_id"],
+            label=e.get("label", ""),
+            score=e.get("score", 0.0),
+        )
+        for e in linked
+    ]
+    return SubgraphResponse(
+        query=query,
+        hop=hop,
+        linked_entities=entities,
+        triples=triples,
+        cypher=f"MATCH (a)-[r]-(b) WHERE a.node_id IN {node_ids} RETURN a,r,b LIMIT {limit}",
+        stats=SubgraphStats(triples=len(triples), nodes=len(node_ids)),
+    )
+
+
+def ask_models(linked, rows) -> AskResponse:
+    """AskResponse as rag_engine builds it"""
+    citations = [
+        Citation(triple=f"({t['head']}, {t['relation']}, {t['tail']})", source_id=t["source_id"])
+        for t in rows[:5]
+    ]
+    return AskResponse(
+        answer="结论：三级医院住院费用报销比例为85%。\n引用：[1][2]\n需要补充：无",
+        citations=citations,
+        confidence="high",
+        debug=DebugInfo(
+            linked_entities=linked,
+            cypher="MATCH (a)-[r]-(b) WHERE a.node_id IN ['N0'] RETURN a,r,b LIMIT 20",
+            triples_used=len(rows),
+            intent="reimbursement_ratio",
+            route={"route": "large", "model": "mock", "latency_ms": 812.4, "cache": "miss"},
+            stages={"intent": 0.4, "linking": 2.1, "retrieval": 14.2, "llm": 812.4, "total": 835.0},
+            trace_id="4bf92f3577b34da6a3ce929d0e0e4736",
+        ),
+    )
+
+
+def build_app(n_triples: int) -> FastAPI:
+    linked, rows = synthetic_rows(n_triples)
+    app = FastAPI()
+
+    @app.get("/model/subgraph", response_model=SubgraphResponse)
+    async def model_subgraph():
+        return subgraph_models("职工医保", 2, n_triples, linked, rows)
+
+    @app.get("/fast/subgraph", response_model=SubgraphResponse, response_class=FastJSONResponse)
+    async def fast_subgraph():
+        return FastJSONResponse(subgraph_payload("职工医保", 2, n_triples, linked, rows))
+
+    @app.get("/model/ask", response_model=AskResponse)
+    async def model_ask():
+        return ask_models(linked, rows)
+
+    @app.get("/fast/ask", response_model=AskResponse, response_class=FastJSONResponse)
+    async def fast_ask():
+        return FastJSONResponse(ask_models(linked, rows))
+
+    return app
+
+
+async def call(app: FastAPI, path: str) -> bytes:
+    """One GET through the ASGI interface; returns the body"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": b"", "headers": [], "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    body = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return b"".join(body)
+
+
+async def measure(app: FastAPI, path: str, iterations: int, repeats: int) -> Tuple[float, int]:
+    """Best-of-repeats mean microseconds per request, and body size"""
+    body = await call(app, path)
+    for _ in range(min(iterations, 200)):
+        await call(app, path)
+    runs = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            await call(app, path)
+        runs.append((time.perf_counter() - start) / iterations * 1e6)
+    return min(runs), len(body)
+
+
+async def run(args) -> List[Dict[str, Any]]:
+    results = []
+    for n in args.triples:
+        app = build_app(n)
+        for route in ("subgraph", "ask"):
+            model_body = await call(app, f"/model/{route}")
+            fast_body = await call(app, f"/fast/{route}")
+            if json.loads(model_body) != json.loads(fast_body):
+                raise SystemExit(f"❌ /{route} bodies differ with {n} triples")
+            try:
+                RESPONSE_MODELS[route].model_validate_json(fast_body)
+            except ValidationError as e:
+                raise SystemExit(f"❌ /{route} fast body does not validate with {n} triples:\n{e}")
+            model_us, model_bytes = await measure(app, f"/model/{route}", args.iterations, args.repeats)
+            fast_us, fast_bytes = await measure(app, f"/fast/{route}", args.iterations, args.repeats)
+            results.append({
+                "route": route,
+                "triples": n,
+                "model_us": round(model_us, 1),
+                "fast_us": round(fast_us, 1),
+                "speedup": round(model_us / fast_us, 2),
+                "model_bytes": model_bytes,
+                "fast_bytes": fast_bytes,
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark response serialization paths")
+    parser.add_argument("--triples", type=int, nargs="+", default=[20, 100], help="Triples per response")
+    parser.add_argument("--iterations", type=int, default=2000, help="Requests per timed run")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed runs; the fastest is reported")
+    parser.add_argument("--output-file", help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    print(f"Encoder: {'orjson ' + orjson.__version__ if orjson is not None else 'json (orjson not installed)'}")
+    results = asyncio.run(run(args))
+
+    print(f"\n{'route':<10}{'triples':>8}{'model µs':>11}{'fast µs':>10}{'speedup':>9}{'model B':>10}{'fast B':>9}")
+    for r in results:
+        print(
+            f"{r['route']:<10}{r['triples']:>8}{r['model_us']:>11}{r['fast_us']:>10}"
+            f"{r['speedup']:>8}x{r['model_bytes']:>10}{r['fast_bytes']:>9}"
+        )
+    print(f"\nMedian speedup: {statistics.median(r['speedup'] for r in results):.2f}x")
+
+    if args.output_file:
+        with open(args.output_file, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Fail when questions make the backend block its event loop
+
+Sends the evaluation questions to a backend started with
+LOOP_BLOCK_DETECT=true, then reads /api/v1/loop (with the backend's
+PROFILE_TOKEN) and exits non-zero if any stall over LOOP_BLOCK_THRESHOLD_MS
+was recorded, printing each call site with its stack.
+
+Usage:
+    LOOP_BLOCK_DETECT=true PROFILE_TOKEN=secret uvicorn app.main:app &
+    PROFILE_TOKEN=secret python scripts/check_event_loop_blocking.py --backend-url http://localhost:8000
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def ask(backend_url: str, question: str) -> int:
+    response = requests.post(
+        f"{backend_url}/api/v1/ask",
+        json={"question": question, "priority": "batch"},
+        timeout=60,
+    )
+    return response.status_code
+
+
+def loop_report(backend_url: str, token: str) -> dict:
+    response = requests.get(f"{backend_url}/api/v1/loop", headers={"X-Profile-Token": token}, timeout=5)
+    if response.status_code == 403:
+        print("❌ /api/v1/loop refused the profile token (set PROFILE_TOKEN to the backend's)")
+        sys.exit(2)
+    response.raise_for_status()
+    return response.json()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check for event loop blocking")
+    parser.add_argument(
+        "--backend-url",
+        default=os.environ.get("BACKEND_URL", "http://localhost:8000"),
+        help="Backend URL",
+    )
+    parser.add_argument(
+        "--profile-token",
+        default=os.environ.get("PROFILE_TOKEN", ""),
+        help="Backend PROFILE_TOKEN, needed to read /api/v1/loop",
+    )
+    parser.add_argument("--questions-file", default="docs/eval_questions.json", help="Questions file")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent requests")
+    parser.add_argument("--rounds", type=int, default=2, help="Times to send each question")
+    args = parser.parse_args()
+
+    with open(args.questions_file, "r", encoding="utf-8") as f:
+        questions = [q["question"] for q in json.load(f)] * args.rounds
+
+    before = loop_report(args.backend_url, args.profile_token)
+    if before.get("blocking") is None:
+        print("❌ Backend is not running with LOOP_BLOCK_DETECT=true")
+        sys.exit(2)
+
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        statuses = list(pool.map(lambda q: ask(args.backend_url, q), questions))
+    print(f"Sent {len(statuses)} questions, {sum(s == 200 for s in statuses)} answered")
+
+    report = loop_report(args.backend_url, args.profile_token)
+    lag, blocking = report["lag"], report["blocking"]
+    print(f"Loop lag p50 {lag['p50_ms']}ms, p99 {lag['p99_ms']}ms, max {lag['max_ms']}ms")
+
+    stalls = blocking["stalls"] - before["blocking"]["stalls"]
+    if not stalls:
+        print(f"✅ No event loop stalls over {blocking['threshold_ms']:.0f}ms")
+        return
+
+    print(f"❌ {stalls} event loop stalls over {blocking['threshold_ms']:.0f}ms")
+    for site in blocking["sites"]:
+        print(f"\n  {site['site']}: {site['count']}x, max {site['max_ms']}ms")
+        for line in site["stack"][-8:]:
+            print(f"      {line}")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
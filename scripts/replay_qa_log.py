@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Replay logged questions against the GraphRAG API as open-loop load
+
+Reads qa_logs.jsonl (rotated and gzipped files included) up front and
+re-issues each question on its own schedule, whether or not earlier requests have
+finished. Arrivals follow the logged timestamps compressed by --speedup,
+or a fixed --rate. At most --concurrency requests are in flight; requests
+that find no free slot wait client-side, and that wait is reported as its
+own stage. Pipeline stages (linking, retrieval, llm, ...) come from the
+server's DebugInfo.stages, so TRACING_ENABLED must be on for the backend;
+round_trip is the client-side request time. The report covers throughput,
+per-stage latency percentiles and error rates.
+
+Usage:
+    python scripts/replay_qa_log.py --backend-url http://localhost:8000 --speedup 60
+    python scripts/replay_qa_log.py --asgi --rate 20 --max-requests 500
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Iterator, Tuple
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from app.logging_utils import get_log_dir  # noqa: E402
+from app.qa_log import log_files, read_qa_log  # noqa: E402
+
+PERCENTILES = (0.50, 0.90, 0.95, 0.99)
+
+
+def _timestamp(value: Any) -> Optional[float]:
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def load_arrivals(files: List[str]) -> List[Dict[str, Any]]:
+    """
+    Timestamp and question of every logged entry, read before replaying
+
+    Replaying against the backend that owns these logs appends to the
+    active file; reading it lazily would replay those new lines too.
+    """
+    return [
+        {"timestamp": entry.get("timestamp"), "question": entry.get("question")}
+        for entry in read_qa_log(files)
+    ]
+
+
+def schedule(
+    entries: Iterator[Dict[str, Any]],
+    speedup: float = 1.0,
+    rate: Optional[float] = None,
+    poisson: bool = False,
+    max_gap: Optional[float] = None,
+) -> Iterator[Tuple[float, str]]:
+    """
+    Yield (offset_seconds, question) in arrival order
+
+    With rate, arrivals are evenly spaced (or exponentially, with poisson);
+    otherwise they follow the logged timestamps divided by speedup, with
+    idle gaps capped at max_gap seconds after compression.
+    """
+    offset = 0.0
+    previous: Optional[float] = None
+    for entry in entries:
+        question = entry.get("question")
+        if not question:
+            continue
+        if rate:
+            gap = random.expovariate(rate) if poisson else 1.0 / rate
+            offset += gap if previous is not None else 0.0
+            previous = offset
+        else:
+            ts = _timestamp(entry.get("timestamp"))
+            if ts is None:
+                continue
+            if previous is not None:
+                gap = max(0.0, ts - previous) / speedup
+                offset += min(gap, max_gap) if max_gap is not None else gap
+            previous = ts
+        yield offset, question
+
+
+class Report:
+    """Per-request outcomes and stage latencies"""
+
+    def __init__(self):
+        self.stages: Dict[str, List[float]] = {}
+        self.outcomes: Dict[str, int] = {}
+        self.answered_by: Dict[str, int] = {}
+        self.sent = 0
+        self.started_at = 0.0
+        self.offered_s = 0.0  # time spent issuing arrivals
+        self.finished_at = 0.0
+
+    def add(self, outcome: str, stages: Dict[str, float], answered_by: Optional[str] = None):
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        for stage, ms in stages.items():
+            self.stages.setdefault(stage, []).append(ms)
+        if answered_by:
+            self.answered_by[answered_by] = self.answered_by.get(answered_by, 0) + 1
+
+    def summary(self) -> Dict[str, Any]:
+        elapsed = max(self.finished_at - self.started_at, 1e-9)
+        ok = self.outcomes.get("ok", 0)
+        return {
+            "requests": self.sent,
+            "elapsed_s": round(elapsed, 2),
+            "offered_rps": round(self.sent / self.offered_s, 2) if self.offered_s > 0 else None,
+            "throughput_rps": round(ok / elapsed, 2),
+            "error_rate": round(1 - ok / self.sent, 4) if self.sent else 0.0,
+            "outcomes": dict(sorted(self.outcomes.items())),
+            "answered_by": dict(sorted(self.answered_by.items())),
+            "stages_ms": {stage: _percentiles(values) for stage, values in self.stages.items()},
+        }
+
+
+def _percentiles(values: List[float]) -> Dict[str, Any]:
+    ordered = sorted(values)
+    result: Dict[str, Any] = {"count": len(ordered)}
+    for q in PERCENTILES:
+        result[f"p{int(q * 100)}"] = round(ordered[min(len(ordered) - 1, int(len(ordered) * q))], 1)
+    result["max"] = round(ordered[-1], 1)
+    return result
+
+
+async def send(
+    client: httpx.AsyncClient,
+    slots: asyncio.Semaphore,
+    report: Report,
+    question: str,
+    body: Dict[str, Any],
+    timeout: float,
+):
+    """Issue one question and record the client and server stages"""
+    queued = time.perf_counter()
+    async with slots:
+        started = time.perf_counter()
+        stages = {"client_wait": (started - queued) * 1000}
+        try:
+            response = await client.post("/api/v1/ask", json={"question": question, **body}, timeout=timeout)
+        except httpx.TimeoutException:
+            report.add("timeout", stages)
+            return
+        except httpx.HTTPError:
+            report.add("connection_error", stages)
+            return
+        round_trip = (time.perf_counter() - started) * 1000
+
+    stages["round_trip"] = round_trip
+    if response.status_code != 200:
+        report.add(f"http_{response.status_code}", stages)
+        return
+    data = response.json()
+    debug = data.get("debug") or {}
+    # Server-side per-stage milliseconds, including its own "total"
+    stages.update(debug.get("stages") or {})
+    outcome = "degraded" if data.get("degraded") else "ok"
+    report.add(outcome, stages, debug.get("answered_by"))
+
+
+async def replay(args, client: httpx.AsyncClient) -> Report:
+    log_dir = args.log_dir or get_log_dir()
+    files = log_files(log_dir)
+    if not files:
+        raise SystemExit(f"No QA logs in {log_dir}")
+
+    arrivals = schedule(
+        load_arrivals(files),
+        speedup=args.speedup,
+        rate=args.rate,
+        poisson=args.poisson,
+        max_gap=args.max_gap,
+    )
+    body = {"hop": args.hop, "limit": args.limit, "priority": args.priority}
+    slots = asyncio.Semaphore(args.concurrency)
+    report = Report()
+    pending = set()
+    lag = []
+
+    report.started_at = time.perf_counter()
+    for offset, question in arrivals:
+        if args.max_requests and report.sent >= args.max_requests:
+            break
+        if args.duration and offset > args.duration:
+            break
+        delay = report.started_at + offset - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        lag.append(max(0.0, time.perf_counter() - report.started_at - offset) * 1000)
+        task = asyncio.create_task(send(client, slots, report, question, body, args.timeout))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+        report.sent += 1
+        if args.progress and report.sent % args.progress == 0:
+            print(f"  sent {report.sent}, in flight {len(pending)}", file=sys.stderr)
+
+    report.offered_s = time.perf_counter() - report.started_at
+    if pending:
+        await asyncio.gather(*pending)
+    report.finished_at = time.perf_counter()
+    if lag:
+        # How late the generator itself issued arrivals; large values mean
+        # the load generator, not the backend, was the bottleneck
+        report.stages["schedule_lag"] = lag
+    return report
+
+
+async def run(args) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    if args.asgi:
+        from app.main import app, lifespan
+
+        async with lifespan(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://replay", limits=limits) as client:
+                report = await replay(args, client)
+    else:
+        async with httpx.AsyncClient(base_url=args.backend_url, limits=limits) as client:
+            report = await replay(args, client)
+    return report.summary()
+
+
+def print_report(summary: Dict[str, Any]):
+    print("=" * 60)
+    print("REPLAY REPORT")
+    print("=" * 60)
+    print(f"Requests:   {summary['requests']} in {summary['elapsed_s']}s")
+    print(f"Offered:    {summary['offered_rps']} req/s")
+    print(f"Throughput: {summary['throughput_rps']} req/s")
+    print(f"Error rate: {summary['error_rate'] * 100:.2f}%")
+    print(f"Outcomes:   {json.dumps(summary['outcomes'])}")
+    if summary["answered_by"]:
+        print(f"Answered:   {json.dumps(summary['answered_by'])}")
+    print()
+    print(f"{'stage (ms)':<14}{'count':>8}" + "".join(f"{f'p{int(q * 100)}':>10}" for q in PERCENTILES) + f"{'max':>10}")
+    for stage, p in summary["stages_ms"].items():
+        print(
+            f"{stage:<14}{p['count']:>8}"
+            + "".join(f"{p[f'p{int(q * 100)}']:>10}" for q in PERCENTILES)
+            + f"{p['max']:>10}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay QA logs as load")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument(
+        "--backend-url",
+        default=os.environ.get("BACKEND_URL", "http://localhost:8000"),
+        help="Backend URL",
+    )
+    target.add_argument("--asgi", action="store_true", help="Drive the in-process app instead of a URL")
+    parser.add_argument("--log-dir", default=None, help="Directory holding qa_logs.jsonl (default: LOG_DIR)")
+    parser.add_argument("--speedup", type=float, default=1.0, help="Compress logged inter-arrival times")
+    parser.add_argument("--max-gap", type=float, default=None, help="Cap compressed idle gaps (seconds)")
+    parser.add_argument("--rate", type=float, default=None, help="Fixed arrival rate (req/s) instead of timestamps")
+    parser.add_argument("--poisson", action="store_true", help="Exponential inter-arrivals with --rate")
+    parser.add_argument("--concurrency", type=int, default=64, help="Maximum requests in flight")
+    parser.add_argument("--max-requests", type=int, default=0, help="Stop after N requests")
+    parser.add_argument("--duration", type=float, default=0, help="Stop scheduling after N seconds")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout (seconds)")
+    parser.add_argument("--hop", type=int, default=2, help="Hop count for subgraph")
+    parser.add_argument("--limit", type=int, default=20, help="Evidence limit")
+    parser.add_argument("--priority", choices=["interactive", "batch"], default="interactive")
+    parser.add_argument("--progress", type=int, default=0, help="Print progress every N requests")
+    parser.add_argument("--output-file", default=None, help="Also write the report as JSON")
+    args = parser.parse_args()
+
+    if args.speedup <= 0 or (args.rate is not None and args.rate <= 0):
+        parser.error("--speedup and --rate must be positive")
+
+    summary = asyncio.run(run(args))
+    print_report(summary)
+    if args.output_file:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output_file)), exist_ok=True)
+        with open(args.output_file, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
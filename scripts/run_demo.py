@@ -25,7 +25,7 @@ def ask_question(backend_url: str, question: str, hop: int = 2, limit: int = 20)
     """Ask a question via API"""
     response = requests.post(
         f"{backend_url}/api/v1/ask",
-        json={"question": question, "hop": hop, "limit": limit},
+        json={"question": question, "hop": hop, "limit": limit, "priority": "batch"},
         timeout=30,
     )
     response.raise_for_status()